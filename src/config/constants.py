@@ -5,7 +5,7 @@
 # 초기 메시지
 INITIAL_MASTER_MESSAGE = "어서 오세요, 모험가님. 어떤 세계를 탐험하고 싶으신가요?"
 
-# 백업 응답
+# 백업 응답 (절차적 생성기가 실패했을 때 마지막으로 쓰는 고정 응답)
 BACKUP_RESPONSES = {
     "world": "당신이 선택한 세계는 신비로운 곳으로, 다양한 인종과 마법이 공존합니다. 북쪽의 산맥에는 고대 종족이 살고 있으며, 남쪽의 숲에는 미지의 생물이 서식합니다. 중앙 평원에는 인간 문명이 발달했으며, 동쪽 바다에는 무역 항로가 발달했습니다. 세계의 균형은 최근 어둠의 세력으로 인해 위협받고 있습니다.",
     "character": "당신은 멀리서 온 여행자로 특별한 재능을 가지고 있습니다. 어린 시절 신비로운 사건을 경험한 후, 그 진실을 찾아 여행하게 되었습니다. 길을 떠나는 동안 다양한 기술을 익혔고, 이제는 자신의 운명을 찾아 나서고 있습니다.",
@@ -13,9 +13,200 @@ BACKUP_RESPONSES = {
     "question": "흥미로운 질문입니다! 이 세계의 그 부분은 아직 완전히 탐험되지 않았지만, 전설에 따르면 그곳에는 고대의 지식이 숨겨져 있다고 합니다. 더 알고 싶다면 직접 탐험해보는 것이 좋겠습니다."
 }
 
+# 백업 응답 절차적 생성 설정 (API 없이도 호출 위치에 맞는 응답을 바로 생성)
+BACKUP_NARRATIVE_SEED_ENV_VAR = "TRPG_BACKUP_SEED"  # 백업 응답 시드 (같은 시드와 프롬프트면 같은 응답)
+BACKUP_NARRATIVE_SETTINGS = {
+    "seed": 0,
+    "fill_ratio": 0.6,  # 호출 위치의 최대 토큰 수(2글자당 1토큰) 대비 채울 비율 - 실제 응답과 비슷한 길이
+}
+
 # API 관련 설정
 API_KEY_SECRET_NAME = "GEMINI_NEW_0226"
 
+# LLM 백엔드 설정
+# - gemini: Google Gemini API (기본값)
+# - stub: 프로세스 안에서 결정적 가짜 응답 생성 (API 없이 부하/지연 테스트)
+# - http: 로컬 스텁 서버(python -m src.utils.stub_server)처럼 같은 프로토콜의 HTTP 서버
+# - local: transformers 인과 언어 모델을 CPU에서 직접 실행 (LOCAL_MODEL_SETTINGS)
+# - replay: 기록해 둔 카세트 파일의 응답을 기록된 지연 시간으로 재생 (CASSETTE_SETTINGS)
+LLM_BACKEND = "gemini"
+LLM_BACKEND_ENV_VAR = "TRPG_LLM_BACKEND"  # 환경 변수로 백엔드 선택 (secrets의 LLM_BACKEND보다 우선)
+STUB_SERVER_URL = "http://127.0.0.1:8765"
+STUB_SERVER_URL_ENV_VAR = "TRPG_STUB_SERVER_URL"
+STUB_BACKEND_SETTINGS = {
+    "seed": 0,
+    # 첫 응답까지 지연 시간 분포 (fixed, uniform, exponential, lognormal)와 스트리밍 조각 사이 지연
+    "latency": {"distribution": "lognormal", "median": 0.8, "sigma": 0.5, "chunk_delay": 0.05},
+    "error_rate": 0.0,  # 오류 주입 비율 (0~1)
+    "error_weights": {"quota": 1, "transient": 2, "timeout": 1, "safety": 1},
+    "timeout_hang": 60.0,  # timeout 오류 주입 시 응답을 멈추는 시간(초)
+}
+LOCAL_MODEL_ENV_VAR = "TRPG_LOCAL_MODEL"  # 환경 변수로 로컬 모델 경로/이름 지정
+LOCAL_MODEL_SETTINGS = {
+    "model": "skt/kogpt2-base-v2",  # Hugging Face 모델 이름 또는 경로 ("tiny"면 다운로드 없는 무작위 초기화 모델)
+    "num_threads": None,            # torch 연산 스레드 수 (None이면 CPU 코어 수)
+    "quantize": True,               # Linear 층 int8 동적 양자화
+    "max_input_tokens": 768,        # 프롬프트 최대 토큰 수 (넘으면 앞부분을 잘라냄)
+    "temperature": 0.8,
+    "top_p": 0.95,
+    "top_k": 40,
+    "warmup": True,                 # 로딩 직후 짧은 생성으로 예열
+    # 여러 세션의 요청을 모아 한 번에 생성 (첫 요청 뒤 max_wait초 동안 최대 max_batch_size개)
+    "batching": {"max_batch_size": 8, "max_wait": 0.02},
+    # 프롬프트가 공유하는 앞부분(지시문, 세션별 게임 정보)의 key/value 재사용
+    # 최근 history_size개 프롬프트와 min_tokens 이상 겹치는 앞부분만 max_bytes 안에서 LRU로 보관
+    "prefix_cache": {"max_bytes": 256 * 1024 * 1024, "min_tokens": 16, "history_size": 64},
+    "seed": 0,
+}
+
+# LLM 호출 기록/재생(cassette) 설정 - 같은 세션을 재현해 커밋 간 성능 비교에 사용
+# 기록/재생 중에는 호출 순서를 그대로 유지하도록 응답 캐시 조회, 요청 합치기, 중복 호출을 건너뜀
+CASSETTE_RECORD_ENV_VAR = "TRPG_LLM_RECORD"     # 카세트 파일 경로를 지정하면 모든 백엔드 호출을 기록
+CASSETTE_PATH_ENV_VAR = "TRPG_LLM_CASSETTE"     # replay 백엔드가 재생할 카세트 파일 경로
+CASSETTE_LATENCY_SCALE_ENV_VAR = "TRPG_REPLAY_LATENCY_SCALE"
+CASSETTE_SETTINGS = {
+    "path": "cassettes/session.jsonl",  # 기본 재생 카세트 파일
+    "latency_scale": 1.0,               # 기록된 지연 시간 배율 (0이면 지연 없이 재생)
+}
+DICE_SEED_ENV_VAR = "TRPG_DICE_SEED"    # 주사위 난수 시드 (지정하면 같은 순서의 주사위 결과 재현)
+
+# 세계관 설명 컨텍스트 캐시 설정 (세션마다 세계관 설명을 한 번 올려두고 이후 호출에서 참조)
+# SDK/모델이 지원하지 않거나 세계관이 모델의 최소 캐시 크기보다 작으면 프롬프트에 직접 포함
+WORLD_CONTEXT_CACHE_SETTINGS = {
+    "model": None,          # 캐시를 만들 모델 (None이면 현재 모델, 캐시는 버전이 고정된 모델 이름이 필요할 수 있음)
+    "system_instruction": "당신은 TRPG 게임 마스터입니다. 함께 제공된 세계관 설명과 일관되게 한국어로 답변하세요.",
+    "ttl": 3600,            # 캐시 유지 시간(초)
+    "refresh_margin": 60,   # 만료 이만큼 전에 새로 생성(초)
+    "retry_after": 600,     # 생성 실패 후 다시 시도하기까지 대기 시간(초)
+}
+
+# 프롬프트 토큰 예산 설정
+# sentencepiece 모델 파일은 저장소에 포함하지 않으므로 기본값은 None (한국어 근사 계산)
+# 정확한 토큰 수가 필요하면 환경 변수 TRPG_TOKENIZER_MODEL에 모델 파일 경로를 지정해야 함
+TOKENIZER_MODEL_PATH = None
+TOKENIZER_MODEL_ENV_VAR = "TRPG_TOKENIZER_MODEL"    # 환경 변수로 모델 파일 경로 지정
+# 호출 위치별 프롬프트 전체 토큰 예산 (고정 지시문을 뺀 나머지를 직전 이야기 등 가변 구역에 배분)
+PROMPT_TOKEN_BUDGETS = {
+    "story_response": 1000,
+    "turn": 1400,
+    "action_suggestions": 800,
+    "default": 1500,
+}
+WORLD_CONTEXT_MAX_TOKENS = 3000     # 컨텍스트 캐시 없이 프롬프트에 직접 넣는 세계관 설명 최대 토큰 수
+OUTPUT_TOKEN_TOLERANCE = 1.2        # 응답 길이 제한 시 max_tokens 대비 허용 배수 (모델과 계수기의 토큰 수 차이 감안)
+
+# AI 응답 캐시 설정
+RESPONSE_CACHE_DB_PATH = ".cache/llm_responses.sqlite3"
+RESPONSE_CACHE_TTL = 7 * 24 * 3600  # 7일
+RESPONSE_CACHE_MEMORY_MAX_ENTRIES = 256
+RESPONSE_CACHE_DISK_MAX_ENTRIES = 5000
+
+# 호출 위치별 AI 호출 정책
+# - cache: 동일 프롬프트 응답 재사용 여부 (서사 생성은 다양성을 위해 끔)
+# - timeout: 재시도를 포함한 전체 호출 마감 시간(초)
+# - priority: 속도 제한 대기열 우선순위 (LLM_PRIORITIES)
+# - coalesce: 동시에 들어온 동일 요청이 한 번의 호출 결과를 함께 받을 최대 요청 수
+#             (None이면 제한 없음, 1이면 합치지 않음 - 다양한 결과가 필요한 호출에 사용)
+# - tier: 호출할 모델 등급 (LLM_MODEL_TIERS, 분류/추출처럼 짧은 작업은 fast)
+# - max_tokens: 생성할 최대 토큰 수 상한 (None이면 호출한 쪽 값 그대로)
+# - downgrade: 모델 등급의 대기열이 밀릴 때 아래 등급으로 낮춰 호출해도 되는지
+# - hedge: 응답이 늦으면 같은 요청을 한 번 더 보내 먼저 온 응답을 사용할지 (HEDGE_SETTINGS)
+LLM_CALL_SITES = {
+    "world_description": {"cache": False, "timeout": 30, "priority": "interactive", "coalesce": 3, "tier": "pro", "max_tokens": None, "downgrade": False, "hedge": False},
+    "world_expansion": {"cache": False, "timeout": 30, "priority": "interactive", "coalesce": 1, "tier": "pro", "max_tokens": None, "downgrade": False, "hedge": False},
+    "world_question": {"cache": True, "timeout": 20, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": True},
+    "game_question": {"cache": True, "timeout": 20, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": True},
+    "character_options": {"cache": False, "timeout": 30, "priority": "interactive", "coalesce": 2, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": False},
+    "movement_story": {"cache": False, "timeout": 20, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": True},
+    "story_response": {"cache": False, "timeout": 30, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": True},
+    "action_suggestions": {"cache": False, "timeout": 8, "priority": "interactive", "coalesce": None, "tier": "fast", "max_tokens": 300, "downgrade": False, "hedge": False},
+    "ability_outcome": {"cache": True, "timeout": 10, "priority": "prefetch", "coalesce": None, "tier": "fast", "max_tokens": 200, "downgrade": False, "hedge": False},
+    "ability_suggestion": {"cache": True, "timeout": 5, "priority": "interactive", "coalesce": None, "tier": "fast", "max_tokens": 250, "downgrade": False, "hedge": False},
+    "turn": {"cache": False, "timeout": 45, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": False, "hedge": False},
+    "extract_items": {"cache": True, "timeout": 5, "priority": "extraction", "coalesce": None, "tier": "fast", "max_tokens": 250, "downgrade": False, "hedge": False},
+    "extract_used_items": {"cache": True, "timeout": 5, "priority": "extraction", "coalesce": None, "tier": "fast", "max_tokens": 120, "downgrade": False, "hedge": False},
+}
+DEFAULT_CALL_SITE_POLICY = {"cache": False, "timeout": 20, "priority": "interactive", "coalesce": None, "tier": "pro", "max_tokens": None, "downgrade": True, "hedge": False}
+
+# 지연 꼬리 대응 중복 호출(hedging) 설정 (호출 정책의 hedge가 True인 호출에만 적용)
+HEDGE_SETTINGS = {
+    "percentile": 0.9,      # 호출 위치별 응답 시간의 이 백분위가 지나도 응답이 없으면 한 번 더 호출
+    "min_samples": 20,      # 백분위를 계산할 최소 관측 수 (그 전에는 중복 호출하지 않음)
+    "window": 200,          # 호출 위치별로 최근 몇 번의 응답 시간을 볼지
+    "min_delay": 0.5,       # 중복 호출 전 최소 대기 시간(초)
+    "budget_ratio": 0.05,   # 중복 호출이 전체 호출 수의 이 비율을 넘지 않도록 제한
+    "budget_burst": 5,      # 한꺼번에 쓸 수 있는 최대 중복 호출 수
+}
+
+# LLM 호출 계측 설정
+TELEMETRY_SETTINGS = {
+    "latency_buckets": (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0),  # 호출 시간 히스토그램 구간(초)
+    "event_log_path": None,     # 호출마다 이벤트를 덧붙일 JSON lines 파일 (None이면 기록 안 함)
+    "admin_panel": False,       # 사이드바에 호출 지표 패널 표시 여부
+}
+TELEMETRY_EVENT_LOG_ENV_VAR = "TRPG_TELEMETRY_LOG"  # 환경 변수로 이벤트 파일 경로 지정
+ADMIN_PANEL_ENV_VAR = "TRPG_ADMIN_PANEL"            # 환경 변수(1)로 관리자 패널 표시
+
+# 비동기 동시 호출 설정
+DEFAULT_MAX_CONCURRENCY = 4
+
+# AI 호출 장애 대응 설정 (프로세스 전체 공유)
+CIRCUIT_FAILURE_THRESHOLD = 3       # 연속 실패 몇 번이면 호출을 차단할지
+CIRCUIT_RECOVERY_TIMEOUT = 15.0     # 차단 후 시험 호출까지 대기 시간(초)
+CIRCUIT_MAX_RECOVERY_TIMEOUT = 300.0  # 시험 호출이 계속 실패할 때 최대 차단 시간(초)
+BACKOFF_BASE_DELAY = 0.5            # 재시도 기본 대기 시간(초)
+BACKOFF_MAX_DELAY = 8.0             # 재시도 최대 대기 시간(초)
+# 마감 시간 적용 호출용 스레드 수 (마감 시간이 지나도 응답하지 않는 호출이 끝날 때까지 스레드를 붙잡으므로
+# 동시 호출 수보다 넉넉하게 두고, 모두 사용 중이면 새 호출을 거절하고 회로 차단기를 엶)
+LLM_CALL_MAX_WORKERS = 16
+
+# AI 호출 속도 제한 설정 (프로세스 전체 공유)
+RATE_LIMIT_REQUESTS_PER_MINUTE = 60
+RATE_LIMIT_TOKENS_PER_MINUTE = 120000
+# 우선순위 (작을수록 먼저 처리): 화면 응답 > 아이템 추출 > 미리 생성
+LLM_PRIORITIES = {"interactive": 0, "extraction": 1, "prefetch": 2}
+# 실제 모델 응답으로 보는 호출 결과 (백업 응답과 달리 분류기 학습이나 변형 캐시에 사용)
+MODEL_RESPONSE_OUTCOMES = ("success", "cache_hit", "coalesced")
+# 우선순위별 최대 대기 시간(초), None이면 호출 마감 시간까지 대기
+RATE_LIMIT_MAX_WAIT = {"interactive": None, "extraction": 10.0, "prefetch": 3.0}
+
+# 모델 등급별 설정 (속도 제한기는 모델별 한도에 맞춰 등급마다 따로 둠)
+# - models: 시도할 Gemini 모델 이름 (앞에서부터)
+# - requests_per_minute / tokens_per_minute: 분당 요청/토큰 한도
+# - downgrade_to: 대기열이 밀릴 때 낮춰 호출할 등급 (None이면 낮추지 않음)
+LLM_MODEL_TIERS = {
+    "pro": {
+        "models": ["gemini-1.5-pro", "gemini-pro"],
+        "requests_per_minute": RATE_LIMIT_REQUESTS_PER_MINUTE,
+        "tokens_per_minute": RATE_LIMIT_TOKENS_PER_MINUTE,
+        "downgrade_to": "fast",
+    },
+    "fast": {
+        "models": ["gemini-1.5-flash", "gemini-pro"],
+        "requests_per_minute": 300,
+        "tokens_per_minute": 1000000,
+        "downgrade_to": None,
+    },
+}
+ROUTE_DOWNGRADE_WAIT = 2.0  # 대기열 예상 대기 시간이 이보다 길면(초) 아래 등급으로 낮춰 호출
+
+# 오류 분류별 처리 정책
+# - retry: 같은 호출을 재시도할지 여부
+# - count: 연속 실패 수에 포함할지 여부 (안전 차단은 서비스 장애가 아님)
+# - open_for: 즉시 회로를 차단할 시간(초), None이면 연속 실패 수로 판단
+# - base_delay: 재시도 기본 대기 시간(초)
+LLM_ERROR_POLICIES = {
+    "quota": {"retry": False, "count": True, "open_for": 30.0, "base_delay": BACKOFF_BASE_DELAY},
+    "timeout": {"retry": True, "count": True, "open_for": None, "base_delay": BACKOFF_BASE_DELAY},
+    "safety": {"retry": False, "count": False, "open_for": None, "base_delay": BACKOFF_BASE_DELAY},
+    "auth": {"retry": False, "count": True, "open_for": CIRCUIT_MAX_RECOVERY_TIMEOUT, "base_delay": BACKOFF_BASE_DELAY},
+    "saturated": {"retry": False, "count": True, "open_for": CIRCUIT_RECOVERY_TIMEOUT, "base_delay": BACKOFF_BASE_DELAY},
+    "transient": {"retry": True, "count": True, "open_for": None, "base_delay": 1.0},
+}
+
+# 백그라운드 미리 생성 설정
+BACKGROUND_MAX_WORKERS = 4
+
 # 주사위 관련
 DEFAULT_DICE_TYPE = 20
 DEFAULT_DICE_COUNT = 1
@@ -88,6 +279,51 @@ PROFESSION_KEY_STATS = {
     '저항군 요원': ['DEX', 'CON']
 }
 
+# 행동 판정 로컬 분류기 설정 (신뢰도가 기준 이상이면 AI 호출 없이 바로 판정)
+# - confidence_threshold: 이 신뢰도 미만이면 AI에 판정을 맡기고 그 결과를 학습
+# - log_path: AI 판정 기록(JSON lines) - 시작할 때 이 기록으로 학습
+# - keyword_weight: 능력치 키워드 하나가 맞을 때 더할 점수
+# - profession_weight: 직업의 중요 능력치(PROFESSION_KEY_STATS)에 더할 점수
+# - ngram_weight: 기록에서 학습한 글자 n-gram 점수 배율
+# - enrich_outcomes: 로컬 판정 후 성공/실패 결과 문장을 AI로 백그라운드에서 보강
+ABILITY_CLASSIFIER_SETTINGS = {
+    "confidence_threshold": 0.6,
+    "log_path": ".cache/ability_decisions.jsonl",
+    "keyword_weight": 2.5,
+    "profession_weight": 0.5,
+    "ngram_sizes": (2, 3),
+    "ngram_weight": 3.0,
+    "base_difficulty": 12,
+    "enrich_outcomes": True,
+}
+
+# 능력치별 행동 키워드 (어간 위주로 적어 활용형도 포함되도록 함)
+ABILITY_KEYWORDS = {
+    'STR': ['밀어', '밀치', '부수', '부숴', '깨뜨', '들어올', '들어 올', '끌어', '당기', '힘껏', '힘으로', '내리치', '때리', '공격', '베어', '휘두르', '휘둘', '던지', '붙잡', '제압', '격투', '싸우', '돌파', '박살', '뜯어', '열어젖'],
+    'DEX': ['몰래', '숨어', '숨는', '숨긴', '잠입', '피하', '피한', '회피', '훔치', '훔쳐', '소매치기', '자물쇠', '따고', '뛰어넘', '기어오', '기어 오르', '기어 올', '올라가', '균형', '재빨리', '재빠르', '조준', '사격', '쏜다', '쏘아', '활을', '조종', '곡예', '미끄러', '해제'],
+    'CON': ['버티', '버틴', '견디', '견뎌', '참고', '참는', '오래 달리', '헤엄', '수영', '독을', '마신', '단식', '추위', '더위', '지구력', '끝까지', '강행군', '숨을 참'],
+    'INT': ['조사', '분석', '해독', '해석', '연구', '기억', '계산', '추리', '단서', '고대 문자', '문서', '책을', '지도를', '해킹', '프로그램', '암호', '마법진', '주문', '마법을', '기계', '장치', '수리', '고친', '고치', '설계', '연금'],
+    'WIS': ['살펴', '살핀', '둘러본', '둘러보', '관찰', '감지', '느껴', '느낀', '귀를 기울', '엿듣', '경계', '눈치', '직감', '찾아본', '찾는', '흔적', '추적', '치료', '치유', '응급', '기도', '명상', '동물', '길을 찾', '위험을 감지'],
+    'CHA': ['말을 건', '말을 걸', '대화', '설득', '협상', '흥정', '거래', '부탁', '속이', '속여', '거짓말', '위협', '협박', '겁을', '유혹', '매혹', '연설', '노래', '연주', '공연', '인사', '질문', '물어본', '물어보', '묻는', '소문', '정보를 얻', '동료로', '변장', '사과'],
+}
+
+# 난이도 조정 키워드 (키워드 -> 더할 난이도)
+DIFFICULTY_KEYWORDS = {
+    '조심스럽게': -2, '천천히': -2, '가볍게': -3, '간단히': -3, '잠시': -2, '주변을': -2,
+    '재빨리': 2, '단숨에': 3, '동시에': 3, '강력한': 3, '거대한': 4, '위험': 3,
+    '무장한': 3, '경비': 3, '수많은': 4, '모두': 3, '전설': 5, '불가능': 6, '보스': 5, '드래곤': 6,
+}
+
+# 로컬 판정에서 AI 보강 전까지 보여줄 능력치별 기본 결과 문장 (성공 시, 실패 시)
+ABILITY_OUTCOME_TEMPLATES = {
+    'STR': ("힘으로 밀어붙여 원하는 결과를 얻습니다.", "힘이 모자라 뜻대로 되지 않습니다."),
+    'DEX': ("재빠르고 정확한 몸놀림으로 해냅니다.", "동작이 한 박자 늦어 실수를 합니다."),
+    'CON': ("끝까지 버텨내며 고비를 넘깁니다.", "버티지 못하고 지쳐 물러납니다."),
+    'INT': ("지식과 추론으로 실마리를 풀어냅니다.", "중요한 부분을 놓쳐 답을 찾지 못합니다."),
+    'WIS': ("예리한 감각으로 중요한 것을 알아챕니다.", "주의가 흐트러져 중요한 것을 놓칩니다."),
+    'CHA': ("상대의 마음을 움직여 원하는 반응을 얻습니다.", "상대가 경계하며 마음을 열지 않습니다."),
+}
+
 # 제안된 질문 목록
 SUGGESTED_WORLD_QUESTIONS = [
     "이 세계의 마법/기술 체계는 어떻게 작동하나요?",
@@ -99,6 +335,134 @@ SUGGESTED_WORLD_QUESTIONS = [
     "전설적인 인물이나 영웅은 누구인가요?",
 ]
 
+# 기본 행동 제안 (AI 응답이 부족할 때 사용)
+DEFAULT_ACTION_SUGGESTIONS = [
+    "[일반] 주변을 자세히 살펴본다",
+    "[상호작용] 근처에 있는 사람에게 말을 건다",
+    "[아이템 획득] 쓸만한 물건이 있는지 찾아본다",
+]
+
+# 로컬 행동 제안 설정 (AI 제안이 도착하기 전까지 템플릿으로 만든 제안을 바로 표시)
+# - count: 만들 제안 수
+# - ai_wait: 로컬 제안을 보여준 채 AI 제안을 기다릴 최대 시간(초)
+# - poll_interval: AI 제안 도착 확인 간격(초) - st.fragment를 지원하면 화면의 이 부분만 이 간격으로 다시 실행
+LOCAL_ACTION_SETTINGS = {"count": 5, "ai_wait": 15, "poll_interval": 1.0}
+
+# 로컬 행동 제안 템플릿 (태그별, {location}/{keyword}/{item}/{person}/{threat} 치환, 조사는 '을(를)' 형태로 적음)
+LOCAL_ACTION_TEMPLATES = {
+    "[아이템 획득]": [
+        "{location} 구석구석을 뒤져 쓸만한 물건을 찾아본다",
+        "{keyword} 근처에 떨어진 물건이 있는지 찾아본다",
+    ],
+    "[아이템 사용]": [
+        "{item}을(를) 꺼내 지금 상황에 사용해 본다",
+        "{item}을(를) 이용해 {keyword}을(를) 조사한다",
+    ],
+    "[위험]": [
+        "{threat}의 흔적을 쫓아 {location} 깊숙이 들어간다",
+        "위험을 무릅쓰고 {keyword} 쪽으로 다가간다",
+        "{threat}에 맞서 무기를 휘두를 준비를 한다",
+    ],
+    "[상호작용]": [
+        "{person}에게 말을 걸어 {keyword}에 대해 묻는다",
+        "{person}에게 이곳의 소문을 물어본다",
+    ],
+    "[일반]": [
+        "{location}을(를) 천천히 둘러보며 단서를 찾는다",
+        "{keyword}을(를) 자세히 살펴본다",
+        "잠시 숨을 고르며 주변의 소리에 귀를 기울인다",
+    ],
+}
+
+# 로컬 행동 제안에 사용할 테마별 인물과 위협
+LOCAL_ACTION_WORDS = {
+    "fantasy": {
+        "people": ["여관 주인", "떠돌이 음유시인", "늙은 사냥꾼", "순례자", "경비병"],
+        "threats": ["고블린 무리", "굶주린 늑대", "수상한 그림자", "도적떼"],
+    },
+    "sci-fi": {
+        "people": ["정비공", "보안 요원", "외계 상인", "항법사", "의무관"],
+        "threats": ["폭주한 드론", "정체불명의 생명체", "무장한 해적", "고장 난 경비 로봇"],
+    },
+    "dystopia": {
+        "people": ["배급소 직원", "저항군 연락책", "암시장 상인", "떠돌이 아이", "정보 브로커"],
+        "threats": ["감시 드론", "집행관 순찰대", "약탈자 무리", "독성 안개"],
+    },
+}
+
+# 테마별 고정 위치 목록 (이동 스토리 콘텐츠 팩도 이 위치 사이의 경로로 생성)
+THEME_LOCATIONS = {
+    "fantasy": ["왕국의 수도", "마법사의 탑", "고대 숲", "상인 거리", "지하 미궁"],
+    "sci-fi": ["중앙 우주 정거장", "연구 시설", "거주 구역", "우주선 정비소", "외계 식민지"],
+    "dystopia": ["지하 피난처", "통제 구역", "폐허 지대", "저항군 은신처", "권력자 거주구"],
+}
+DEFAULT_LOCATIONS = ["시작 지점", "미지의 땅", "중심부", "외곽 지역", "비밀 장소"]
+
+# 위치 그래프 메타데이터 (position은 거리 계산용 지도 좌표(km), danger는 위험도 0~5)
+# 여기에 없는 위치는 원 위에 고르게 배치하고 기본 위험도 사용
+LOCATION_GRAPH_NODES = {
+    "fantasy": {
+        "왕국의 수도": {"position": (0.0, 0.0), "danger": 1},
+        "상인 거리": {"position": (1.0, -1.5), "danger": 1},
+        "마법사의 탑": {"position": (5.0, 3.0), "danger": 2},
+        "고대 숲": {"position": (-7.0, 4.0), "danger": 3},
+        "지하 미궁": {"position": (-3.0, -8.0), "danger": 5},
+    },
+    "sci-fi": {
+        "중앙 우주 정거장": {"position": (0.0, 0.0), "danger": 1},
+        "거주 구역": {"position": (1.5, 1.0), "danger": 1},
+        "우주선 정비소": {"position": (-2.0, 1.5), "danger": 2},
+        "연구 시설": {"position": (4.0, -3.0), "danger": 3},
+        "외계 식민지": {"position": (12.0, 9.0), "danger": 4},
+    },
+    "dystopia": {
+        "지하 피난처": {"position": (0.0, 0.0), "danger": 1},
+        "저항군 은신처": {"position": (-2.0, -1.5), "danger": 2},
+        "폐허 지대": {"position": (-5.0, 4.0), "danger": 4},
+        "통제 구역": {"position": (4.0, 2.0), "danger": 4},
+        "권력자 거주구": {"position": (7.0, 5.0), "danger": 5},
+    },
+}
+LOCATION_DANGER_LABELS = ["안전", "평온", "주의", "위험", "매우 위험", "치명적"]
+
+# 위치 그래프 설정 (경로마다 이동 스토리 변형을 캐시해 두고 이동할 때 바로 하나를 고름)
+# - variants_per_edge: 경로마다 유지할 이동 스토리 변형 수
+# - refresh_after_uses: 변형 하나를 이만큼 보여주면 백그라운드에서 새 변형을 만들어 가장 많이 본 변형과 교체
+# - max_edges: 변형을 캐시할 최대 경로 수 (세계관별 경로 포함, 오래 쓰지 않은 경로부터 버림)
+# - per_world: 세계관마다 변형을 따로 캐시 (AI 변형은 세계관 컨텍스트로 생성되므로)
+# - prefetch: 새 위치에 도착하면 그 위치에서 나가는 경로의 모자란 변형을 백그라운드에서 미리 생성
+# - travel_speed: 이동 시간 계산용 속도(km/h)
+# - long_distance: 이 거리(km) 이상이면 경로 위험도 1 증가
+LOCATION_GRAPH_SETTINGS = {
+    "variants_per_edge": 3,
+    "refresh_after_uses": 2,
+    "max_edges": 2000,
+    "per_world": True,
+    "prefetch": True,
+    "default_danger": 2,
+    "travel_speed": 4.0,
+    "long_distance": 10.0,
+}
+
+# 테마별 기본 직업 목록 (배경 옵션 콘텐츠 팩도 이 직업으로 생성)
+THEME_PROFESSIONS = {
+    "fantasy": ["마법사", "전사", "도적", "성직자", "음유시인", "연금술사"],
+    "sci-fi": ["우주 파일럿", "사이버 해커", "생체공학자", "보안 요원", "외계종족 전문가", "기계공학자"],
+    "dystopia": ["정보 브로커", "밀수업자", "저항군 요원", "엘리트 경비원", "스카운터", "의료 기술자"],
+}
+DEFAULT_PROFESSIONS = ["모험가", "전문가", "기술자"]
+
+# 오프라인 콘텐츠 팩 설정 (python -m src.utils.content_pack으로 미리 생성한 세계관/배경/이동 스토리)
+# 팩 파일이 없으면 지금처럼 매번 AI로 생성
+# - live_enrichment: 팩 항목을 바로 보여준 뒤 AI 생성을 백그라운드에서 진행해 도착하면 선택지로 추가
+# - variants: 팩 생성 시 기본 항목 수 (세계관은 테마별, 배경은 직업별 생성 횟수(한 번에 3개), 이동은 경로별)
+CONTENT_PACK_ENV_VAR = "TRPG_CONTENT_PACK"  # 팩 파일 경로 (빈 문자열이면 팩을 사용하지 않음)
+CONTENT_PACK_SETTINGS = {
+    "path": "packs/content.pack",
+    "live_enrichment": {"world": True, "background": True},
+    "variants": {"world": 16, "background": 8, "movement": 6},
+}
+
 # 게임 진행 중 제안된 질문 목록
 SUGGESTED_GAME_QUESTIONS = [
     "이 지역의 위험 요소는 무엇인가요?",
@@ -0,0 +1,72 @@
+"""
+AI 구조화 응답(JSON) 스키마를 관리하는 모듈
+
+Gemini의 response_schema와 응답 검증(utils.json_parser.validate_json)에 함께 사용합니다.
+"""
+from .constants import ABILITY_NAMES
+
+# 획득 아이템 목록 (Item.from_dict에 바로 전달할 수 있는 형태)
+ITEM_LIST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "description": {"type": "string"},
+            "consumable": {"type": "boolean"},
+            "durability": {"type": "integer", "nullable": True},
+            "quantity": {"type": "integer"},
+            "type": {"type": "string"}
+        },
+        "required": ["name"]
+    }
+}
+
+# 사용 아이템 목록
+USED_ITEM_LIST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "quantity": {"type": "integer"}
+        },
+        "required": ["name"]
+    }
+}
+
+# 행동 판정 능력치 제안
+ABILITY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ability_code": {"type": "string", "enum": list(ABILITY_NAMES.keys())},
+        "difficulty": {"type": "integer"},
+        "reason": {"type": "string"},
+        "success_outcome": {"type": "string"},
+        "failure_outcome": {"type": "string"},
+        "recommended_dice": {"type": "string"}
+    }
+}
+
+# 로컬 판정의 결과 문장 보강
+ABILITY_OUTCOME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reason": {"type": "string"},
+        "success_outcome": {"type": "string"},
+        "failure_outcome": {"type": "string"}
+    },
+    "required": ["success_outcome", "failure_outcome"]
+}
+
+# 한 턴의 통합 응답 (스토리, 아이템 변화, 다음 행동 제안)
+TURN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "narrative": {"type": "string"},
+        "gained_items": ITEM_LIST_SCHEMA,
+        "used_items": USED_ITEM_LIST_SCHEMA,
+        "next_actions": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["narrative"]
+}
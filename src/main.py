@@ -2,6 +2,7 @@ import streamlit as st
 from src.modules.character_creation import display_character_creation_page
 from src.modules.game_play import game_play_page
 from src.modules.world_description import world_description_page
+from src.modules.admin_panel import is_admin_panel_enabled, display_admin_panel
 from src.utils.theme_manager import setup_responsive_layout
 from src.config.constants import INITIAL_MASTER_MESSAGE
 from src.config.styles import apply_custom_styles
@@ -199,6 +200,10 @@ def main():
     # 반응형 레이아웃 설정
     setup_responsive_layout()
     
+    # 관리자 패널 (LLM 호출 지표)
+    if is_admin_panel_enabled():
+        display_admin_panel()
+    
     # 현재 단계에 따라 다른 페이지 표시
     if st.session_state.stage == 'theme_selection':
         theme_selection_page()
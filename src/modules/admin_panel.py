@@ -0,0 +1,78 @@
+"""
+관리자용 LLM 호출 지표 패널 모듈
+"""
+import os
+import streamlit as st
+
+from ..config.constants import ADMIN_PANEL_ENV_VAR, TELEMETRY_SETTINGS
+from ..modules.ai_service import (
+    export_metrics, get_latency_summary, get_cache_stats, get_rate_limit_stats, get_route_stats,
+    get_hedge_stats, get_coalescing_stats, get_call_pool_stats, get_local_batch_stats, get_prefix_cache_stats,
+    get_token_usage_stats, get_ability_classifier_stats
+)
+from ..utils.location_manager import get_movement_stats
+
+# 패널에 표시할 통계 (제목, 조회 함수) - 로컬 백엔드 전용 통계는 None이면 생략
+STATS_SECTIONS = [
+    ("응답 캐시", get_cache_stats),
+    ("동일 요청 합치기", get_coalescing_stats),
+    ("호출 스레드 풀", get_call_pool_stats),
+    ("속도 제한 대기열", get_rate_limit_stats),
+    ("호출 위치별 모델 라우팅", get_route_stats),
+    ("중복 호출(hedging)", get_hedge_stats),
+    ("토큰 사용량", get_token_usage_stats),
+    ("행동 판정 로컬 분류기", get_ability_classifier_stats),
+    ("이동 스토리 변형 캐시", get_movement_stats),
+    ("로컬 모델 배치 처리", get_local_batch_stats),
+    ("로컬 모델 앞부분 캐시", get_prefix_cache_stats),
+]
+
+def is_admin_panel_enabled():
+    """
+    관리자 패널 표시 여부 확인
+
+    환경 변수, Streamlit secrets의 SHOW_ADMIN_PANEL, 상수 설정 순서로 확인합니다.
+
+    Returns:
+        bool: 표시하면 True
+    """
+    value = os.environ.get(ADMIN_PANEL_ENV_VAR)
+    if value is None:
+        try:
+            value = st.secrets.get("SHOW_ADMIN_PANEL")
+        except Exception:
+            value = None
+    if value is None:
+        return TELEMETRY_SETTINGS["admin_panel"]
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def display_admin_panel():
+    """사이드바에 호출 위치별 p50/p95 호출 시간, 구성 요소별 통계와 지표 내보내기 버튼 표시"""
+    with st.sidebar.expander("📊 LLM 호출 지표", expanded=False):
+        summary = get_latency_summary()
+        if not summary:
+            st.caption("아직 기록된 호출이 없습니다.")
+        else:
+            st.table(summary)
+
+        for title, get_stats in STATS_SECTIONS:
+            stats = get_stats()
+            if stats is None:
+                continue
+            st.markdown(f"**{title}**")
+            st.json(stats, expanded=False)
+
+        st.download_button(
+            "Prometheus 텍스트 내보내기",
+            export_metrics("prometheus"),
+            file_name="trpg_llm_metrics.prom",
+            mime="text/plain",
+            use_container_width=True
+        )
+        st.download_button(
+            "JSON lines 내보내기",
+            export_metrics("jsonl"),
+            file_name="trpg_llm_metrics.jsonl",
+            mime="application/x-ndjson",
+            use_container_width=True
+        )
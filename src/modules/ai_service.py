@@ -2,6 +2,12 @@
 AI 서비스와의 통신을 담당하는 모듈
 """
 import time
+import asyncio
+import datetime
+import hashlib
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import streamlit as st
 import re
 import json
@@ -11,153 +17,2048 @@ try:
 except ImportError:
     genai = None
 
-from ..config.constants import BACKUP_RESPONSES, API_KEY_SECRET_NAME
+from ..config.constants import (
+    BACKUP_RESPONSES,
+    BACKUP_NARRATIVE_SETTINGS,
+    BACKUP_NARRATIVE_SEED_ENV_VAR,
+    API_KEY_SECRET_NAME,
+    RESPONSE_CACHE_DB_PATH,
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_MEMORY_MAX_ENTRIES,
+    RESPONSE_CACHE_DISK_MAX_ENTRIES,
+    LLM_CALL_SITES,
+    DEFAULT_CALL_SITE_POLICY,
+    DEFAULT_MAX_CONCURRENCY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_TIMEOUT,
+    CIRCUIT_MAX_RECOVERY_TIMEOUT,
+    BACKOFF_MAX_DELAY,
+    LLM_CALL_MAX_WORKERS,
+    LLM_ERROR_POLICIES,
+    LLM_PRIORITIES,
+    MODEL_RESPONSE_OUTCOMES,
+    RATE_LIMIT_MAX_WAIT,
+    LLM_MODEL_TIERS,
+    ROUTE_DOWNGRADE_WAIT,
+    HEDGE_SETTINGS,
+    TELEMETRY_SETTINGS,
+    TELEMETRY_EVENT_LOG_ENV_VAR,
+    DEFAULT_ACTION_SUGGESTIONS,
+    WORLD_CONTEXT_CACHE_SETTINGS,
+    TOKENIZER_MODEL_PATH,
+    TOKENIZER_MODEL_ENV_VAR,
+    PROMPT_TOKEN_BUDGETS,
+    WORLD_CONTEXT_MAX_TOKENS,
+    OUTPUT_TOKEN_TOLERANCE,
+    CASSETTE_RECORD_ENV_VAR,
+    CONTENT_PACK_ENV_VAR,
+    CONTENT_PACK_SETTINGS,
+    ABILITY_NAMES,
+    ABILITY_KEYWORDS,
+    ABILITY_OUTCOME_TEMPLATES,
+    ABILITY_CLASSIFIER_SETTINGS,
+    DIFFICULTY_KEYWORDS,
+    PROFESSION_KEY_STATS
+)
+from ..config.schemas import ABILITY_SCHEMA, ABILITY_OUTCOME_SCHEMA, TURN_SCHEMA
+from .llm_backends import GeminiBackend, RecordingBackend, create_backend, get_backend_name
+from ..utils.response_cache import ResponseCache, make_cache_key
+from ..utils.circuit_breaker import CircuitBreaker, classify_error, backoff_delay
+from ..utils.rate_limiter import RateLimiter, RateLimitRejected
+from ..utils.route_metrics import RouteMetrics
+from ..utils.hedging import Hedger
+from ..utils.telemetry import MetricsRegistry
+from ..utils.token_budget import TokenCounter, TokenUsageTracker, PromptSection, fit_prompt, trim_to_tokens
+from ..utils.single_flight import SingleFlight
+from ..utils.call_pool import CallPool
+from ..utils.cassette import Cassette
+from ..utils.ability_classifier import AbilityClassifier
+from ..utils.backup_narrative import BackupNarrator
+from ..utils.content_pack import ContentPack
+from ..utils.background_tasks import submit_background, bind_script_context
+from ..utils.dice_roller import get_dice_rng
+from ..utils.text_stream import TextStream, iter_sentences
+from ..utils.json_parser import IncrementalJSONParser, SchemaError, parse_json_response, validate_json
 
-@st.cache_resource(ttl=3600)  # 1시간 캐싱
-def setup_gemini():
+# 안전 설정
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
+]
+
+@st.cache_resource(ttl=3600)  # 1시간 캐싱 (모델 등급별로 따로 캐싱)
+def setup_gemini(tier="pro"):
+    """
+    Gemini API 초기화 - 캐싱 및 오류 처리 개선
+    
+    Args:
+        tier (str): 모델 등급 (LLM_MODEL_TIERS)
+        
+    Returns:
+        GeminiBackend or None: 초기화된 모델 백엔드 또는 실패 시 None
+    """
+    try:
+        # Streamlit Secrets에서 API 키 가져오기 
+        api_key = st.secrets.get(API_KEY_SECRET_NAME, None)
+        
+        if not api_key:
+            st.sidebar.error("API 키가 설정되지 않음")
+            st.session_state.use_backup_mode = True
+            return None
+        
+        # Gemini API 초기화
+        genai.configure(api_key=api_key)
+        
+        # 등급의 모델 이름을 최신 이름부터 차례로 시도
+        for model_name in LLM_MODEL_TIERS[tier]["models"]:
+            try:
+                model = genai.GenerativeModel(model_name)
+                return GeminiBackend(model)
+            except Exception:
+                continue
+        
+        st.error(f"사용 가능한 Gemini 모델을 찾을 수 없습니다. 백업 응답을 사용합니다.")
+        st.session_state.use_backup_mode = True
+        return None
+        
+    except Exception as e:
+        st.error(f"Gemini 모델 초기화 오류: {e}")
+        st.session_state.use_backup_mode = True
+        return None
+
+@st.cache_resource
+def get_offline_backend(name):
+    """
+    API 키가 필요 없는 LLM 백엔드를 프로세스당 한 번 생성 (로컬 모델은 한 번 불러와 계속 유지)
+    
+    Args:
+        name (str): 백엔드 이름
+        
+    Returns:
+        LLMBackend or None: 백엔드 인스턴스 또는 알 수 없는 이름이면 None
+    """
+    try:
+        return create_backend(name)
+    except (ValueError, RuntimeError) as e:
+        st.error(f"{e}. 백업 응답을 사용합니다.")
+        return None
+
+def get_llm_model(tier="pro"):
+    """
+    설정된 LLM 백엔드 반환 (환경 변수 TRPG_LLM_BACKEND 또는 secrets의 LLM_BACKEND로 선택)
+    
+    Args:
+        tier (str): 모델 등급 (Gemini 외의 백엔드는 등급 구분 없이 같은 백엔드 사용)
+        
+    Returns:
+        LLMBackend or None: 백엔드 또는 초기화 실패 시 None
+    """
+    backend_name = get_backend_name(st.secrets)
+    if backend_name == "gemini":
+        model = setup_gemini(tier)
+    else:
+        model = get_offline_backend(backend_name)
+    
+    # 기록 모드면 실제 백엔드 호출을 카세트에 기록
+    recorder = get_cassette_recorder()
+    if model is not None and recorder is not None:
+        return RecordingBackend(model, recorder)
+    return model
+
+@st.cache_resource
+def get_cassette_recorder():
+    """
+    프로세스 전체에서 공유하는 기록용 카세트 반환 (환경 변수 TRPG_LLM_RECORD에 파일 경로를 지정한 경우)
+    
+    Returns:
+        Cassette or None: 기록용 카세트 또는 기록 모드가 아니면 None
+    """
+    path = os.environ.get(CASSETTE_RECORD_ENV_VAR)
+    if not path:
+        return None
+    return Cassette(path)
+
+def preserves_call_sequence(model):
+    """
+    기록/재생 중이라 호출 순서를 그대로 유지해야 하는 모델인지 확인
+    
+    캐시 조회, 요청 합치기, 중복 호출은 백엔드에 가는 호출 수와 순서를 바꾸므로 이때는 건너뜁니다.
+    
+    Args:
+        model: 초기화된 모델 인스턴스
+        
+    Returns:
+        bool: 호출 순서를 유지해야 하면 True
+    """
+    return getattr(model, "preserve_call_sequence", False)
+
+def get_call_site_policy(call_site):
+    """
+    호출 위치별 AI 호출 정책 조회
+    
+    Args:
+        call_site (str): 호출 위치 이름
+        
+    Returns:
+        dict: 호출 정책
+    """
+    policy = dict(DEFAULT_CALL_SITE_POLICY)
+    policy.update(LLM_CALL_SITES.get(call_site, {}))
+    return policy
+
+@st.cache_resource
+def get_response_cache():
+    """
+    프로세스 전체에서 공유하는 응답 캐시 반환
+    
+    Returns:
+        ResponseCache: 메모리/디스크 2단계 응답 캐시
+    """
+    return ResponseCache(
+        db_path=RESPONSE_CACHE_DB_PATH,
+        ttl=RESPONSE_CACHE_TTL,
+        memory_max_entries=RESPONSE_CACHE_MEMORY_MAX_ENTRIES,
+        disk_max_entries=RESPONSE_CACHE_DISK_MAX_ENTRIES
+    )
+
+def get_cache_stats():
+    """
+    응답 캐시 적중/실패 통계 반환
+    
+    Returns:
+        dict: 캐시 통계
+    """
+    return get_response_cache().get_stats()
+
+@st.cache_resource
+def get_circuit_breaker():
+    """
+    프로세스 전체에서 공유하는 회로 차단기 반환
+    
+    Returns:
+        CircuitBreaker: Gemini 호출 회로 차단기
+    """
+    return CircuitBreaker(
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+        max_recovery_timeout=CIRCUIT_MAX_RECOVERY_TIMEOUT
+    )
+
+@st.cache_resource
+def get_rate_limiter(tier="pro"):
+    """
+    프로세스 전체에서 공유하는 모델 등급별 속도 제한기 반환
+    
+    Args:
+        tier (str): 모델 등급 (모델마다 분당 한도가 따로 적용됨)
+        
+    Returns:
+        RateLimiter: 분당 요청/토큰 제한 속도 제한기
+    """
+    limits = LLM_MODEL_TIERS[tier]
+    return RateLimiter(
+        requests_per_minute=limits["requests_per_minute"],
+        tokens_per_minute=limits["tokens_per_minute"],
+        priorities=LLM_PRIORITIES,
+        max_waits=RATE_LIMIT_MAX_WAIT
+    )
+
+def get_rate_limit_stats():
+    """
+    모델 등급별 속도 제한 대기열 길이와 대기 시간 통계 반환
+    
+    Returns:
+        dict: 모델 등급 -> 속도 제한 통계
+    """
+    return {tier: get_rate_limiter(tier).get_stats() for tier in LLM_MODEL_TIERS}
+
+@st.cache_resource
+def get_route_metrics():
+    """
+    프로세스 전체에서 공유하는 모델 라우팅 통계 집계기 반환
+    
+    Returns:
+        RouteMetrics: 호출 위치별 모델 등급 선택과 호출 결과 집계기
+    """
+    return RouteMetrics()
+
+def get_route_stats():
+    """
+    호출 위치별 모델 등급, 등급 낮춘 횟수, 성공/실패 수와 호출 시간 반환
+    
+    Returns:
+        dict: 호출 위치 -> 라우팅 통계
+    """
+    return get_route_metrics().get_stats()
+
+def route_call(call_site, site_policy, prompt, max_tokens, priority):
+    """
+    호출 위치의 라우팅 규칙으로 모델 등급과 최대 토큰 수 결정
+    
+    정책의 등급 대기열에서 기다릴 예상 시간이 ROUTE_DOWNGRADE_WAIT를 넘고
+    등급 낮추기를 허용한 호출이면 아래 등급 모델로 보냅니다.
+    
+    Args:
+        call_site (str): 호출 위치 이름
+        site_policy (dict): 호출 정책
+        prompt (str): 보낼 전체 프롬프트
+        max_tokens (int): 호출한 쪽이 요청한 최대 토큰 수
+        priority (str): 속도 제한 우선순위
+        
+    Returns:
+        tuple: (모델 등급, 최대 토큰 수, 등급을 낮췄으면 True)
+    """
+    if site_policy["max_tokens"] is not None:
+        max_tokens = min(max_tokens, site_policy["max_tokens"])
+    
+    tier = site_policy["tier"]
+    lower_tier = LLM_MODEL_TIERS[tier]["downgrade_to"]
+    downgraded = False
+    if lower_tier and site_policy["downgrade"]:
+        tokens = get_token_counter().count(prompt) + max_tokens
+        if get_rate_limiter(tier).estimate_wait(tokens, priority) > ROUTE_DOWNGRADE_WAIT:
+            tier, downgraded = lower_tier, True
+    
+    get_route_metrics().record_route(call_site, tier, downgraded)
+    return tier, max_tokens, downgraded
+
+@st.cache_resource
+def get_hedger():
+    """
+    프로세스 전체에서 공유하는 중복 호출(hedging) 실행기 반환
+    
+    Returns:
+        Hedger: 호출 위치별 응답 시간 백분위와 중복 호출 예산을 관리하는 실행기
+    """
+    return Hedger(
+        percentile=HEDGE_SETTINGS["percentile"],
+        min_samples=HEDGE_SETTINGS["min_samples"],
+        window=HEDGE_SETTINGS["window"],
+        min_delay=HEDGE_SETTINGS["min_delay"],
+        budget_ratio=HEDGE_SETTINGS["budget_ratio"],
+        budget_burst=HEDGE_SETTINGS["budget_burst"]
+    )
+
+def get_hedge_stats():
+    """
+    중복 호출 수, 중복 호출이 이긴 수, 예산 부족으로 건너뛴 수와 호출 위치별 대기 시간 반환
+    
+    Returns:
+        dict: 중복 호출 통계
+    """
+    return get_hedger().get_stats()
+
+def admit_hedge(tier, tokens, priority):
+    """
+    중복 호출을 속도 제한 대기 없이 바로 보낼 수 있는지 확인하고 허가 받기
+    
+    Args:
+        tier (str): 모델 등급
+        tokens (int): 호출의 추정 토큰 수
+        priority (str): 속도 제한 우선순위
+        
+    Returns:
+        bool: 허가를 받았으면 True (대기열이 밀려 있거나 호출 스레드가 부족하면 중복 호출하지 않음)
+    """
+    # 마지막 남은 호출 스레드는 새 호출을 위해 남겨둠
+    if get_call_pool().available() <= 1:
+        return False
+    try:
+        get_rate_limiter(tier).acquire(tokens, priority, timeout=0)
+        return True
+    except RateLimitRejected:
+        return False
+
+@st.cache_resource
+def get_single_flight():
+    """
+    프로세스 전체에서 공유하는 동일 요청 합치기 그룹 반환
+    
+    Returns:
+        SingleFlight: 진행 중인 동일 요청 관리 그룹
+    """
+    return SingleFlight()
+
+def get_coalescing_stats():
+    """
+    동일 요청 합치기 통계 반환
+    
+    Returns:
+        dict: 실제 실행한 호출 수, 합쳐진 요청 수, 진행 중인 호출 수
+    """
+    return get_single_flight().get_stats()
+
+def get_local_batch_stats():
+    """
+    로컬 모델 배치 처리 통계 반환
+    
+    Returns:
+        dict or None: 배치 수, 평균 배치 크기, 채움률, 평균 대기 시간 또는 로컬 백엔드가 아니면 None
+    """
+    if get_backend_name(st.secrets) != "local":
+        return None
+    backend = get_offline_backend("local")
+    return backend.scheduler.get_stats() if backend is not None else None
+
+def get_prefix_cache_stats():
+    """
+    로컬 모델 공유 앞부분 key/value 캐시 통계 반환
+    
+    Returns:
+        dict or None: 적중/실패 수, 재사용 토큰 수, 사용 메모리 또는 로컬 백엔드가 아니면 None
+    """
+    if get_backend_name(st.secrets) != "local":
+        return None
+    backend = get_offline_backend("local")
+    if backend is None or backend.engine.prefix_cache is None:
+        return None
+    return backend.engine.prefix_cache.get_stats()
+
+@st.cache_resource
+def get_token_counter():
+    """
+    프로세스 전체에서 공유하는 토큰 계수기 반환
+    
+    Returns:
+        TokenCounter: sentencepiece 모델(없으면 근사 계산) 토큰 계수기
+    """
+    return TokenCounter(os.environ.get(TOKENIZER_MODEL_ENV_VAR, TOKENIZER_MODEL_PATH))
+
+@st.cache_resource
+def get_token_usage_tracker():
+    """
+    프로세스 전체에서 공유하는 토큰 사용량 집계기 반환
+    
+    Returns:
+        TokenUsageTracker: 호출 위치별 토큰 사용량 집계기
+    """
+    return TokenUsageTracker()
+
+def get_token_usage_stats():
+    """
+    호출 위치별 입력/출력 토큰 사용량 반환
+    
+    Returns:
+        dict: 호출 위치 -> 토큰 사용량 통계
+    """
+    return get_token_usage_tracker().get_stats()
+
+def record_token_usage(call_site, prompt, response, text):
+    """
+    호출 한 번의 토큰 사용량 기록 (API가 보고한 사용량이 있으면 그 값 사용)
+    
+    Args:
+        call_site (str): 호출 위치 이름
+        prompt (str): 보낸 프롬프트
+        response: 모델 응답
+        text (str): 응답 텍스트
+        
+    Returns:
+        tuple: (입력 토큰 수, 출력 토큰 수)
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None):
+        prompt_tokens = usage.prompt_token_count
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        get_token_usage_tracker().record(call_site, prompt_tokens, output_tokens, exact=True)
+        return prompt_tokens, output_tokens
+    counter = get_token_counter()
+    prompt_tokens, output_tokens = counter.count(prompt), counter.count(text)
+    get_token_usage_tracker().record(call_site, prompt_tokens, output_tokens)
+    return prompt_tokens, output_tokens
+
+@st.cache_resource
+def get_metrics_registry():
+    """
+    프로세스 전체에서 공유하는 LLM 호출 지표 저장소 반환
+    
+    Returns:
+        MetricsRegistry: 호출 위치별 호출 수, 호출 시간 히스토그램, 재시도, 백업 응답, 토큰 수 지표
+    """
+    registry = MetricsRegistry(event_log_path=os.environ.get(TELEMETRY_EVENT_LOG_ENV_VAR, TELEMETRY_SETTINGS["event_log_path"]))
+    registry.counter("trpg_llm_calls_total", "호출 위치와 결과별 LLM 호출 수", ("call_site", "outcome"))
+    registry.histogram("trpg_llm_latency_seconds", "호출 위치와 결과별 LLM 호출 시간(초)", ("call_site", "outcome"), TELEMETRY_SETTINGS["latency_buckets"])
+    registry.counter("trpg_llm_retries_total", "호출 위치별 재시도 수", ("call_site",))
+    registry.counter("trpg_llm_fallbacks_total", "호출 위치와 원인별 백업 응답 사용 수", ("call_site", "reason"))
+    registry.counter("trpg_llm_prompt_tokens_total", "호출 위치별 입력 토큰 수", ("call_site",))
+    registry.counter("trpg_llm_output_tokens_total", "호출 위치별 출력 토큰 수", ("call_site",))
+    return registry
+
+def record_llm_call(call_site, outcome, latency, retries=0, prompt_tokens=0, output_tokens=0, reason=None):
+    """
+    LLM 호출 한 번의 결과를 지표 저장소에 기록
+    
+    Args:
+        call_site (str): 호출 위치 이름
+        outcome (str): 결과 (success, cache_hit, coalesced, fallback, interrupted)
+        latency (float): 호출 시간(초)
+        retries (int): 재시도 횟수
+        prompt_tokens (int): 입력 토큰 수
+        output_tokens (int): 출력 토큰 수
+        reason (str): 백업 응답을 쓴 원인 (backup_mode, no_model, rate_limited, circuit_open, 오류 분류 등)
+    """
+    registry = get_metrics_registry()
+    call_site = call_site or "default"
+    registry.get("trpg_llm_calls_total").inc(call_site=call_site, outcome=outcome)
+    registry.get("trpg_llm_latency_seconds").observe(latency, call_site=call_site, outcome=outcome)
+    if retries:
+        registry.get("trpg_llm_retries_total").inc(retries, call_site=call_site)
+    if outcome == "fallback":
+        registry.get("trpg_llm_fallbacks_total").inc(call_site=call_site, reason=reason or "unknown")
+    if prompt_tokens or output_tokens:
+        registry.get("trpg_llm_prompt_tokens_total").inc(prompt_tokens, call_site=call_site)
+        registry.get("trpg_llm_output_tokens_total").inc(output_tokens, call_site=call_site)
+    registry.log_event({
+        "call_site": call_site,
+        "outcome": outcome,
+        "latency": round(latency, 4),
+        "retries": retries,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "reason": reason
+    })
+
+def export_metrics(format="prometheus"):
+    """
+    LLM 호출 지표 내보내기
+    
+    Args:
+        format (str): "prometheus"(텍스트 노출 형식) 또는 "jsonl"(시계열마다 한 줄)
+        
+    Returns:
+        str: 내보낸 지표 텍스트
+    """
+    registry = get_metrics_registry()
+    if format == "jsonl":
+        return registry.to_json_lines()
+    return registry.to_prometheus()
+
+def get_latency_summary():
+    """
+    호출 위치별 호출 수, p50/p95 호출 시간, 캐시 적중, 재시도, 백업 응답 수 요약
+    
+    Returns:
+        list: 호출 위치별 요약 사전 목록 (관리자 패널 표시용)
+    """
+    registry = get_metrics_registry()
+    calls = registry.get("trpg_llm_calls_total")
+    latency = registry.get("trpg_llm_latency_seconds")
+    summary = []
+    for call_site in calls.label_values("call_site"):
+        p50 = latency.quantile(0.5, call_site=call_site)
+        p95 = latency.quantile(0.95, call_site=call_site)
+        summary.append({
+            "call_site": call_site,
+            "calls": int(calls.get(call_site=call_site)),
+            "p50": round(p50, 2) if p50 is not None else None,
+            "p95": round(p95, 2) if p95 is not None else None,
+            "cache_hits": int(calls.get(call_site=call_site, outcome="cache_hit")),
+            "retries": int(registry.get("trpg_llm_retries_total").get(call_site=call_site)),
+            "fallbacks": int(registry.get("trpg_llm_fallbacks_total").get(call_site=call_site))
+        })
+    return summary
+
+def get_prompt_budget(call_site):
+    """
+    호출 위치별 프롬프트 전체 토큰 예산 조회
+    
+    Args:
+        call_site (str): 호출 위치 이름
+        
+    Returns:
+        int: 프롬프트 토큰 예산
+    """
+    return PROMPT_TOKEN_BUDGETS.get(call_site, PROMPT_TOKEN_BUDGETS["default"])
+
+@st.cache_resource
+def get_call_pool():
+    """
+    마감 시간을 적용한 동기 호출용 스레드 풀 반환 (모든 세션이 공유)
+    
+    Returns:
+        CallPool: 사용 중인 스레드 수를 추적하는 API 호출용 스레드 풀
+    """
+    return CallPool(LLM_CALL_MAX_WORKERS, thread_name_prefix="trpg-llm")
+
+def get_call_pool_stats():
+    """
+    호출용 스레드 풀의 사용 중인 스레드 수와 거절한 호출 수 반환
+    
+    Returns:
+        dict: 스레드 풀 통계
+    """
+    return get_call_pool().get_stats()
+
+def record_call_failure(error):
+    """
+    호출 실패를 회로 차단기에 기록하고 오류 분류별 정책 반환
+    
+    Args:
+        error (Exception): 발생한 예외
+        
+    Returns:
+        tuple: (오류 분류, 오류 처리 정책)
+    """
+    error_class = classify_error(error)
+    policy = LLM_ERROR_POLICIES.get(error_class, LLM_ERROR_POLICIES["transient"])
+    get_circuit_breaker().record_failure(error_class, count=policy["count"], open_for=policy["open_for"])
+    return error_class, policy
+
+def get_retry_delay(policy, attempt, retries, remaining):
+    """
+    재시도 대기 시간 계산
+    
+    Args:
+        policy (dict): 오류 처리 정책
+        attempt (int): 현재 시도 순번 (0부터 시작)
+        retries (int): 최대 재시도 횟수
+        remaining (float): 마감 시간까지 남은 시간(초)
+        
+    Returns:
+        float or None: 대기 시간(초), 재시도하지 않으면 None
+    """
+    if attempt >= retries or not policy["retry"]:
+        return None
+    
+    delay = backoff_delay(attempt, policy["base_delay"], BACKOFF_MAX_DELAY)
+    # 대기 후에도 호출할 시간이 남아 있을 때만 재시도
+    if remaining - delay <= 0:
+        return None
+    return delay
+
+def handle_rate_limit_rejection(error, prompt, priority, max_tokens=500):
+    """
+    속도 제한으로 거절된 호출 처리
+    
+    미리 생성 작업은 예외를 그대로 전달해서 화면에 필요할 때 다시 생성되도록 하고,
+    나머지 호출은 백업 응답을 반환합니다.
+    
+    Args:
+        error (RateLimitRejected): 거절 예외
+        prompt (str): 프롬프트
+        priority (str): 호출 우선순위
+        max_tokens (int): 호출 위치의 최대 토큰 수
+        
+    Returns:
+        str: 백업 응답
+    """
+    if priority == "prefetch":
+        raise error
+    st.warning("요청이 많아 잠시 백업 응답을 사용합니다.")
+    return get_backup_response(prompt, max_tokens)
+
+def report_call_failure(error, error_class):
+    """최종 실패 원인을 사용자에게 표시"""
+    if error_class == "timeout":
+        st.warning("Gemini API 응답 시간이 초과되어 백업 응답을 사용합니다.")
+    elif error_class == "saturated":
+        st.warning("응답을 기다리는 호출이 많아 잠시 백업 응답을 사용합니다.")
+    elif error_class == "safety":
+        st.warning("안전 정책으로 응답이 차단되어 백업 응답을 사용합니다.")
+    elif error_class == "quota":
+        st.warning("API 사용량 한도에 도달하여 잠시 백업 응답을 사용합니다.")
+    else:
+        st.error(f"Gemini API 호출 오류: {error}")
+
+@st.cache_resource
+def get_json_mode_support():
+    """
+    설치된 SDK가 지원하는 JSON 출력 옵션 확인
+    
+    Returns:
+        tuple: (response_mime_type 지원 여부, response_schema 지원 여부)
+    """
+    config_class = getattr(getattr(genai, "types", None), "GenerationConfig", None)
+    fields = getattr(config_class, "__annotations__", {})
+    return "response_mime_type" in fields, "response_schema" in fields
+
+def build_generation_config(max_tokens, response_schema=None):
+    """
+    텍스트 생성 구성 생성
+    
+    Args:
+        max_tokens (int): 생성할 최대 토큰 수
+        response_schema (dict): JSON 응답 스키마 (None이면 일반 텍스트 응답)
+        
+    Returns:
+        dict: 생성 구성
+    """
+    config = {
+        "temperature": 0.7,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": max_tokens,
+        "stop_sequences": ["USER:", "ASSISTANT:"]
+    }
+    
+    # 지원하는 SDK에서만 JSON 출력 모드 사용 (구버전은 프롬프트 지시와 응답 검증에 의존)
+    if response_schema is not None:
+        supports_mime_type, supports_schema = get_json_mode_support()
+        if supports_mime_type:
+            config["response_mime_type"] = "application/json"
+        if supports_schema:
+            config["response_schema"] = response_schema
+    
+    return config
+
+@st.cache_resource
+def get_backup_narrator():
+    """
+    프로세스 전체에서 공유하는 백업 응답 생성기 반환 (시드는 환경 변수 TRPG_BACKUP_SEED로 변경)
+    
+    Returns:
+        BackupNarrator: 백업 응답 생성기
+    """
+    return BackupNarrator(
+        seed=os.environ.get(BACKUP_NARRATIVE_SEED_ENV_VAR, BACKUP_NARRATIVE_SETTINGS["seed"]),
+        fill_ratio=BACKUP_NARRATIVE_SETTINGS["fill_ratio"]
+    )
+
+def get_backup_response(prompt, max_tokens=500):
+    """
+    프롬프트 내용에 맞는 백업 응답 생성
+    
+    세계관, 캐릭터 배경, 이동, 질문 답변, 스토리는 프롬프트의 테마와 상황으로 절차적으로 만들고,
+    JSON을 요구하는 프롬프트(턴, 판정, 아이템 추출)에는 형식에 맞는 JSON을 돌려줍니다.
+    
+    Args:
+        prompt (str): 텍스트 생성을 위한 프롬프트
+        max_tokens (int): 호출 위치의 최대 토큰 수 (응답 길이 기준)
+        
+    Returns:
+        str: 백업 응답
+    """
+    try:
+        return get_backup_narrator().generate(prompt, max_tokens)
+    except Exception:
+        # 생성기에 문제가 있어도 게임이 계속되도록 고정 응답 사용
+        pass
+    
+    if "world" in prompt.lower():
+        return BACKUP_RESPONSES["world"]
+    elif "character" in prompt.lower():
+        return BACKUP_RESPONSES["character"]
+    elif "질문" in prompt.lower() or "question" in prompt.lower():
+        return BACKUP_RESPONSES["question"]
+    else:
+        return BACKUP_RESPONSES["story"]
+
+def make_request_key(prompt, generation_config, model):
+    """
+    요청 식별 키 생성 (응답 캐시와 동일 요청 합치기에 사용)
+    
+    Args:
+        prompt (str): 프롬프트
+        generation_config (dict): 생성 구성
+        model: 초기화된 모델 인스턴스
+        
+    Returns:
+        str: 요청 키
+    """
+    return make_cache_key(
+        prompt,
+        generation_config,
+        SAFETY_SETTINGS,
+        getattr(model, "model_name", "")
+    )
+
+def lookup_cached_response(prompt, generation_config, model, use_cache):
+    """
+    응답 캐시 조회
+    
+    Args:
+        prompt (str): 프롬프트
+        generation_config (dict): 생성 구성
+        model: 초기화된 모델 인스턴스
+        use_cache (bool): 캐시 사용 여부
+        
+    Returns:
+        tuple: (캐시 키 또는 None, 캐시된 응답 또는 None)
+    """
+    if not use_cache:
+        return None, None
+    
+    cache_key = make_request_key(prompt, generation_config, model)
+    if preserves_call_sequence(model):
+        # 기록/재생 중에는 응답을 저장만 하고 조회하지 않음
+        return cache_key, None
+    return cache_key, get_response_cache().get(cache_key)
+
+def build_world_context_prompt(prompt, world_context):
+    """
+    세계관 설명을 프롬프트 앞에 붙인 전체 프롬프트 생성
+    
+    컨텍스트 캐시를 쓸 수 없을 때 실제로 보내는 프롬프트이며, 캐시 사용 여부와 관계없이
+    응답 캐시와 동일 요청 합치기의 키로도 사용합니다.
+    
+    Args:
+        prompt (str): 세계관 설명을 제외한 프롬프트
+        world_context (str): 세계관 설명 (없으면 None)
+        
+    Returns:
+        str: 전체 프롬프트
+    """
+    if not world_context:
+        return prompt
+    return f"## 세계관 설명\n{world_context}\n\n{prompt}"
+
+@st.cache_resource
+def get_context_cache_support():
+    """
+    설치된 SDK가 컨텍스트 캐시를 지원하는지 확인
+    
+    Returns:
+        bool: 지원 여부
+    """
+    return genai is not None and hasattr(genai, "caching") and hasattr(genai.GenerativeModel, "from_cached_content")
+
+def get_world_context_model(model, world_context):
+    """
+    세션의 세계관 설명을 올려둔 컨텍스트 캐시를 참조하는 모델 반환
+    
+    세계관 설명이 바뀌면(확장, 질문 답변 추가) 기존 캐시를 지우고 새로 만듭니다.
+    SDK나 모델이 지원하지 않거나 세계관이 최소 캐시 크기보다 작아 생성에 실패하면
+    재시도 간격 동안 None을 반환해서 프롬프트에 직접 포함하도록 합니다.
+    
+    Args:
+        model: 초기화된 모델 백엔드
+        world_context (str): 세계관 설명
+        
+    Returns:
+        GeminiBackend or None: 캐시를 참조하는 모델 또는 사용할 수 없으면 None
+    """
+    if not world_context or not isinstance(model, GeminiBackend) or not get_context_cache_support():
+        return None
+    
+    settings = WORLD_CONTEXT_CACHE_SETTINGS
+    digest = hashlib.sha256(world_context.encode("utf-8")).hexdigest()
+    entry = st.session_state.get("world_context_cache")
+    now = time.time()
+    
+    if entry and entry["digest"] == digest and now < entry["expires_at"]:
+        return entry["model"]
+    
+    if entry and entry["cache"] is not None:
+        # 세계관이 바뀌었거나 만료가 가까운 캐시는 삭제 (실패해도 TTL이 지나면 사라짐)
+        try:
+            entry["cache"].delete()
+        except Exception:
+            pass
+    
+    try:
+        cache = genai.caching.CachedContent.create(
+            model=settings["model"] or model.model_name,
+            system_instruction=settings["system_instruction"],
+            contents=[build_world_context_prompt("", world_context)],
+            ttl=datetime.timedelta(seconds=settings["ttl"])
+        )
+        cached_model = GeminiBackend(genai.GenerativeModel.from_cached_content(cached_content=cache))
+        st.session_state.world_context_cache = {
+            "digest": digest,
+            "cache": cache,
+            "model": cached_model,
+            "expires_at": now + settings["ttl"] - settings["refresh_margin"]
+        }
+        return cached_model
+    except Exception:
+        st.session_state.world_context_cache = {
+            "digest": digest,
+            "cache": None,
+            "model": None,
+            "expires_at": now + settings["retry_after"]
+        }
+        return None
+
+def resolve_world_context(model, prompt, world_context, use_context_cache=True):
+    """
+    세계관 설명을 컨텍스트 캐시로 참조할지 프롬프트에 포함할지 결정
+    
+    Args:
+        model: 초기화된 모델 백엔드
+        prompt (str): 세계관 설명을 제외한 프롬프트
+        world_context (str): 세계관 설명 (없으면 None)
+        use_context_cache (bool): 컨텍스트 캐시 사용 여부 (등급을 낮춘 호출은 캐시를 만든 모델과 달라 사용하지 않음)
+        
+    Returns:
+        tuple: (호출할 모델, 보낼 프롬프트)
+    """
+    cached_model = get_world_context_model(model, world_context) if use_context_cache else None
+    if cached_model is not None:
+        return cached_model, prompt
+    
+    # 프롬프트에 직접 포함할 때는 세계관 설명을 토큰 예산에 맞게 자름 (앞쪽 기본 설정 우선)
+    if world_context:
+        world_context = trim_to_tokens(world_context, WORLD_CONTEXT_MAX_TOKENS, get_token_counter())
+    return model, build_world_context_prompt(prompt, world_context)
+
+def truncate_response(text, max_tokens):
+    """
+    응답 텍스트 길이 제한
+    
+    모델과 계수기의 토큰 수 차이를 감안해 OUTPUT_TOKEN_TOLERANCE배까지 허용하고,
+    넘으면 문장 경계에서 자릅니다.
+    
+    Args:
+        text (str): 응답 텍스트
+        max_tokens (int): 생성할 최대 토큰 수
+        
+    Returns:
+        str: 길이가 제한된 텍스트
+    """
+    return trim_to_tokens(text, int(max_tokens * OUTPUT_TOKEN_TOLERANCE), get_token_counter())
+
+def prepare_llm_call(prompt, max_tokens, call_site, use_cache, timeout, priority, response_schema, world_context):
+    """
+    호출 정책, 모델 등급 선택, 생성 구성, 응답 캐시 조회를 적용해서 호출 준비 (일반/비동기/스트리밍 호출 공용)
+    
+    Args:
+        generate_gemini_text와 동일 (None인 값은 호출 정책을 따름)
+        
+    Returns:
+        dict: 호출 준비 정보 (호출하지 않고 바로 반환할 응답이 있으면 "text"와 "outcome"에 담음)
+    """
+    start = time.monotonic()
+    
+    # 백업 모드 확인 (API 키가 없는 경우)
+    if getattr(st.session_state, 'use_backup_mode', False):
+        # 백업 모드면 즉시 백업 응답 반환
+        record_llm_call(call_site, "fallback", 0.0, reason="backup_mode")
+        return {"text": get_backup_response(prompt, max_tokens), "outcome": "fallback"}
+    
+    site_policy = get_call_site_policy(call_site)
+    if use_cache is None:
+        use_cache = site_policy["cache"]
+    if timeout is None:
+        timeout = site_policy["timeout"]
+    if priority is None:
+        priority = site_policy["priority"]
+    
+    # 호출 위치의 라우팅 규칙으로 모델 등급 선택 (대기열이 밀리면 아래 등급으로)
+    full_prompt = build_world_context_prompt(prompt, world_context)
+    tier, max_tokens, downgraded = route_call(call_site, site_policy, full_prompt, max_tokens, priority)
+    generation_config = build_generation_config(max_tokens, response_schema)
+    model = get_llm_model(tier)
+    
+    if not model:
+        # 모델 초기화 실패 시 백업 응답 사용
+        record_llm_call(call_site, "fallback", time.monotonic() - start, reason="no_model")
+        return {"text": get_backup_response(prompt, max_tokens), "outcome": "fallback"}
+    
+    # 캐시 확인 (백업 응답은 캐시하지 않음)
+    cache_key, cached = lookup_cached_response(full_prompt, generation_config, model, use_cache)
+    if cached is not None:
+        record_llm_call(call_site, "cache_hit", time.monotonic() - start)
+        return {"text": cached, "outcome": "cache_hit"}
+    
+    # 세계관 설명은 가능하면 컨텍스트 캐시로 참조
+    model, prompt = resolve_world_context(model, prompt, world_context, use_context_cache=not downgraded)
+    
+    return {
+        "text": None,
+        "call_site": call_site,
+        "site_policy": site_policy,
+        "tier": tier,
+        "model": model,
+        "prompt": prompt,
+        "generation_config": generation_config,
+        "max_tokens": max_tokens,
+        "priority": priority,
+        "timeout": timeout,
+        "deadline": time.monotonic() + timeout,
+        "cache_key": cache_key,
+        "request_key": cache_key or make_request_key(full_prompt, generation_config, model),
+        "max_sharers": 1 if preserves_call_sequence(model) else site_policy["coalesce"]
+    }
+
+def acquire_call_slot(call, tokens, start, attempt=0):
+    """
+    회로 차단기를 확인하고 모델 등급별 속도 제한 대기열에서 차례 기다리기
+    
+    회로가 열려 있으면 대기열에 들어가지 않으며, 재시도하다 마감 시간이 다 되어
+    차례를 받지 못한 경우는 속도 제한이 아니라 시간 초과로 처리합니다.
+    
+    Args:
+        call (dict): prepare_llm_call 결과
+        tokens (int): 호출에 쓸 토큰 수 (프롬프트 + 최대 출력)
+        start (float): 호출 시작 시각 (time.monotonic 기준)
+        attempt (int): 현재 시도 순번 (0부터 시작)
+        
+    Returns:
+        str or None: 호출할 수 없으면 백업 응답 (호출해도 되면 None)
+    """
+    call_site = call["call_site"]
+    breaker = get_circuit_breaker()
+    metrics = get_route_metrics()
+    
+    # 다른 세션에서 장애가 감지되어 회로가 열려 있으면 호출하지 않음
+    if not breaker.allow_request():
+        metrics.record_result(call_site, time.monotonic() - start, False)
+        record_llm_call(call_site, "fallback", time.monotonic() - start, attempt, reason="circuit_open")
+        return get_backup_response(call["prompt"], call["max_tokens"])
+    
+    # 모든 세션이 공유하는 모델 등급별 속도 제한 대기열에서 남은 마감 시간 동안 차례 기다리기
+    remaining = call["deadline"] - time.monotonic()
+    rejection = None
+    if remaining > 0:
+        try:
+            get_rate_limiter(call["tier"]).acquire(tokens, call["priority"], timeout=remaining)
+            return None
+        except RateLimitRejected as e:
+            rejection = e
+    
+    # 호출하지 않으므로 허용받은 시험 호출 자리를 돌려줌
+    breaker.cancel_request()
+    metrics.record_result(call_site, time.monotonic() - start, False)
+    if rejection is not None and attempt == 0:
+        record_llm_call(call_site, "fallback", time.monotonic() - start, attempt, reason="rate_limited")
+        return handle_rate_limit_rejection(rejection, call["prompt"], call["priority"], call["max_tokens"])
+    
+    record_llm_call(call_site, "fallback", time.monotonic() - start, attempt, reason="timeout")
+    report_call_failure(TimeoutError(), "timeout")
+    return get_backup_response(call["prompt"], call["max_tokens"])
+
+def wait_for_flight(flight, call, retries=2):
+    """
+    같은 요청을 먼저 시작한 호출의 결과를 기다려서 반환
+    
+    Args:
+        flight (Flight): 합류한 진행 중인 작업
+        call (dict): prepare_llm_call 결과
+        retries (int): 진행 중이던 호출이 실패해서 직접 호출할 때의 재시도 횟수
+        
+    Returns:
+        tuple: (생성된 텍스트, 호출 결과) - 먼저 시작한 호출이 백업 응답을 받았거나
+               기다리다 마감 시간이 지나면 결과는 "fallback"
+    """
+    start = time.monotonic()
+    try:
+        text, outcome = flight.future.result(timeout=call["timeout"])
+    except FutureTimeoutError:
+        record_llm_call(call["call_site"], "fallback", time.monotonic() - start, reason="coalesced_timeout")
+        return get_backup_response(call["prompt"], call["max_tokens"]), "fallback"
+    except Exception:
+        # 진행 중이던 호출이 거절되었으면 직접 호출
+        return _call_with_retries(call, retries)
+    
+    if outcome not in MODEL_RESPONSE_OUTCOMES:
+        record_llm_call(call["call_site"], "fallback", time.monotonic() - start, reason="coalesced_fallback")
+        return text, "fallback"
+    record_llm_call(call["call_site"], "coalesced", time.monotonic() - start)
+    return text, "coalesced"
+
+def generate_gemini_text(prompt, max_tokens=500, retries=2, timeout=None, call_site=None, use_cache=None, response_schema=None, priority=None, world_context=None):
+    """
+    Gemini API를 사용하여 텍스트 생성 - 오류 처리 및 재시도 로직 추가
+    
+    공유 회로 차단기가 열려 있으면 호출하지 않고 백업 응답을 반환하며,
+    재시도는 오류 분류별 정책에 따라 지수 백오프(지터 포함)로 대기합니다.
+    
+    Args:
+        prompt (str): 텍스트 생성을 위한 프롬프트
+        max_tokens (int): 생성할 최대 토큰 수
+        retries (int): 실패 시 재시도 횟수
+        timeout (float): 재시도를 포함한 전체 호출 마감 시간(초) (None이면 호출 정책을 따름)
+        call_site (str): 호출 위치 이름 (호출 정책 조회용)
+        use_cache (bool): 응답 캐시 사용 여부 (None이면 호출 정책을 따름)
+        response_schema (dict): JSON 응답 스키마 (지정하면 JSON 출력 모드 사용)
+        priority (str): 속도 제한 우선순위 (None이면 호출 정책을 따름)
+        world_context (str): 세계관 설명 (컨텍스트 캐시로 참조하거나 프롬프트 앞에 포함)
+        
+    Returns:
+        str: 생성된 텍스트
+    """
+    return generate_gemini_result(prompt, max_tokens, retries, timeout, call_site, use_cache, response_schema, priority, world_context)[0]
+
+def generate_gemini_result(prompt, max_tokens=500, retries=2, timeout=None, call_site=None, use_cache=None, response_schema=None, priority=None, world_context=None):
+    """
+    generate_gemini_text와 같은 방식으로 생성하고 실제 모델 응답인지 함께 반환
+    
+    백업 응답은 형식이 맞아도 모델의 판단이 아니므로, 응답으로 학습하거나 캐시를 채우는 호출은
+    결과가 MODEL_RESPONSE_OUTCOMES에 속할 때만 사용해야 합니다.
+    
+    Args:
+        generate_gemini_text와 동일
+        
+    Returns:
+        tuple: (생성된 텍스트, 호출 결과 - "success", "cache_hit", "coalesced", "fallback" 중 하나)
+    """
+    call = prepare_llm_call(prompt, max_tokens, call_site, use_cache, timeout, priority, response_schema, world_context)
+    if call["text"] is not None:
+        return call["text"], call["outcome"]
+    
+    # 동일한 요청이 진행 중이면 새로 호출하지 않고 결과를 함께 받음
+    flight, is_leader = get_single_flight().join(call["request_key"], call["max_sharers"])
+    if not is_leader:
+        return wait_for_flight(flight, call, retries)
+    
+    try:
+        result = _call_with_retries(call, retries)
+    except BaseException as e:
+        # 스크립트 재실행 등으로 중단되어도 기다리는 요청이 직접 호출하도록 알림
+        get_single_flight().finish(call["request_key"], flight, error=e if isinstance(e, Exception) else RuntimeError("호출이 중단되었습니다"))
+        raise
+    
+    get_single_flight().finish(call["request_key"], flight, result=result)
+    return result
+
+def _call_with_retries(call, retries=2):
+    """속도 제한, 회로 차단기, 재시도를 적용해서 Gemini API 호출 (call은 prepare_llm_call 결과, (텍스트, 호출 결과) 반환)"""
+    model, prompt, max_tokens, call_site = call["model"], call["prompt"], call["max_tokens"], call["call_site"]
+    deadline = call["deadline"]
+    breaker = get_circuit_breaker()
+    metrics = get_route_metrics()
+    hedge = call["site_policy"]["hedge"] and not preserves_call_sequence(model)
+    tokens = get_token_counter().count(prompt) + max_tokens
+    start = time.monotonic()
+    
+    def submit_call():
+        return get_call_pool().submit(
+            model.generate_content,
+            prompt,
+            generation_config=call["generation_config"],
+            safety_settings=SAFETY_SETTINGS
+        )
+    
+    # 재시도 로직
+    for attempt in range(retries + 1):
+        backup = acquire_call_slot(call, tokens, start, attempt)
+        if backup is not None:
+            return backup, "fallback"
+        
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError()
+            
+            # 텍스트 생성 (마감 시간이 지나면 기다리지 않음, 응답이 늦으면 한 번 더 호출)
+            if hedge:
+                response = get_hedger().run(
+                    call_site,
+                    submit_call,
+                    remaining,
+                    admit=lambda: admit_hedge(call["tier"], tokens, call["priority"])
+                )
+            else:
+                response = submit_call().result(timeout=remaining)
+            
+            # 응답 텍스트 추출 및 길이 제한
+            text = truncate_response(response.text, max_tokens)
+            breaker.record_success()
+            prompt_tokens, output_tokens = record_token_usage(call_site, prompt, response, text)
+            metrics.record_result(call_site, time.monotonic() - start, True)
+            record_llm_call(call_site, "success", time.monotonic() - start, attempt, prompt_tokens, output_tokens)
+            
+            if call["cache_key"]:
+                get_response_cache().set(call["cache_key"], text)
+            
+            return text, "success"
+        
+        except Exception as e:
+            error_class, policy = record_call_failure(e)
+            delay = get_retry_delay(policy, attempt, retries, deadline - time.monotonic())
+            
+            if delay is not None:
+                st.warning(f"API 호출 오류, 재시도 중... ({attempt+1}/{retries})")
+                time.sleep(delay)
+                continue
+            
+            report_call_failure(e, error_class)
+            metrics.record_result(call_site, time.monotonic() - start, False)
+            record_llm_call(call_site, "fallback", time.monotonic() - start, attempt, reason=error_class)
+            
+            # 오류 발생 시 백업 응답 사용
+            return get_backup_response(prompt, max_tokens), "fallback"
+    
+    # 이 코드는 실행되지 않음 (위에서 항상 반환함)
+    return get_backup_response(prompt, max_tokens), "fallback"
+
+async def generate_gemini_text_async(prompt, max_tokens=500, retries=2, timeout=None, call_site=None, use_cache=None, response_schema=None, priority=None, world_context=None, with_outcome=False):
+    """
+    generate_gemini_text의 비동기 버전 - 이벤트 루프를 막지 않도록 작업 스레드에서 실행
+    
+    호출 준비, 요청 합치기, 속도 제한, 재시도는 generate_gemini_text를 그대로 사용하며,
+    작업 스레드에도 현재 세션 컨텍스트를 연결합니다.
+    
+    Args:
+        generate_gemini_text와 동일
+        with_outcome (bool): True면 generate_gemini_result처럼 호출 결과도 함께 반환
+        
+    Returns:
+        str or tuple: 생성된 텍스트 (실패 시 백업 응답), with_outcome이면 (텍스트, 호출 결과)
+    """
+    text, outcome = await asyncio.to_thread(bind_script_context(
+        generate_gemini_result,
+        prompt,
+        max_tokens,
+        retries,
+        timeout,
+        call_site,
+        use_cache,
+        response_schema,
+        priority,
+        world_context
+    ))
+    return (text, outcome) if with_outcome else text
+
+async def gather_prompts(requests, max_concurrency=DEFAULT_MAX_CONCURRENCY, deadline=None):
+    """
+    여러 프롬프트를 동시에 실행하고 요청 순서대로 결과 반환
+    
+    Args:
+        requests (list): 프롬프트 문자열 또는 generate_gemini_text_async 인자 사전 목록
+        max_concurrency (int): 동시에 진행할 최대 호출 수
+        deadline (float): 전체 작업 마감 시간(초), None이면 개별 timeout만 적용
+        
+    Returns:
+        list: 생성된 텍스트 목록 (마감 시간을 넘긴 요청은 백업 응답, with_outcome을 지정한 요청은 (텍스트, 호출 결과))
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+    overall_deadline = loop.time() + deadline if deadline is not None else None
+    
+    async def run_one(request):
+        kwargs = {"prompt": request} if isinstance(request, str) else dict(request)
+        
+        async with semaphore:
+            if overall_deadline is not None:
+                remaining = overall_deadline - loop.time()
+                if remaining <= 0:
+                    text = get_backup_response(kwargs["prompt"], kwargs.get("max_tokens", 500))
+                    return (text, "fallback") if kwargs.get("with_outcome") else text
+                timeout = kwargs.get("timeout") or get_call_site_policy(kwargs.get("call_site"))["timeout"]
+                kwargs["timeout"] = min(timeout, remaining)
+            
+            return await generate_gemini_text_async(**kwargs)
+    
+    return await asyncio.gather(*(run_one(request) for request in requests))
+
+def run_async(coro):
+    """
+    동기 코드(Streamlit 스크립트)에서 코루틴 실행
+    
+    이미 실행 중인 이벤트 루프가 있으면 세션 컨텍스트를 연결한 별도 스레드에서 실행합니다.
+    
+    Args:
+        coro: 실행할 코루틴
+        
+    Returns:
+        코루틴의 반환값
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(bind_script_context(asyncio.run, coro)).result()
+
+def run_prompts_concurrently(requests, max_concurrency=DEFAULT_MAX_CONCURRENCY, deadline=None):
+    """
+    gather_prompts의 동기 래퍼
+    
+    Args:
+        requests (list): 프롬프트 문자열 또는 인자 사전 목록
+        max_concurrency (int): 동시에 진행할 최대 호출 수
+        deadline (float): 전체 작업 마감 시간(초)
+        
+    Returns:
+        list: 생성된 텍스트 목록
+    """
+    return run_async(gather_prompts(requests, max_concurrency, deadline))
+
+def stream_gemini_text(prompt, max_tokens=500, call_site=None, use_cache=None, response_schema=None, world_context=None):
+    """
+    Gemini API 스트리밍 모드로 텍스트 생성
+    
+    응답 조각을 문장 경계 단위로 모아서 내보내므로 한국어 문장이 중간에 끊겨 표시되지 않습니다.
+    호출 준비와 요청 합치기는 generate_gemini_text와 같은 경로를 사용하며,
+    백업 응답, 캐시된 응답, 다른 요청과 합쳐진 응답은 한 번에 반환합니다.
+    끝까지 읽으면 생성기는 호출 결과("success", "fallback" 등)를 반환하므로 TextStream으로 감싸서 확인할 수 있습니다.
+    
+    Args:
+        prompt (str): 텍스트 생성을 위한 프롬프트
+        max_tokens (int): 생성할 최대 토큰 수
+        call_site (str): 호출 위치 이름 (호출 정책 조회용)
+        use_cache (bool): 응답 캐시 사용 여부 (None이면 호출 정책을 따름)
+        response_schema (dict): JSON 응답 스키마 (지정하면 JSON 출력 모드 사용)
+        world_context (str): 세계관 설명 (컨텍스트 캐시로 참조하거나 프롬프트 앞에 포함)
+        
+    Yields:
+        str: 문장 단위로 끊긴 텍스트 조각
+    """
+    call = prepare_llm_call(prompt, max_tokens, call_site, use_cache, None, None, response_schema, world_context)
+    if call["text"] is not None:
+        yield call["text"]
+        return call["outcome"]
+    
+    # 같은 요청을 다른 세션이 생성 중이면 끝난 결과를 한 번에 받음
+    flight, is_leader = get_single_flight().join(call["request_key"], call["max_sharers"])
+    if not is_leader:
+        text, outcome = wait_for_flight(flight, call)
+        yield text
+        return outcome
+    
+    result = None
+    try:
+        result = yield from _stream_call(call)
+    finally:
+        # 스트리밍이 중단되었거나 화면이 읽기를 멈췄으면 기다리는 요청이 직접 호출하도록 알림
+        if result is None:
+            get_single_flight().finish(call["request_key"], flight, error=RuntimeError("스트리밍이 중단되었습니다"))
+        else:
+            get_single_flight().finish(call["request_key"], flight, result=result)
+    return result[1] if result is not None else "interrupted"
+
+def _stream_call(call):
+    """속도 제한, 회로 차단기, 마감 시간을 적용해서 스트리밍 호출 ((전체 텍스트, 호출 결과)를 반환하고 중간에 끊기면 None 반환)"""
+    model, prompt, max_tokens, call_site = call["model"], call["prompt"], call["max_tokens"], call["call_site"]
+    metrics = get_route_metrics()
+    tokens = get_token_counter().count(prompt) + max_tokens
+    start = time.monotonic()
+    
+    backup = acquire_call_slot(call, tokens, start)
+    if backup is not None:
+        yield backup
+        return backup, "fallback"
+    
+    def open_stream():
+        response = model.generate_content(
+            prompt,
+            generation_config=call["generation_config"],
+            safety_settings=SAFETY_SETTINGS,
+            stream=True
+        )
+        chunks = (chunk.text for chunk in response)
+        return next(chunks, ""), chunks
+    
+    def discard_stream(future):
+        # 마감 시간이 지난 뒤에 열린 스트림은 닫음
+        if not future.cancelled() and future.exception() is None:
+            future.result()[1].close()
+    
+    try:
+        remaining = call["deadline"] - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError()
+        
+        # 첫 조각이 관측된 백분위 시간 안에 오지 않으면 한 번 더 요청하고 먼저 온 스트림 사용
+        if call["site_policy"]["hedge"] and not preserves_call_sequence(model):
+            first, chunks = get_hedger().run(
+                f"{call_site}:stream",
+                lambda: get_call_pool().submit(open_stream),
+                remaining,
+                admit=lambda: admit_hedge(call["tier"], tokens, call["priority"]),
+                discard=lambda opened: opened[1].close()
+            )
+        else:
+            # 첫 조각도 마감 시간까지만 기다림
+            opening = get_call_pool().submit(open_stream)
+            try:
+                first, chunks = opening.result(timeout=remaining)
+            except FutureTimeoutError:
+                opening.add_done_callback(discard_stream)
+                raise TimeoutError()
+        get_circuit_breaker().record_success()
+    except Exception as e:
+        # 첫 조각 전에 실패하면 일반 호출(재시도 포함)로 전환 (마감 시간까지 첫 조각이 오지 않았거나 스레드가 없으면 다시 호출하지 않음)
+        error_class, _ = record_call_failure(e)
+        if error_class in ("safety", "saturated") or isinstance(e, TimeoutError):
+            metrics.record_result(call_site, time.monotonic() - start, False)
+            record_llm_call(call_site, "fallback", time.monotonic() - start, reason=error_class)
+            text, outcome = get_backup_response(prompt, max_tokens), "fallback"
+        else:
+            text, outcome = _call_with_retries(call)
+        yield text
+        return text, outcome
+    
+    counter = get_token_counter()
+    limit = int(max_tokens * OUTPUT_TOKEN_TOLERANCE)
+    used = 0
+    emitted = ""
+    try:
+        for sentence in iter_sentences(itertools.chain([first], chunks)):
+            tokens = counter.count(sentence)
+            if used + tokens > limit:
+                # 토큰 예산을 넘는 문장은 내보내지 않음 (첫 문장이면 예산만큼 잘라서 표시)
+                if not emitted:
+                    emitted = trim_to_tokens(sentence, limit, counter)
+                    yield emitted
+                break
+            used += tokens
+            emitted += sentence
+            yield sentence
+    except Exception as e:
+        # 스트리밍 도중 끊기면 받은 부분까지만 사용
+        record_call_failure(e)
+        metrics.record_result(call_site, time.monotonic() - start, False)
+        record_llm_call(call_site, "interrupted", time.monotonic() - start, reason=classify_error(e))
+        st.warning(f"응답 스트리밍이 중단되었습니다: {e}")
+        return None
+    
+    prompt_tokens, output_tokens = counter.count(prompt), counter.count(emitted)
+    get_token_usage_tracker().record(call_site, prompt_tokens, output_tokens)
+    metrics.record_result(call_site, time.monotonic() - start, True)
+    record_llm_call(call_site, "success", time.monotonic() - start, prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+    if call["cache_key"] and emitted:
+        get_response_cache().set(call["cache_key"], emitted)
+    return emitted, "success"
+
+def generate_gemini_json(prompt, schema, max_tokens=500, call_site=None, use_cache=None, default=None):
+    """
+    JSON 출력 모드로 생성하고 스키마로 검증된 값 반환
+    
+    Args:
+        prompt (str): 텍스트 생성을 위한 프롬프트
+        schema (dict): 응답 JSON 스키마
+        max_tokens (int): 생성할 최대 토큰 수
+        call_site (str): 호출 위치 이름 (호출 정책 조회용)
+        use_cache (bool): 응답 캐시 사용 여부 (None이면 호출 정책을 따름)
+        default: 응답을 해석할 수 없을 때 반환할 값
+        
+    Returns:
+        검증된 JSON 값 (실패 시 default)
+    """
+    response = generate_gemini_text(prompt, max_tokens, call_site=call_site, use_cache=use_cache, response_schema=schema)
+    try:
+        return parse_json_response(response, schema)
+    except ValueError:
+        return default
+
+def stream_gemini_json(prompt, schema, max_tokens=500, call_site=None, use_cache=None):
+    """
+    JSON 출력 모드 스트리밍 - 응답이 도착하는 대로 부분 JSON 값을 검증해서 내보냄
+    
+    아직 필수 항목이 도착하지 않아 검증할 수 없는 조각은 건너뜁니다.
+    끝까지 읽으면 생성기는 스트림의 호출 결과를 반환하므로, 잘린 응답인지 TextStream으로 감싸서 확인할 수 있습니다.
+    
+    Args:
+        prompt (str): 텍스트 생성을 위한 프롬프트
+        schema (dict): 응답 JSON 스키마
+        max_tokens (int): 생성할 최대 토큰 수
+        call_site (str): 호출 위치 이름 (호출 정책 조회용)
+        use_cache (bool): 응답 캐시 사용 여부 (None이면 호출 정책을 따름)
+        
+    Yields:
+        검증된 부분 JSON 값 (마지막 값이 최종 결과)
+    """
+    parser = IncrementalJSONParser()
+    stream = TextStream(stream_gemini_text(prompt, max_tokens, call_site=call_site, use_cache=use_cache, response_schema=schema))
+    for chunk in stream:
+        partial = parser.feed(chunk)
+        if partial is None:
+            continue
+        try:
+            yield validate_json(partial, schema)
+        except SchemaError:
+            continue
+    return stream.outcome
+
+def build_story_prompt(action, dice_result, success, ability, difficulty, theme, location, character, previous_story=""):
+    """
+    행동 판정 결과에 따른 스토리 프롬프트 생성
+    
+    Args:
+        action (str): 플레이어 행동
+        dice_result (int): 주사위 + 능력치 합계
+        success (bool): 판정 성공 여부
+        ability (str): 판정 능력치 코드
+        difficulty (int): 판정 난이도
+        theme (str): 세계관 테마
+        location (str): 현재 위치
+        character (dict): 캐릭터 정보
+        previous_story (str): 직전 스토리
+        
+    Returns:
+        str: 프롬프트
+    """
+    inventory_names = [item.name if hasattr(item, 'name') else str(item) for item in character.get('inventory', [])]
+    result_text = "성공" if success else "실패"
+    
+    def render(previous_story):
+        return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어의 행동과 주사위 판정 결과에 따라 이야기를 이어서 한국어로 작성해주세요.
+    
+    ## 게임 정보
+    세계 테마: {theme}
+    현재 위치: {location}
+    캐릭터 직업: {character.get('profession', '')}
+    소지품: {', '.join(inventory_names)}
+    
+    ## 직전 이야기
+    {previous_story}
+    
+    ## 판정
+    플레이어 행동: {action}
+    능력치: {ability}
+    주사위 결과: {dice_result} (난이도 {difficulty}) → {result_text}
+    
+    ## 스토리 지침
+    1. 판정 결과({result_text})가 분명하게 드러나도록 행동의 결과를 묘사하세요.
+    2. 새로 획득하거나 사용한 아이템이 있으면 아이템 이름을 **굵게** 표시하세요.
+    3. 다음 행동을 고민할 수 있는 새로운 상황이나 단서를 남겨두세요.
+    4. 약 200단어 내외로 작성하세요.
+    
+    모든 문장은 완결된 형태로 작성하세요.
+    """
+    
+    # 직전 이야기는 최근 내용부터 남은 토큰 예산만큼 문장 단위로 포함
+    return fit_prompt(
+        render,
+        get_prompt_budget("story_response"),
+        get_token_counter(),
+        previous_story=PromptSection(previous_story, keep="tail")
+    )
+
+def generate_story_response(action, dice_result, success, ability, difficulty, theme, location, character, previous_story=""):
+    """
+    행동 판정 결과에 따른 스토리 생성
+    
+    Args:
+        action (str): 플레이어 행동
+        dice_result (int): 주사위 + 능력치 합계
+        success (bool): 판정 성공 여부
+        ability (str): 판정 능력치 코드
+        difficulty (int): 판정 난이도
+        theme (str): 세계관 테마
+        location (str): 현재 위치
+        character (dict): 캐릭터 정보
+        previous_story (str): 직전 스토리
+        
+    Returns:
+        str: 생성된 스토리
+    """
+    prompt = build_story_prompt(action, dice_result, success, ability, difficulty, theme, location, character, previous_story)
+    return generate_gemini_text(prompt, 600, call_site="story_response")
+
+def stream_story_response(action, dice_result, success, ability, difficulty, theme, location, character, previous_story=""):
+    """
+    generate_story_response의 스트리밍 버전
+    
+    Yields:
+        str: 문장 단위로 끊긴 스토리 조각
+    """
+    prompt = build_story_prompt(action, dice_result, success, ability, difficulty, theme, location, character, previous_story)
+    return stream_gemini_text(prompt, 600, call_site="story_response")
+
+def build_action_suggestions_prompt(location, theme, last_entry, character):
+    """
+    다음 행동 제안 프롬프트 생성
+    
+    Args:
+        location (str): 현재 위치
+        theme (str): 세계관 테마
+        last_entry (str): 가장 최근 스토리
+        character (dict): 캐릭터 정보
+        
+    Returns:
+        str: 프롬프트
     """
-    Gemini API 초기화 - 캐싱 및 오류 처리 개선
+    inventory_names = [item.name if hasattr(item, 'name') else str(item) for item in character.get('inventory', [])]
+    
+    def render(last_entry):
+        return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어가 다음에 할 수 있는 행동 5가지를 한국어로 제안해주세요.
+    
+    ## 게임 정보
+    세계 테마: {theme}
+    현재 위치: {location}
+    캐릭터 직업: {character.get('profession', '')}
+    소지품: {', '.join(inventory_names)}
+    
+    ## 최근 이야기
+    {last_entry}
+    
+    ## 제안 지침
+    1. 각 행동은 다음 태그 중 하나로 시작하세요: [아이템 획득], [아이템 사용], [위험], [상호작용], [일반]
+    2. [아이템 사용] 행동은 소지품에 있는 아이템만 사용하세요.
+    3. 최근 이야기의 상황과 자연스럽게 이어지는 행동을 제안하세요.
+    4. 각 행동은 한 문장으로 작성하세요.
+    
+    다음 형식으로 반환해주세요:
+    1. [태그] 행동 설명
+    2. [태그] 행동 설명
+    3. [태그] 행동 설명
+    4. [태그] 행동 설명
+    5. [태그] 행동 설명
+    """
+    
+    # 최근 이야기는 뒷부분부터 남은 토큰 예산만큼 문장 단위로 포함
+    return fit_prompt(
+        render,
+        get_prompt_budget("action_suggestions"),
+        get_token_counter(),
+        last_entry=PromptSection(last_entry, keep="tail")
+    )
+
+def parse_action_suggestions(response):
+    """
+    행동 제안 응답에서 태그가 붙은 행동 목록 추출
+    
+    Args:
+        response (str): AI 응답 텍스트
+        
+    Returns:
+        list: 행동 제안 목록 (3개 미만이면 기본 제안으로 채움)
+    """
+    suggestions = []
+    for line in response.split('\n'):
+        line = re.sub(r'^\s*(?:\d+[.)]|[-*•])\s*', '', line).strip()
+        if line.startswith('['):
+            suggestions.append(line)
+    
+    for default in DEFAULT_ACTION_SUGGESTIONS:
+        if len(suggestions) >= 3:
+            break
+        if default not in suggestions:
+            suggestions.append(default)
+    
+    return suggestions[:5]
+
+def generate_action_suggestions(location, theme, last_entry, character, priority=None):
+    """
+    현재 상황에 맞는 다음 행동 제안 생성
+    
+    Args:
+        location (str): 현재 위치
+        theme (str): 세계관 테마
+        last_entry (str): 가장 최근 스토리
+        character (dict): 캐릭터 정보
+        priority (str): 속도 제한 우선순위 (미리 생성 시 "prefetch")
+        
+    Returns:
+        list: 태그가 붙은 행동 제안 목록
+    """
+    prompt = build_action_suggestions_prompt(location, theme, last_entry, character)
+    response = generate_gemini_text(prompt, 400, call_site="action_suggestions", priority=priority)
+    return parse_action_suggestions(response)
+
+def build_ability_prompt(action, profession, location):
+    """
+    행동 판정 능력치 제안 프롬프트 생성
+    
+    Args:
+        action (str): 플레이어 행동
+        profession (str): 캐릭터 직업
+        location (str): 현재 위치
+        
+    Returns:
+        str: 프롬프트
+    """
+    return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어의 행동을 판정하기 위한 능력치와 난이도를 정해주세요.
+    
+    플레이어 행동: {action}
+    캐릭터 직업: {profession}
+    현재 위치: {location}
+    
+    능력치는 STR(근력), INT(지능), DEX(민첩), CON(체력), WIS(지혜), CHA(매력) 중 하나를 선택하세요.
+    난이도는 5(매우 쉬움)부터 25(매우 어려움) 사이의 숫자로 정하세요.
+    
+    다음 JSON 형식으로 반환해주세요:
+    {{
+      "ability_code": "능력치 코드",
+      "difficulty": 난이도 숫자,
+      "reason": "이 능력치를 선택한 이유 (한 문장)",
+      "success_outcome": "성공 시 결과 (한 문장)",
+      "failure_outcome": "실패 시 결과 (한 문장)",
+      "recommended_dice": "1d20"
+    }}
+    """
+
+def parse_ability_suggestion(response):
+    """
+    능력치 제안 응답을 사전으로 변환
     
+    Args:
+        response (str): AI 응답 텍스트
+        
     Returns:
-        GenerativeModel or None: 초기화된 모델 인스턴스 또는 실패 시 None
+        dict: 능력치 제안 (파싱 실패 시 빈 사전)
     """
+    # 소문자 능력치 코드도 허용
+    if isinstance(response, str):
+        response = re.sub(
+            r'("ability_code"\s*:\s*")(\w+)(")',
+            lambda match: match.group(1) + match.group(2).upper() + match.group(3),
+            response
+        )
+    
     try:
-        # Streamlit Secrets에서 API 키 가져오기 
-        api_key = st.secrets.get(API_KEY_SECRET_NAME, None)
+        return parse_json_response(response, ABILITY_SCHEMA)
+    except ValueError:
+        return {}
+
+@st.cache_resource
+def get_ability_classifier():
+    """
+    프로세스 전체에서 공유하는 행동 판정 로컬 분류기 반환
+    
+    기록/재생 중에는 두 실행이 같은 판정을 내리도록 판정 기록 파일을 읽거나 쓰지 않습니다.
+    
+    Returns:
+        AbilityClassifier: 능력치 키워드와 AI 판정 기록으로 학습한 분류기
+    """
+    settings = ABILITY_CLASSIFIER_SETTINGS
+    replaying = get_backend_name(st.secrets) == "replay" or get_cassette_recorder() is not None
+    return AbilityClassifier(
+        ABILITY_KEYWORDS,
+        difficulty_keywords=DIFFICULTY_KEYWORDS,
+        profession_stats=PROFESSION_KEY_STATS,
+        confidence_threshold=settings["confidence_threshold"],
+        keyword_weight=settings["keyword_weight"],
+        profession_weight=settings["profession_weight"],
+        ngram_sizes=settings["ngram_sizes"],
+        ngram_weight=settings["ngram_weight"],
+        base_difficulty=settings["base_difficulty"],
+        log_path=None if replaying else settings["log_path"]
+    )
+
+def get_ability_classifier_stats():
+    """
+    로컬 분류기로 직접 판정한 비율과 학습한 판정 수 반환
+    
+    Returns:
+        dict: 분류기 통계
+    """
+    return get_ability_classifier().get_stats()
+
+def build_local_ability_suggestion(prediction):
+    """
+    로컬 분류기 예측을 능력치 제안 형태로 변환 (결과 문장은 능력치별 기본 문장)
+    
+    Args:
+        prediction (dict): AbilityClassifier.classify 결과
         
-        if not api_key:
-            st.sidebar.error("API 키가 설정되지 않음")
-            st.session_state.use_backup_mode = True
-            return None
+    Returns:
+        dict: 능력치 제안 (source="local", confidence 포함)
+    """
+    ability_code = prediction["ability_code"]
+    ability_name = ABILITY_NAMES[ability_code]
+    success_outcome, failure_outcome = ABILITY_OUTCOME_TEMPLATES[ability_code]
+    if prediction["matched"]:
+        reason = f"'{prediction['matched'][0]}' 같은 행동은 {ability_name} 판정으로 정합니다."
+    else:
+        reason = f"마스터가 예전에 같은 행동을 {ability_name} 판정으로 정했습니다."
+    
+    return {
+        "ability_code": ability_code,
+        "difficulty": prediction["difficulty"],
+        "reason": reason,
+        "success_outcome": success_outcome,
+        "failure_outcome": failure_outcome,
+        "recommended_dice": "1d20",
+        "source": "local",
+        "confidence": prediction["confidence"]
+    }
+
+def learn_ability_decision(action, profession, suggestion, outcome):
+    """
+    AI가 내린 판정을 로컬 분류기에 학습시키고 기록 (실제 모델 응답일 때만)
+    
+    Args:
+        action (str): 플레이어 행동
+        profession (str): 캐릭터 직업
+        suggestion (dict): parse_ability_suggestion 결과 (비어 있으면 무시)
+        outcome (str): generate_gemini_result의 호출 결과 (백업 응답이면 학습하지 않음)
+    """
+    if outcome in MODEL_RESPONSE_OUTCOMES and suggestion.get("ability_code") in ABILITY_NAMES:
+        get_ability_classifier().record_decision(action, suggestion["ability_code"], suggestion.get("difficulty"), profession)
+
+def get_ability_suggestion(action, profession, location):
+    """
+    행동에 적합한 능력치와 난이도 제안
+    
+    로컬 분류기의 신뢰도가 기준 이상이면 AI를 호출하지 않고 바로 반환하고,
+    기준 미만이면 AI에 판정을 맡긴 뒤 그 결과를 분류기에 학습시킵니다.
+    AI 대신 백업 응답을 받으면 학습하지 않고 분류기의 예측을 그대로 사용합니다.
+    
+    Args:
+        action (str): 플레이어 행동
+        profession (str): 캐릭터 직업
+        location (str): 현재 위치
         
-        # Gemini API 초기화
-        genai.configure(api_key=api_key)
+    Returns:
+        dict: 능력치 제안
+    """
+    prediction = get_ability_classifier().classify(action, profession)
+    if prediction["confident"]:
+        return build_local_ability_suggestion(prediction)
+    
+    prompt = build_ability_prompt(action, profession, location)
+    response, outcome = generate_gemini_result(prompt, 300, call_site="ability_suggestion", response_schema=ABILITY_SCHEMA)
+    if outcome not in MODEL_RESPONSE_OUTCOMES:
+        return build_local_ability_suggestion(prediction)
+    suggestion = parse_ability_suggestion(response)
+    learn_ability_decision(action, profession, suggestion, outcome)
+    return suggestion
+
+def get_ability_suggestions(actions, profession, location, priority=None):
+    """
+    여러 행동의 능력치 제안을 동시에 생성
+    
+    Args:
+        actions (list): 플레이어 행동 목록
+        profession (str): 캐릭터 직업
+        location (str): 현재 위치
+        priority (str): 속도 제한 우선순위 (미리 계산 시 "prefetch")
         
-        # 최신 모델 이름으로 시도
-        try:
-            model = genai.GenerativeModel("gemini-1.5-pro")
-            return model
-        except Exception as e:
-            # 이전 모델 이름으로 시도
-            try:
-                model = genai.GenerativeModel("gemini-pro")
-                return model
-            except Exception as inner_e:
-                st.error(f"사용 가능한 Gemini 모델을 찾을 수 없습니다. 백업 응답을 사용합니다.")
-                st.session_state.use_backup_mode = True
-                return None
-                
-    except Exception as e:
-        st.error(f"Gemini 모델 초기화 오류: {e}")
-        st.session_state.use_backup_mode = True
-        return None
+    Returns:
+        list: 행동 순서대로 정렬된 능력치 제안 목록
+    """
+    classifier = get_ability_classifier()
+    predictions = [classifier.classify(action, profession) for action in actions]
+    
+    # 로컬 분류기가 판정하지 못한 행동만 AI에 요청
+    deferred = [index for index, prediction in enumerate(predictions) if not prediction["confident"]]
+    responses = run_prompts_concurrently([
+        {
+            "prompt": build_ability_prompt(actions[index], profession, location),
+            "max_tokens": 300,
+            "call_site": "ability_suggestion",
+            "response_schema": ABILITY_SCHEMA,
+            "priority": priority,
+            "with_outcome": True
+        }
+        for index in deferred
+    ]) if deferred else []
+    
+    suggestions = [build_local_ability_suggestion(prediction) if prediction["confident"] else None for prediction in predictions]
+    for index, (response, outcome) in zip(deferred, responses):
+        if outcome not in MODEL_RESPONSE_OUTCOMES:
+            # 백업 응답의 판정은 임의의 값이므로 분류기 예측을 사용하고 학습하지 않음
+            suggestions[index] = build_local_ability_suggestion(predictions[index])
+            continue
+        suggestions[index] = parse_ability_suggestion(response)
+        learn_ability_decision(actions[index], profession, suggestions[index], outcome)
+    return suggestions
 
-def generate_gemini_text(prompt, max_tokens=500, retries=2, timeout=10):
+def build_ability_outcome_prompt(action, profession, location, ability_code, difficulty):
     """
-    Gemini API를 사용하여 텍스트 생성 - 오류 처리 및 재시도 로직 추가
+    로컬 판정의 성공/실패 결과 문장 보강 프롬프트 생성
     
     Args:
-        prompt (str): 텍스트 생성을 위한 프롬프트
-        max_tokens (int): 생성할 최대 토큰 수
-        retries (int): 실패 시 재시도 횟수
-        timeout (int): 타임아웃 시간(초)
+        action (str): 플레이어 행동
+        profession (str): 캐릭터 직업
+        location (str): 현재 위치
+        ability_code (str): 판정 능력치 코드
+        difficulty (int): 판정 난이도
         
     Returns:
-        str: 생성된 텍스트
+        str: 프롬프트
+    """
+    return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어의 행동을 아래 능력치와 난이도로 판정하기로 했습니다.
+    판정 이유와 성공/실패 시 일어날 일을 한 문장씩 한국어로 써주세요.
+    
+    플레이어 행동: {action}
+    캐릭터 직업: {profession}
+    현재 위치: {location}
+    능력치: {ability_code}({ABILITY_NAMES.get(ability_code, '')})
+    난이도: {difficulty}
+    
+    다음 JSON 형식으로 반환해주세요:
+    {{
+      "reason": "이 능력치로 판정하는 이유 (한 문장)",
+      "success_outcome": "성공 시 결과 (한 문장)",
+      "failure_outcome": "실패 시 결과 (한 문장)"
+    }}
+    """
+
+def enrich_ability_outcomes(action, profession, location, suggestion):
+    """
+    로컬 분류기로 정한 판정의 이유와 성공/실패 결과 문장을 AI로 보강 (능력치와 난이도는 그대로)
+    
+    Args:
+        action (str): 플레이어 행동
+        profession (str): 캐릭터 직업
+        location (str): 현재 위치
+        suggestion (dict): 판정 제안 (code 또는 ability_code, difficulty 포함)
+        
+    Returns:
+        dict: reason, success_outcome, failure_outcome (실패 시 빈 사전)
+    """
+    ability_code = suggestion.get("code") or suggestion.get("ability_code")
+    prompt = build_ability_outcome_prompt(action, profession, location, ability_code, suggestion.get("difficulty"))
+    return generate_gemini_json(prompt, ABILITY_OUTCOME_SCHEMA, 200, call_site="ability_outcome", default={})
+
+def build_turn_prompt(action, dice_result, success, ability, difficulty, theme, location, character, previous_story=""):
+    """
+    한 턴의 스토리, 아이템 변화, 다음 행동 제안을 한 번에 요청하는 프롬프트 생성
+    
+    Args:
+        generate_story_response와 동일
+        
+    Returns:
+        str: 프롬프트
+    """
+    inventory_names = [item.name if hasattr(item, 'name') else str(item) for item in character.get('inventory', [])]
+    result_text = "성공" if success else "실패"
+    
+    def render(previous_story):
+        return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어의 행동과 주사위 판정 결과에 따라 이야기를 이어서 한국어로 작성하고,
+    그 결과로 생긴 아이템 변화와 다음 행동 제안을 함께 정리해주세요.
+    
+    ## 게임 정보
+    세계 테마: {theme}
+    현재 위치: {location}
+    캐릭터 직업: {character.get('profession', '')}
+    소지품: {', '.join(inventory_names)}
+    
+    ## 직전 이야기
+    {previous_story}
+    
+    ## 판정
+    플레이어 행동: {action}
+    능력치: {ability}
+    주사위 결과: {dice_result} (난이도 {difficulty}) → {result_text}
+    
+    ## 작성 지침
+    1. narrative: 판정 결과({result_text})가 분명하게 드러나는 약 200단어의 이야기. 획득하거나 사용한 아이템 이름은 **굵게** 표시하세요.
+    2. gained_items: 이야기에서 플레이어가 실제로 획득한 아이템만 포함하세요. 없으면 빈 배열.
+    3. used_items: 소지품 중 이야기에서 사용한 아이템만 포함하세요. 없으면 빈 배열.
+    4. next_actions: 다음에 할 수 있는 행동 5가지. 각 행동은 [아이템 획득], [아이템 사용], [위험], [상호작용], [일반] 중 하나의 태그로 시작하세요.
+    
+    다른 설명 없이 다음 JSON 형식으로만 반환해주세요:
+    {{
+      "narrative": "이야기",
+      "gained_items": [
+        {{"name": "아이템 이름", "description": "설명", "consumable": false, "durability": null, "quantity": 1, "type": "아이템 유형"}}
+      ],
+      "used_items": [
+        {{"name": "아이템 이름", "quantity": 1}}
+      ],
+      "next_actions": ["[태그] 행동 설명"]
+    }}
+    """
+    
+    # 직전 이야기는 최근 내용부터 남은 토큰 예산만큼 문장 단위로 포함
+    return fit_prompt(
+        render,
+        get_prompt_budget("turn"),
+        get_token_counter(),
+        previous_story=PromptSection(previous_story, keep="tail")
+    )
+
+def normalize_turn_data(data, inventory_names):
+    """
+    스키마 검증을 마친 턴 데이터를 게임에서 사용하는 형태로 정리
+    
+    Args:
+        data (dict): TURN_SCHEMA로 검증된 턴 데이터
+        inventory_names (list): 현재 인벤토리 아이템 이름 목록
+        
+    Returns:
+        dict or None: 정리된 턴 결과 (스토리가 비어 있으면 None)
+    """
+    narrative = data.get("narrative", "")
+    if not narrative:
+        return None
+    
+    gained_items = [item for item in data.get("gained_items", []) if item["name"]]
+    used_items = [
+        {"name": item["name"], "quantity": max(item.get("quantity", 1), 1)}
+        for item in data.get("used_items", [])
+        if item["name"] in inventory_names
+    ]
+    next_actions = data.get("next_actions", [])
+    
+    return {
+        "narrative": narrative.strip(),
+        "gained_items": gained_items,
+        "used_items": used_items,
+        "next_actions": parse_action_suggestions("\n".join(next_actions))
+    }
+
+def stream_turn(action, dice_result, success, ability, difficulty, theme, location, character, previous_story=""):
+    """
+    스토리, 획득/사용 아이템, 다음 행동 제안을 한 번의 스트리밍 호출로 생성 - 도착한 스토리 부분을 먼저 보여줄 수 있도록 중간 결과를 내보냄
+    
+    Args:
+        generate_story_response와 동일
+        
+    Yields:
+        tuple: (지금까지의 스토리 텍스트, 완성된 턴 결과 또는 None)
+               마지막 값에만 턴 결과가 담기며, 응답을 해석할 수 없거나 끝까지 받은 모델 응답이 아니면 턴 결과는 None
     """
-    # 백업 모드 확인
+    # 백업 모드에서는 단계별 호출의 백업 응답을 사용
     if getattr(st.session_state, 'use_backup_mode', False):
-        # 백업 모드면 즉시 백업 응답 반환
-        if "world" in prompt.lower():
-            return BACKUP_RESPONSES["world"]
-        elif "character" in prompt.lower():
-            return BACKUP_RESPONSES["character"]
-        elif "질문" in prompt.lower() or "question" in prompt.lower():
-            return BACKUP_RESPONSES["question"]
-        else:
-            return BACKUP_RESPONSES["story"]
+        yield "", None
+        return
     
-    # 재시도 로직
-    for attempt in range(retries + 1):
-        try:
-            model = setup_gemini()
-            
-            if not model:
-                # 모델 초기화 실패 시 백업 응답 사용
-                if "world" in prompt.lower():
-                    return BACKUP_RESPONSES["world"]
-                elif "character" in prompt.lower():
-                    return BACKUP_RESPONSES["character"]
-                elif "질문" in prompt.lower() or "question" in prompt.lower():
-                    return BACKUP_RESPONSES["question"]
-                else:
-                    return BACKUP_RESPONSES["story"]
-            
-            # 안전 설정
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
-            ]
-            
-            # 모델 생성 구성
-            generation_config = {
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": max_tokens,
-                "stop_sequences": ["USER:", "ASSISTANT:"]
-            }
-            
-            # 텍스트 생성
-            response = model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
-            
-            # 응답 텍스트 추출 및 길이 제한
-            text = response.text
-            if len(text) > max_tokens * 4:
-                text = text[:max_tokens * 4] + "..."
-            
-            return text
-            
-        except Exception as e:
-            if attempt < retries:
-                st.warning(f"API 호출 오류, 재시도 중... ({attempt+1}/{retries})")
-                time.sleep(1)  # 잠시 대기 후 재시도
-                continue
-            else:
-                st.error(f"Gemini API 호출 오류: {e}")
-                st.session_state.use_backup_mode = True
-                
-                # 오류 발생 시 백업 응답 사용
-                if "world" in prompt.lower():
-                    return BACKUP_RESPONSES["world"]
-                elif "character" in prompt.lower():
-                    return BACKUP_RESPONSES["character"]
-                elif "질문" in prompt.lower() or "question" in prompt.lower():
-                    return BACKUP_RESPONSES["question"]
-                else:
-                    return BACKUP_RESPONSES["story"]
+    prompt = build_turn_prompt(action, dice_result, success, ability, difficulty, theme, location, character, previous_story)
+    inventory_names = [item.name if hasattr(item, 'name') else str(item) for item in character.get('inventory', [])]
     
-    # 이 코드는 실행되지 않음 (위에서 항상 반환함)
-    return BACKUP_RESPONSES["story"]
+    data = None
+    stream = TextStream(stream_gemini_json(prompt, TURN_SCHEMA, 1200, call_site="turn"))
+    for data in stream:
+        yield data.get("narrative", ""), None
+    
+    # 중간에 끊긴 스트림이나 백업 응답은 복원한 부분 값이 검증을 통과해도 턴 결과로 쓰지 않음 (단계별 호출로 대체)
+    if stream.outcome not in MODEL_RESPONSE_OUTCOMES or not data:
+        yield "", None
+        return
+    
+    turn = normalize_turn_data(data, inventory_names)
+    yield (turn["narrative"] if turn else ""), turn
 
-def generate_character_options(profession, theme):
+def build_world_prompt(theme):
     """
-    직업과 테마에 기반한 캐릭터 배경 옵션 생성
+    세계관 생성 프롬프트 생성
+    
+    Args:
+        theme (str): 세계관 테마
+        
+    Returns:
+        str: 프롬프트
+    """
+    return f"""
+    당신은 TRPG 게임 마스터입니다. '{theme}' 테마의 몰입감 있는 세계를 한국어로 만들어주세요.
+    다음 구조에 따라 체계적으로 세계관을 구축해주세요:
+
+    # 1. 기본 골격 수립
+    ## 핵심 테마와 분위기
+    - '{theme}'의 특성이 뚜렷하게 드러나는 세계의 중심 이념이나 분위기
+    
+    ## 세계의 독창적 규칙
+    - 이 세계만의 특별한 물리법칙이나 마법/기술 체계
+    
+    # 2. 구조적 요소
+    ## 주요 지역 (3~5개)
+    - 각 지역의 특성과 분위기
+    
+    ## 주요 세력 (2~3개)
+    - 세력 간의 관계와 갈등 구조
+    
+    # 3. 현재 상황
+    ## 중심 갈등 
+    - 플레이어가 직면하게 될 세계의 주요 문제나 갈등
+    
+    ## 잠재적 위협
+    - 세계를 위협하는 요소나 임박한 위기
+    
+    # 4. 플레이어 개입 지점
+    - 플레이어가 이 세계에서 영향력을 행사할 수 있는 방법
+    - 탐험 가능한 비밀이나 수수께끼
+
+    모든 문장은 반드시 완성된 형태로 작성하세요. 중간에 문장이 끊기지 않도록 해주세요.
+    전체 내용은 약 400-500단어로 작성해주세요.
+    """
+
+def build_character_options_prompt(profession, theme):
+    """
+    캐릭터 배경 옵션 생성 프롬프트 생성
     
     Args:
         profession (str): 선택한 직업
         theme (str): 세계관 테마
         
     Returns:
-        list: 배경 스토리 옵션 목록
+        str: 프롬프트
     """
-    prompt = f"""
+    return f"""
     당신은 TRPG 게임 마스터입니다. '{theme}' 테마의 세계에서 '{profession}' 직업을 가진 
     캐릭터의 3가지 다른 배경 스토리 옵션을 한국어로 제안해주세요. 
 
@@ -191,25 +2092,163 @@ def generate_character_options(profession, theme):
     #옵션 3:
     (세 번째 배경 스토리)
     """
+
+def parse_character_options(response, profession, fill=True):
+    """
+    "#옵션 N:" 형식의 응답을 배경 옵션 목록으로 분리
     
-    response = generate_gemini_text(prompt, 800)
-    
-    # 옵션 분리
+    Args:
+        response (str): AI 응답
+        profession (str): 선택한 직업 (모자란 옵션을 채울 기본 배경에 사용)
+        fill (bool): 옵션이 3개 미만이면 기본 배경으로 채울지 여부
+        
+    Returns:
+        list: 배경 스토리 옵션 목록 (최대 3개)
+    """
     options = []
     current_option = ""
     for line in response.split('\n'):
         if line.startswith('#옵션') or line.startswith('# 옵션') or line.startswith('옵션'):
-            if current_option:
+            if current_option.strip():
                 options.append(current_option.strip())
             current_option = ""
         else:
             current_option += line + "\n"
     
-    if current_option:
+    if current_option.strip():
         options.append(current_option.strip())
     
     # 옵션이 3개 미만이면 백업 옵션 추가
-    while len(options) < 3:
+    while fill and len(options) < 3:
         options.append(f"당신은 {profession}으로, 험난한 세계에서 살아남기 위해 기술을 연마했습니다. 특별한 재능을 가지고 있으며, 자신의 운명을 개척하고자 합니다.")
     
     return options[:3]  # 최대 3개까지만 반환
+
+def generate_character_options(profession, theme):
+    """
+    직업과 테마에 기반한 캐릭터 배경 옵션 생성
+    
+    Args:
+        profession (str): 선택한 직업
+        theme (str): 세계관 테마
+        
+    Returns:
+        list: 배경 스토리 옵션 목록
+    """
+    response = generate_gemini_text(build_character_options_prompt(profession, theme), 800, call_site="character_options")
+    return parse_character_options(response, profession)
+
+def build_movement_prompt(current_location, destination, theme, route=None):
+    """
+    장소 이동 스토리 프롬프트 생성
+    
+    Args:
+        current_location (str): 현재 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        route (dict): 위치 그래프의 경로 정보 (있으면 이동 거리와 위험도를 함께 전달)
+        
+    Returns:
+        str: 프롬프트
+    """
+    route_info = ""
+    if route:
+        route_info = f"\n    이동 거리: 약 {route['distance']}km\n    경로 위험도: {route['danger']}/5 (높을수록 이동 중 위협이 큼)"
+    
+    return f"""
+    당신은 TRPG 게임 마스터입니다. 플레이어가 {current_location}에서 {destination}으로 이동하려고 합니다.
+    
+    ## 이동 스토리 지침
+    1. 이동 과정과 새로운 장소에 도착했을 때의 상황을 생생하게 묘사해주세요.
+    2. 이동 중 발생하는 작은 사건이나 만남을 포함하세요.
+    3. 출발지와 목적지의 대비되는 분위기나 환경적 차이를 강조하세요.
+    4. 다양한 감각적 묘사(시각, 청각, 후각, 촉각)를 포함하세요.
+    5. 도착 장소에서 플레이어가 볼 수 있는 주요 랜드마크나 특징적 요소를 설명하세요.
+    6. 현지 주민이나 생물의 반응이나 활동을 포함하세요.
+    
+    ## 정보
+    세계 테마: {theme}
+    출발 위치: {current_location}
+    목적지: {destination}{route_info}
+    
+    약 200단어 내외로 작성해주세요.
+    모든 문장은 완결된 형태로 작성하세요.
+    """
+
+@st.cache_resource
+def get_content_pack():
+    """
+    프로세스 전체에서 공유하는 오프라인 콘텐츠 팩 반환 (파일은 메모리 매핑해 프로세스끼리 페이지 공유)
+    
+    경로는 환경 변수 TRPG_CONTENT_PACK, 없으면 CONTENT_PACK_SETTINGS["path"]를 사용합니다.
+    
+    Returns:
+        ContentPack or None: 팩 파일이 없거나 읽을 수 없으면 None
+    """
+    path = os.environ.get(CONTENT_PACK_ENV_VAR, CONTENT_PACK_SETTINGS["path"])
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ContentPack(path)
+    except (OSError, ValueError):
+        # 손상되었거나 형식이 다른 팩은 없는 것으로 보고 AI 생성을 사용
+        return None
+
+def sample_content_pack(section, count=1):
+    """
+    콘텐츠 팩의 구역에서 서로 다른 항목을 무작위로 뽑기 (주사위 난수를 사용해 시드를 정하면 재현 가능)
+    
+    Args:
+        section (str): 구역 키 (make_section_key로 생성)
+        count (int): 뽑을 항목 수
+        
+    Returns:
+        list: 항목 텍스트 목록 (팩이 없거나 구역이 비어 있으면 빈 목록)
+    """
+    pack = get_content_pack()
+    if pack is None:
+        return []
+    return pack.sample(section, count, get_dice_rng())
+
+def start_content_enrichment(kind, state_key, fn, *args, **kwargs):
+    """
+    팩 항목을 보여준 뒤 같은 콘텐츠의 AI 생성을 백그라운드에서 시작 (설정에서 켠 종류만, 백업 모드에서는 생략)
+    
+    Args:
+        kind (str): 콘텐츠 종류 (CONTENT_PACK_SETTINGS["live_enrichment"]의 키)
+        state_key (str): 결과 Future를 저장할 세션 상태 키
+        fn (callable): AI 생성 함수
+        *args: 함수 위치 인자
+        **kwargs: 함수 키워드 인자
+        
+    Returns:
+        Future or None: 시작한 작업 (시작하지 않았으면 None)
+    """
+    if not CONTENT_PACK_SETTINGS["live_enrichment"].get(kind):
+        return None
+    if getattr(st.session_state, 'use_backup_mode', False):
+        return None
+    
+    future = submit_background(fn, *args, **kwargs)
+    st.session_state[state_key] = future
+    return future
+
+def collect_content_enrichment(state_key):
+    """
+    백그라운드 AI 생성 결과가 도착했으면 꺼내서 반환 (기다리지 않음)
+    
+    Args:
+        state_key (str): start_content_enrichment에 넘긴 세션 상태 키
+        
+    Returns:
+        생성 결과 또는 None (작업이 없거나 아직 진행 중이거나 실패한 경우)
+    """
+    future = st.session_state.get(state_key)
+    if future is None or not future.done():
+        return None
+    
+    del st.session_state[state_key]
+    try:
+        return future.result()
+    except Exception:
+        return None
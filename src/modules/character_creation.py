@@ -89,6 +89,15 @@ def display_background_selection():
             )
             st.session_state.background_options_generated = True
     
+    # 콘텐츠 팩 배경을 보는 동안 AI가 만든 배경 옵션이 도착했으면 추가
+    from src.modules.ai_service import collect_content_enrichment
+    live_backgrounds = collect_content_enrichment('background_enrichment')
+    if live_backgrounds:
+        st.session_state.character_backgrounds = st.session_state.character_backgrounds + [
+            background for background in live_backgrounds
+            if background not in st.session_state.character_backgrounds
+        ]
+    
     # 생성된 배경 옵션 표시
     if 'character_backgrounds' in st.session_state and st.session_state.character_backgrounds:
         # 옵션 숫자 및 탭 생성
@@ -1,12 +1,19 @@
 """
 캐릭터 생성 및 관리를 위한 유틸리티 모듈
 """
-import random
 import streamlit as st
 import re
 from modules.ai_service import generate_gemini_text
 from modules.item_manager import initialize_inventory
-from config.constants import PROFESSION_KEY_STATS, BACKGROUND_TAGS, ABILITY_NAMES
+from utils.dice_roller import roll_dice, get_dice_rng
+from config.constants import (
+    PROFESSION_KEY_STATS,
+    BACKGROUND_TAGS,
+    ABILITY_NAMES,
+    THEME_PROFESSIONS,
+    DEFAULT_PROFESSIONS
+)
+from utils.content_pack import make_section_key
 
 # 직업별 아이콘 맵핑
 PROFESSION_ICONS = {
@@ -214,12 +221,7 @@ def generate_professions(theme):
     Returns:
         list: 직업 목록
     """
-    professions = {
-        'fantasy': ['마법사', '전사', '도적', '성직자', '음유시인', '연금술사'],
-        'sci-fi': ['우주 파일럿', '사이버 해커', '생체공학자', '보안 요원', '외계종족 전문가', '기계공학자'],
-        'dystopia': ['정보 브로커', '밀수업자', '저항군 요원', '엘리트 경비원', '스카운터', '의료 기술자']
-    }
-    return professions.get(theme, ['모험가', '전문가', '기술자'])
+    return list(THEME_PROFESSIONS.get(theme, DEFAULT_PROFESSIONS))
 
 def generate_races(theme):
     """
@@ -238,74 +240,40 @@ def generate_races(theme):
     }
     return races.get(theme, ['인간', '비인간', '신비종족'])
 
-def generate_character_options(profession, theme):
+def generate_character_options(profession, theme, use_pack=True):
     """
     직업과 테마에 기반한 캐릭터 배경 옵션 생성
     
+    콘텐츠 팩에 이 직업의 배경이 있으면 바로 골라 반환하고, 설정에 따라 AI 생성을 백그라운드에서
+    시작합니다 (도착하면 배경 선택 화면에 옵션으로 추가).
+    
     Args:
         profession (str): 선택한 직업
         theme (str): 세계관 테마
+        use_pack (bool): 콘텐츠 팩 사용 여부 (False면 항상 AI로 생성)
         
     Returns:
         list: 배경 스토리 옵션 목록
     """
-    prompt = f"""
-    당신은 TRPG 게임 마스터입니다. '{theme}' 테마의 세계에서 '{profession}' 직업을 가진 
-    캐릭터의 3가지 다른 배경 스토리 옵션을 한국어로 제안해주세요. 
-
-    각 옵션은 다음 요소를 포함해야 합니다:
-
-    ## 삼위일체 구조
-    1. **배경 서사**: 캐릭터가 겪은 결정적 사건 3개
-    2. **도덕적 축**: 선택을 규정하는 2가지 원칙
-    3. **정체성 기반**: 타인에게 설명하는 5초 자기소개
-
-    ## 개성화를 위한 요소
-    - 캐릭터만의 독특한 특성이나 버릇
-    - 관계망 (가족, 멘토, 적대자 등)
-    - 물리적 특징이나 외형적 특성
-
-    ## 직업 연계성
-    - 이 캐릭터가 해당 직업을 가지게 된 이유
-    - 직업 관련 전문 기술이나 지식
-
-    각 옵션을 120단어 내외로 작성해주세요.
-    모든 문장은 완결된 형태로 작성하세요.
-    
-    다음 형식으로 반환해주세요:
-    
-    #옵션 1:
-    (첫 번째 배경 스토리)
-    
-    #옵션 2:
-    (두 번째 배경 스토리)
-    
-    #옵션 3:
-    (세 번째 배경 스토리)
-    """
-    
-    from src.modules.ai_service import generate_gemini_text
-    response = generate_gemini_text(prompt, 800)
-    
-    # 옵션 분리
-    options = []
-    current_option = ""
-    for line in response.split('\n'):
-        if line.startswith('#옵션') or line.startswith('# 옵션') or line.startswith('옵션'):
-            if current_option:
-                options.append(current_option.strip())
-            current_option = ""
-        else:
-            current_option += line + "\n"
-    
-    if current_option:
-        options.append(current_option.strip())
-    
-    # 옵션이 3개 미만이면 백업 옵션 추가
-    while len(options) < 3:
-        options.append(f"당신은 {profession}으로, 험난한 세계에서 살아남기 위해 기술을 연마했습니다. 특별한 재능을 가지고 있으며, 자신의 운명을 개척하고자 합니다.")
+    from src.modules.ai_service import (
+        generate_gemini_text,
+        build_character_options_prompt,
+        parse_character_options,
+        sample_content_pack,
+        start_content_enrichment
+    )
+    
+    if use_pack:
+        # 이전 직업의 AI 생성 결과가 남아 있으면 버림
+        st.session_state.pop('background_enrichment', None)
+        
+        packed = sample_content_pack(make_section_key("background", theme, profession), 3)
+        if packed:
+            start_content_enrichment("background", "background_enrichment", generate_character_options, profession, theme, use_pack=False)
+            return packed
     
-    return options[:3]  # 최대 3개까지만 반환
+    response = generate_gemini_text(build_character_options_prompt(profession, theme), 800, call_site="character_options")
+    return parse_character_options(response, profession)
 
 def extract_background_tags(background_text):
     """
@@ -512,7 +480,7 @@ def ability_roll_section(placeholder):
         # 순차적으로 각 능력치 굴리기
         for ability in ability_names:
             # 3D6 주사위 결과 계산
-            dice_rolls = [random.randint(1, 6) for _ in range(3)]
+            dice_rolls = roll_dice(6, 3)
             total = sum(dice_rolls)
             
             # 결과 표시
@@ -611,4 +579,4 @@ def generate_special_trait(theme, background_tags):
             traits.append("통제 면역: 정신 조작 시도에 대한 저항 +25%")
     
     # 무작위 특성 선택
-    return random.choice(traits)
+    return get_dice_rng().choice(traits)
@@ -1,23 +1,35 @@
 import streamlit as st
-import random
 import time
 import re
+import hashlib
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Dict, List, Any, Tuple, Optional
 
 from utils.dice_roller import roll_dice, display_dice_animation, calculate_dice_result
 from utils.theme_manager import create_theme_image
-from utils.location_manager import generate_locations, generate_movement_story
+from utils.background_tasks import submit_background
+from utils.action_generator import generate_local_action_suggestions, merge_action_suggestions
+from utils.location_manager import (
+    generate_locations,
+    stream_movement_story,
+    prefetch_movement_stories,
+    describe_route_info
+)
 from modules.ai_service import (
     generate_action_suggestions, 
     master_answer_game_question, 
-    generate_story_response
+    generate_story_response,
+    stream_story_response,
+    stream_turn
 )
 from modules.item_manager import (
     display_inventory, 
     extract_items_from_story,
     extract_used_items_from_story,
+    extract_item_changes_from_story,
     update_inventory
 )
+from config.constants import ABILITY_CLASSIFIER_SETTINGS, LOCAL_ACTION_SETTINGS
 
 def initialize_game_state():
     """게임 관련 상태 초기화"""
@@ -190,6 +202,51 @@ def display_item_notification():
         # 알림을 표시한 후 초기화 (다음 번에 사라지게)
         st.session_state.show_item_notification = False
         
+def format_story_html(story):
+    """
+    스토리 텍스트를 강조 처리된 HTML 단락으로 변환
+    
+    Args:
+        story (str): 스토리 텍스트
+        
+    Returns:
+        str: HTML 단락
+    """
+    # 단락 구분 개선
+    story_paragraphs = story.split("\n\n")
+    formatted_story = ""
+    for para in story_paragraphs:
+        # HTML 이스케이프 처리
+        para = para.replace("<", "&lt;").replace(">", "&gt;")
+        # 아이템 이름 강조 처리 추가
+        para = re.sub(r"'([^']+)'", r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
+        para = re.sub(r'"([^"]+)"', r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
+        para = re.sub(r'\*\*([^*]+)\*\*', r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
+        # 중요 키워드 강조 처리 추가
+        para = re.sub(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b', r"<span style='color: #6b8afd; font-weight: bold;'>\1</span>", para)
+        
+        formatted_story += f"<p>{para}</p>\n"
+    
+    return formatted_story
+
+def render_streaming_story(placeholder, chunks):
+    """
+    스트리밍 스토리 조각을 플레이스홀더에 이어서 표시
+    
+    Args:
+        placeholder (st.empty): 스토리를 표시할 빈 요소
+        chunks (iterable): 문장 단위 스토리 조각
+        
+    Returns:
+        str: 완성된 스토리 텍스트
+    """
+    story = ""
+    for chunk in chunks:
+        story += chunk
+        placeholder.markdown(f"<div class='story-text'>{format_story_html(story)}</div>", unsafe_allow_html=True)
+    
+    return story.strip()
+
 def display_story_and_actions():
     """스토리 로그와 플레이어 행동 관련 UI를 표시하는 함수"""
     st.header("모험의 이야기")
@@ -202,20 +259,7 @@ def display_story_and_actions():
         # 가장 최근 이야기는 강조하여 표시
         latest_story = st.session_state.story_log[-1]
         
-        # 단락 구분 개선
-        story_paragraphs = latest_story.split("\n\n")
-        formatted_story = ""
-        for para in story_paragraphs:
-            # HTML 이스케이프 처리
-            para = para.replace("<", "&lt;").replace(">", "&gt;")
-            # 아이템 이름 강조 처리 추가
-            para = re.sub(r"'([^']+)'", r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
-            para = re.sub(r'"([^"]+)"', r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
-            para = re.sub(r'\*\*([^*]+)\*\*', r"<span style='color: #FFD700; font-weight: bold;'>\1</span>", para)
-            # 중요 키워드 강조 처리 추가
-            para = re.sub(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b', r"<span style='color: #6b8afd; font-weight: bold;'>\1</span>", para)
-            
-            formatted_story += f"<p>{para}</p>\n"
+        formatted_story = format_story_html(latest_story)
         
         st.markdown(f"<div class='story-text'>{formatted_story}</div>", unsafe_allow_html=True)
             
@@ -267,31 +311,33 @@ def handle_action_phase():
         
 def handle_movement():
     """위치 이동 처리"""
-    with st.spinner(f"{st.session_state.move_destination}(으)로 이동 중..."):
-        # 로딩 표시
-        loading_placeholder = st.empty()
-        loading_placeholder.info(f"{st.session_state.move_destination}(으)로 이동하는 중... 잠시만 기다려주세요.")
-        
-        # 이동 스토리 생성
-        movement_story = generate_movement_story(
+    st.info(f"{st.session_state.move_destination}(으)로 이동하는 중...")
+    
+    # 이동 스토리를 생성되는 대로 표시
+    story_placeholder = st.empty()
+    movement_story = render_streaming_story(
+        story_placeholder,
+        stream_movement_story(
             st.session_state.current_location,
             st.session_state.move_destination,
-            st.session_state.theme
+            st.session_state.theme,
+            st.session_state.world_description
         )
-        
-        # 스토리 로그에 추가
-        st.session_state.story_log.append(movement_story)
-        
-        # 현재 위치 업데이트
-        st.session_state.current_location = st.session_state.move_destination
-        
-        # 이동 상태 초기화
-        st.session_state.move_destination = ""
-        st.session_state.action_phase = 'suggestions'
-        st.session_state.suggestions_generated = False
-        
-        # 로딩 메시지 제거
-        loading_placeholder.empty()
+    )
+    
+    # 완성된 스토리만 로그에 추가
+    st.session_state.story_log.append(movement_story)
+    
+    # 현재 위치 업데이트
+    st.session_state.current_location = st.session_state.move_destination
+    
+    # 이동 상태 초기화
+    st.session_state.move_destination = ""
+    st.session_state.action_phase = 'suggestions'
+    st.session_state.suggestions_generated = False
+    
+    # 새 위치의 행동 제안 미리 생성
+    prefetch_action_suggestions()
     
     st.rerun()
 
@@ -324,11 +370,16 @@ def handle_ability_check():
             
             # 세션에 저장
             st.session_state.suggested_ability = suggested_ability
+            # 로컬 분류기로 정한 판정이면 결과 문장을 백그라운드에서 AI로 보강
+            start_outcome_enrichment(suggested_ability)
         
         st.rerun()
     
     # 마스터의 제안 표시 - 향상된 UI
     ability = st.session_state.suggested_ability
+    
+    # 표시하기 전에 도착한 보강 결과 문장만 반영 (이후에 도착하면 버림)
+    apply_outcome_enrichment(ability)
     st.markdown(f"""
     <div style='background-color: #2a3549; padding: 15px; border-radius: 5px; margin: 10px 0; border-left: 4px solid #6b8afd;'>
         <h4 style='margin-top: 0;'>마스터의 판정 제안</h4>
@@ -438,6 +489,10 @@ def suggest_ability_for_action(action: str, profession: str, location: str) -> D
     # AI 서비스에 능력치 제안 요청
     suggestion = get_ability_suggestion(action, profession, location)
     
+    return format_ability_suggestion(suggestion)
+
+def format_ability_suggestion(suggestion: Dict[str, Any]) -> Dict[str, Any]:
+    """AI 능력치 제안을 판정 화면에서 사용하는 형태로 변환"""
     # 능력치 전체 이름 매핑
     ability_names = {
         'STR': '근력', 'INT': '지능', 'DEX': '민첩', 
@@ -459,15 +514,237 @@ def suggest_ability_for_action(action: str, profession: str, location: str) -> D
         'reason': reason,
         'success_outcome': success_outcome,
         'failure_outcome': failure_outcome,
-        'recommended_dice': recommended_dice
+        'recommended_dice': recommended_dice,
+        'source': suggestion.get('source', 'ai'),
+        'confidence': suggestion.get('confidence')
     }
+
+def start_outcome_enrichment(ability: Dict[str, Any]):
+    """로컬 분류기로 정한 판정의 결과 문장 보강을 백그라운드에서 시작 (판정마다 한 번)"""
+    from modules.ai_service import enrich_ability_outcomes
+    
+    if not ABILITY_CLASSIFIER_SETTINGS["enrich_outcomes"] or ability.get('source') != 'local':
+        return
+    if ability.get('enrichment') is not None or ability.get('enriched'):
+        return
+    
+    ability['enrichment'] = submit_background(
+        enrich_ability_outcomes,
+        st.session_state.current_action,
+        st.session_state.character['profession'],
+        st.session_state.current_location,
+        ability
+    )
+
+def apply_outcome_enrichment(ability: Dict[str, Any]):
+    """판정 제안을 표시하기 직전에 호출해서 그때까지 도착한 보강 결과 문장만 반영 (기다리지 않음)"""
+    future = ability.pop('enrichment', None)
+    ability['enriched'] = True
+    if future is None:
+        return
+    if not future.done():
+        # 표시한 뒤에 도착하는 결과는 화면에 보인 판정 제안과 달라지므로 버림
+        future.cancel()
+        return
+    
+    try:
+        enriched = future.result()
+    except Exception:
+        return
+    
+    for key in ('reason', 'success_outcome', 'failure_outcome'):
+        if enriched.get(key):
+            ability[key] = enriched[key]
+
+def normalize_action_text(action: str) -> str:
+    """능력치 제안 캐시 키로 사용할 행동 텍스트 정규화"""
+    return re.sub(r'\s+', ' ', action).strip()
+
+def precompute_ability_checks(actions: List[str]):
+    """제안된 모든 행동의 능력치 판정을 백그라운드에서 동시에 미리 계산"""
+    from modules.ai_service import get_ability_suggestions
+    
+    profession = st.session_state.character['profession']
+    location = st.session_state.current_location
+    
+    def compute():
+        suggestions = get_ability_suggestions(actions, profession, location, priority="prefetch")
+        return {
+            normalize_action_text(action): format_ability_suggestion(suggestion)
+            for action, suggestion in zip(actions, suggestions)
+        }
+    
+    st.session_state.ability_precompute = {'location': location, 'future': submit_background(compute)}
+
+def get_precomputed_ability(action: str) -> Optional[Dict[str, Any]]:
+    """
+    미리 계산된 능력치 판정 조회 (기다리지 않음)
+    
+    아직 계산 중이면 None을 반환해서 호출한 쪽이 이 행동만 바로 판정하도록 합니다.
+    
+    Returns:
+        dict or None: 판정 제안 또는 미리 계산된 결과가 없거나 아직 준비되지 않았으면 None
+    """
+    precompute = st.session_state.get('ability_precompute')
+    if not precompute or precompute['location'] != st.session_state.current_location:
+        return None
+    if not precompute['future'].done():
+        return None
+    
+    try:
+        results = precompute['future'].result()
+    except Exception:
+        return None
+    
+    return results.get(normalize_action_text(action))
+
+def get_last_story_entry() -> str:
+    """가장 최근 스토리 반환 (없으면 모험의 시작)"""
+    if st.session_state.story_log:
+        return st.session_state.story_log[-1]
+    return "모험의 시작"
+
+def get_suggestion_context_key() -> Tuple[str, str]:
+    """행동 제안이 유효한 상황을 나타내는 키 (현재 위치 + 최근 스토리)"""
+    last_entry_hash = hashlib.sha1(get_last_story_entry().encode("utf-8")).hexdigest()
+    return st.session_state.current_location, last_entry_hash
+
+def prefetch_action_suggestions(priority: Optional[str] = "prefetch"):
+    """새 스토리가 기록되는 즉시 백그라운드에서 다음 행동 제안 생성 시작 (같은 상황의 작업이 있으면 그대로 사용)"""
+    context_key = get_suggestion_context_key()
+    
+    existing = st.session_state.get('suggestion_prefetch')
+    if existing:
+        if existing['key'] == context_key:
+            return
+        existing['future'].cancel()
+    
+    # 작업 중 인벤토리가 바뀌어도 영향이 없도록 캐릭터 정보 복사
+    character = dict(st.session_state.character)
+    character['inventory'] = list(character.get('inventory', []))
+    
+    future = submit_background(
+        generate_action_suggestions,
+        st.session_state.current_location,
+        st.session_state.theme,
+        get_last_story_entry(),
+        character,
+        priority=priority
+    )
+    st.session_state.suggestion_prefetch = {'key': context_key, 'future': future, 'started': time.monotonic()}
+
+def poll_prefetched_suggestions(timeout: float = 0) -> Optional[List[str]]:
+    """
+    미리 생성 중인 AI 행동 제안 가져오기
+    
+    위치나 최근 스토리가 바뀌었으면 결과를 버립니다.
+    timeout 안에 끝나지 않으면 작업을 남겨 두고 None을 반환해서 다음에 다시 확인할 수 있게 합니다.
+    
+    Returns:
+        list or None: 행동 제안 목록 (생성에 실패했으면 빈 목록) 또는 아직 없으면 None
+    """
+    prefetch = st.session_state.get('suggestion_prefetch')
+    if not prefetch:
+        return None
+    
+    if prefetch['key'] != get_suggestion_context_key():
+        prefetch['future'].cancel()
+        del st.session_state.suggestion_prefetch
+        return None
+    
+    try:
+        suggestions = prefetch['future'].result(timeout=timeout)
+    except FutureTimeoutError:
+        return None
+    except Exception:
+        suggestions = []
+    
+    del st.session_state.suggestion_prefetch
+    return suggestions
+
+def show_action_suggestions(suggestions: List[str], source: str):
+    """행동 제안을 화면에 표시할 목록으로 정하고 모든 제안의 판정을 미리 계산"""
+    st.session_state.action_suggestions = suggestions
+    st.session_state.suggestion_source = source
+    st.session_state.suggestions_generated = True
     
+    # 플레이어가 고르는 동안 모든 제안의 판정을 미리 계산
+    precompute_ability_checks(suggestions)
+
+def apply_ai_suggestions(ai_suggestions: List[str]) -> bool:
+    """
+    표시 중인 로컬 제안을 AI 제안으로 교체 (AI 제안에 빠진 태그는 로컬 제안으로 채움)
+    
+    Returns:
+        bool: 표시할 제안이 바뀌었으면 True
+    """
+    local_suggestions = st.session_state.get('local_action_suggestions', [])
+    merged = merge_action_suggestions(ai_suggestions, local_suggestions, LOCAL_ACTION_SETTINGS["count"])
+    if merged == st.session_state.get('action_suggestions'):
+        # 쓸 수 있는 AI 제안이 없으면 로컬 제안을 그대로 사용
+        st.session_state.suggestion_source = 'local_final'
+        return False
+    
+    show_action_suggestions(merged, 'ai')
+    return True
+
+def expire_ai_suggestions() -> bool:
+    """
+    로컬 제안을 보여준 채 AI 제안을 기다린 시간이 ai_wait를 넘으면 작업을 버리고 로컬 제안으로 확정
+    
+    Returns:
+        bool: 아직 AI 제안을 기다리는 중이면 True
+    """
+    prefetch = st.session_state.get('suggestion_prefetch')
+    if st.session_state.get('suggestion_source') != 'local' or not prefetch:
+        return False
+    if time.monotonic() - prefetch['started'] < LOCAL_ACTION_SETTINGS["ai_wait"]:
+        return True
+    
+    prefetch['future'].cancel()
+    del st.session_state.suggestion_prefetch
+    st.session_state.suggestion_source = 'local_final'
+    return False
+
+def watch_ai_suggestions():
+    """
+    AI 제안이 도착하면 화면을 다시 그려 교체 (스크립트를 막고 기다리지 않음)
+    
+    st.fragment를 지원하는 Streamlit이면 이 부분만 poll_interval마다 다시 실행해서 확인하고,
+    지원하지 않으면 다음 재실행(플레이어 조작) 때 확인합니다.
+    """
+    fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if fragment is None:
+        st.caption("✨ 마스터가 상황에 맞는 행동을 더 떠올리는 중...")
+        return
+    
+    @fragment(run_every=LOCAL_ACTION_SETTINGS["poll_interval"])
+    def check_ai_suggestions():
+        ai_suggestions = poll_prefetched_suggestions()
+        if ai_suggestions is not None:
+            apply_ai_suggestions(ai_suggestions)
+        # 제안이 바뀌었거나 기다리기를 끝냈으면 전체 화면을 다시 그림 (이 부분도 더 이상 실행되지 않음)
+        if not expire_ai_suggestions():
+            st.rerun()
+        st.caption("✨ 마스터가 상황에 맞는 행동을 더 떠올리는 중...")
+    
+    check_ai_suggestions()
+
 def handle_action_suggestions():
     """행동 제안 및 선택 처리"""
     st.subheader("행동 선택")
     
     # 위치 이동 옵션
     if 'available_locations' in st.session_state and len(st.session_state.available_locations) > 1:
+        # 이 위치에서 나가는 경로의 이동 스토리를 미리 준비 (위치마다 한 번)
+        if st.session_state.get('movement_prefetch_location') != st.session_state.current_location:
+            st.session_state.movement_prefetch_location = st.session_state.current_location
+            prefetch_movement_stories(
+                st.session_state.current_location,
+                st.session_state.theme,
+                st.session_state.world_description
+            )
+        
         with st.expander("다른 장소로 이동", expanded=False):
             st.write("이동할 장소를 선택하세요:")
             
@@ -479,13 +756,20 @@ def handle_action_suggestions():
             location_cols = st.columns(2)
             for i, location in enumerate(other_locations):
                 with location_cols[i % 2]:
-                    if st.button(f"{location}로 이동", key=f"move_to_{i}", use_container_width=True):
+                    route_info = describe_route_info(st.session_state.current_location, location, st.session_state.theme)
+                    if st.button(f"{location}로 이동", key=f"move_to_{i}", help=route_info or None, use_container_width=True):
                         st.session_state.move_destination = location
                         st.session_state.action_phase = 'moving'
                         st.rerun()
     
     # 행동 제안 표시
     if st.session_state.get('suggestions_generated', False):
+        # 로컬 제안을 보여주는 중에 AI 제안이 도착했으면 바로 교체
+        if st.session_state.get('suggestion_source') == 'local':
+            ai_suggestions = poll_prefetched_suggestions()
+            if ai_suggestions is not None:
+                apply_ai_suggestions(ai_suggestions)
+        
         # 행동 제안 표시 (간소화된 방식)
         st.write("### 제안된 행동")
         for i, action in enumerate(st.session_state.action_suggestions):
@@ -513,6 +797,12 @@ def handle_action_suggestions():
                         del st.session_state.dice_result
                     if 'suggested_ability' in st.session_state:
                         del st.session_state.suggested_ability
+                    
+                    # 미리 계산된 판정이 있으면 바로 주사위 굴림으로 진행
+                    precomputed = get_precomputed_ability(action)
+                    if precomputed:
+                        st.session_state.suggested_ability = precomputed
+                        start_outcome_enrichment(precomputed)
                     st.rerun()
         
         # 직접 행동 입력 옵션
@@ -530,32 +820,98 @@ def handle_action_suggestions():
             if 'suggested_ability' in st.session_state:
                 del st.session_state.suggested_ability
             st.rerun()
+        
+        # AI 제안이 도착하면 교체 (기다리는 동안에도 위의 로컬 제안을 바로 선택할 수 있음)
+        if expire_ai_suggestions():
+            watch_ai_suggestions()
     
     # 행동 제안 생성
     else:
-        with st.spinner("마스터가 행동을 제안 중..."):
-            # 로딩 표시
-            loading_placeholder = st.empty()
-            loading_placeholder.info("마스터가 행동을 제안하는 중... 잠시만 기다려주세요.")
-            
-            if st.session_state.story_log:
-                last_entry = st.session_state.story_log[-1]
-            else:
-                last_entry = "모험의 시작"
-            
-            st.session_state.action_suggestions = generate_action_suggestions(
+        # 미리 생성된 AI 제안이 이미 있으면 사용
+        ai_suggestions = poll_prefetched_suggestions()
+        if ai_suggestions:
+            show_action_suggestions(ai_suggestions, 'ai')
+        else:
+            # 템플릿으로 만든 로컬 제안을 바로 보여주고 AI 제안은 백그라운드에서 받아 교체
+            local_suggestions = generate_local_action_suggestions(
                 st.session_state.current_location,
                 st.session_state.theme,
-                last_entry,
-                st.session_state.character
+                get_last_story_entry(),
+                st.session_state.character,
+                LOCAL_ACTION_SETTINGS["count"]
             )
-            st.session_state.suggestions_generated = True
-            
-            # 로딩 메시지 제거
-            loading_placeholder.empty()
+            st.session_state.local_action_suggestions = local_suggestions
+            show_action_suggestions(local_suggestions, 'local' if ai_suggestions is None else 'local_final')
+            if ai_suggestions is None:
+                # 플레이어가 보고 있으므로 미리 생성보다 높은 우선순위로 요청
+                prefetch_action_suggestions(priority=None)
         
         st.rerun()
 
+def handle_story_progression(action: str, dice_result: int, success: bool, ability: str, difficulty: int):
+    """판정 결과에 따라 스토리를 진행하고 아이템 변화를 반영"""
+    previous_story = st.session_state.story_log[-1] if st.session_state.story_log else ""
+    character = st.session_state.character
+    story_args = (
+        action,
+        dice_result,
+        success,
+        ability,
+        difficulty,
+        st.session_state.theme,
+        st.session_state.current_location,
+        character,
+        previous_story
+    )
+    
+    # 스토리, 아이템 변화, 다음 행동 제안을 한 번의 호출로 생성하면서 도착한 스토리부터 표시
+    story_placeholder = st.empty()
+    turn = None
+    for narrative, turn in stream_turn(*story_args):
+        if narrative:
+            story_placeholder.markdown(f"<div class='story-text'>{format_story_html(narrative)}</div>", unsafe_allow_html=True)
+    
+    if turn:
+        story = turn['narrative']
+        gained_items, used_items = turn['gained_items'], turn['used_items']
+    else:
+        # 응답을 해석할 수 없을 때만 단계별 호출로 대체
+        story = render_streaming_story(story_placeholder, stream_story_response(*story_args))
+        
+        with st.spinner("아이템 변화를 확인하는 중..."):
+            gained_items, used_items = extract_item_changes_from_story(story, character['inventory'])
+    
+    notifications = []
+    for item in gained_items:
+        notifications.append(update_inventory("add", item, character['inventory']))
+    for item_data in used_items:
+        notifications.append(update_inventory("use", item_data, character['inventory']))
+    
+    if notifications:
+        st.session_state.item_notification = "<br>".join(notifications)
+        st.session_state.show_item_notification = True
+    
+    # 완성된 스토리만 로그에 추가
+    st.session_state.story_log.append(story)
+    
+    # 다음 행동 선택 단계로 초기화
+    st.session_state.action_phase = 'suggestions'
+    st.session_state.suggestions_generated = False
+    st.session_state.dice_rolled = False
+    if 'dice_result' in st.session_state:
+        del st.session_state.dice_result
+    if 'suggested_ability' in st.session_state:
+        del st.session_state.suggested_ability
+    
+    if turn:
+        # 통합 응답에 포함된 다음 행동 제안을 바로 사용
+        show_action_suggestions(turn['next_actions'], 'ai')
+    else:
+        # 플레이어가 스토리를 읽는 동안 다음 행동 제안 미리 생성
+        prefetch_action_suggestions()
+    
+    st.rerun()
+
 def display_game_tools():
     """게임 도구 및 옵션 UI 표시"""
     # 게임 정보 및 도구
@@ -617,13 +973,13 @@ def display_game_tools():
         dice_result_placeholder = st.empty()
         
         if d6:
-            result = random.randint(1, 6)
+            result = roll_dice(6)[0]
             dice_result_placeholder.markdown(f"<div class='dice-result'>🎲 {result}</div>", unsafe_allow_html=True)
         elif d20:
-            result = random.randint(1, 20)
+            result = roll_dice(20)[0]
             dice_result_placeholder.markdown(f"<div class='dice-result'>🎲 {result}</div>", unsafe_allow_html=True)
         elif roll_custom:
-            result = random.randint(1, custom_dice)
+            result = roll_dice(custom_dice)[0]
             dice_result_placeholder.markdown(f"<div class='dice-result'>🎲 {result}</div>", unsafe_allow_html=True)
     
     # 게임 관리 기능
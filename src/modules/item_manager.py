@@ -2,10 +2,11 @@
 아이템 생성, 관리, 사용 관련 기능을 제공하는 모듈
 """
 import re
-import json
 import streamlit as st
 from config.constants import ITEM_TYPES, ITEM_RARITY
-from modules.ai_service import generate_gemini_text
+from config.schemas import ITEM_LIST_SCHEMA, USED_ITEM_LIST_SCHEMA
+from modules.ai_service import generate_gemini_text, run_prompts_concurrently
+from utils.json_parser import parse_json_response
 
 class Item:
     """게임 내 아이템 기본 클래스"""
@@ -190,20 +191,17 @@ def display_inventory(inventory):
                 except Exception as e:
                     st.markdown(f"📦 {str(item)} (표시 오류: {str(e)})")
 
-def extract_items_from_story(story_text):
+def build_item_extraction_prompt(story_text):
     """
-    스토리 텍스트에서 획득한 아이템을 자동 추출
+    획득 아이템 추출 프롬프트 생성
     
     Args:
         story_text (str): 스토리 텍스트
         
     Returns:
-        list: 추출된 아이템 목록
+        str: 프롬프트
     """
-    # 굵게 표시된 텍스트를 우선 추출 (** 사이의 내용)
-    bold_items = re.findall(r'\*\*(.*?)\*\*', story_text)
-    
-    prompt = f"""
+    return f"""
     다음 TRPG 스토리 텍스트를 분석하여 플레이어가 획득했거나 발견한 모든 아이템을 추출해주세요.
     일반적인 배경 요소가 아닌, 플레이어가 실제로 소지하거나 사용할 수 있는 아이템만 추출하세요.
     특히 굵게 표시된 아이템(**, ** 사이의 텍스트)에 주목하세요.
@@ -226,81 +224,19 @@ def extract_items_from_story(story_text):
     
     아이템이 없으면 빈 배열 []을 반환하세요.
     """
-    
-    try:
-        response = generate_gemini_text(prompt, 300)
-        
-        # 응답에서 JSON 구조 추출 시도
-        try:
-            # 응답 텍스트에서 JSON 부분만 추출 시도
-            json_match = re.search(r'\[\s*\{.*\}\s*\]', response, re.DOTALL)
-            if json_match:
-                items_data = json.loads(json_match.group(0))
-            else:
-                # 전체 응답을 JSON으로 파싱 시도
-                items_data = json.loads(response)
-        except:
-            # JSON 파싱 실패 시 기본 아이템 생성
-            items_data = []
-            for item_name in bold_items:
-                items_data.append({
-                    "name": item_name,
-                    "description": "발견한 아이템입니다.",
-                    "consumable": False,
-                    "durability": None,
-                    "quantity": 1,
-                    "type": "일반"
-                })
-        
-        # Item 객체 목록 생성
-        items = []
-        for item_data in items_data:
-            items.append(Item.from_dict(item_data))
-        
-        # 굵게 표시된 아이템이 있지만 JSON에 포함되지 않은 경우 추가
-        existing_names = [item.name for item in items]
-        for bold_item in bold_items:
-            if bold_item not in existing_names:
-                items.append(Item(
-                    name=bold_item,
-                    description="발견한 아이템입니다.",
-                    consumable=False,
-                    quantity=1
-                ))
-        
-        return items
-    
-    except Exception as e:
-        st.error(f"아이템 추출 오류: {e}")
-        # 오류 시 기본 아이템 생성
-        items = []
-        for item_name in bold_items:
-            items.append(Item(
-                name=item_name,
-                description="발견한 아이템입니다.",
-                consumable=False,
-                quantity=1
-            ))
-        return items
 
-def extract_used_items_from_story(story_text, inventory):
+def build_used_item_extraction_prompt(story_text, inventory_names):
     """
-    스토리 텍스트에서 사용한 아이템 추출
+    사용 아이템 추출 프롬프트 생성
     
     Args:
         story_text (str): 스토리 텍스트
-        inventory (list): 현재 인벤토리
+        inventory_names (list): 인벤토리 아이템 이름 목록
         
     Returns:
-        list: 사용된 아이템 데이터
+        str: 프롬프트
     """
-    # 인벤토리 아이템 이름 목록 생성
-    inventory_names = [item.name if hasattr(item, 'name') else str(item) for item in inventory]
-    
-    # 굵게 표시된 텍스트를 우선 추출 (** 사이의 내용)
-    bold_items = re.findall(r'\*\*(.*?)\*\*', story_text)
-    
-    prompt = f"""
+    return f"""
     다음 TRPG 스토리 텍스트를 분석하여 플레이어가 사용한 아이템을 추출해주세요.
     특히 굵게 표시된 아이템(**, ** 사이의 텍스트)에 주목하세요.
     
@@ -320,57 +256,203 @@ def extract_used_items_from_story(story_text, inventory):
     
     아무 아이템도 사용하지 않았다면 빈 배열 []을 반환하세요.
     """
+
+def get_inventory_names(inventory):
+    """인벤토리 아이템 이름 목록 생성"""
+    return [item.name if hasattr(item, 'name') else str(item) for item in inventory]
+
+def fallback_gained_items(bold_items):
+    """AI 응답을 사용할 수 없을 때 굵게 표시된 텍스트로 획득 아이템 생성"""
+    items = []
+    for item_name in bold_items:
+        items.append(Item(
+            name=item_name,
+            description="발견한 아이템입니다.",
+            consumable=False,
+            quantity=1
+        ))
+    return items
+
+def fallback_used_items(bold_items, inventory_names):
+    """AI 응답을 사용할 수 없을 때 굵게 표시된 텍스트로 사용 아이템 데이터 생성"""
+    used_items_data = []
+    for item_name in bold_items:
+        if item_name in inventory_names:
+            used_items_data.append({
+                "name": item_name,
+                "quantity": 1
+            })
+    return used_items_data
+
+def parse_gained_items(response, bold_items):
+    """
+    획득 아이템 추출 응답을 Item 객체 목록으로 변환
     
-    try:
-        response = generate_gemini_text(prompt, 200)
+    Args:
+        response (str): AI 응답 텍스트
+        bold_items (list): 스토리에서 굵게 표시된 텍스트 목록
         
-        # 응답에서 JSON 구조 추출 시도
-        try:
-            # 응답 텍스트에서 JSON 부분만 추출 시도
-            json_match = re.search(r'\[\s*\{.*\}\s*\]', response, re.DOTALL)
-            if json_match:
-                used_items_data = json.loads(json_match.group(0))
-            else:
-                # 전체 응답을 JSON으로 파싱 시도
-                used_items_data = json.loads(response)
-        except:
-            # JSON 파싱 실패 시 기본 데이터 생성
-            used_items_data = []
-            for item_name in bold_items:
-                if item_name in inventory_names:
-                    used_items_data.append({
-                        "name": item_name,
-                        "quantity": 1
-                    })
+    Returns:
+        list: 추출된 아이템 목록
+    """
+    # 응답에서 JSON 구조 추출 및 스키마 검증
+    try:
+        items_data = parse_json_response(response, ITEM_LIST_SCHEMA)
+    except ValueError:
+        # JSON 파싱 실패 시 기본 아이템 생성
+        items_data = [item.to_dict() for item in fallback_gained_items(bold_items)]
+    
+    # Item 객체 목록 생성
+    items = []
+    for item_data in items_data:
+        items.append(Item.from_dict(item_data))
+    
+    # 굵게 표시된 아이템이 있지만 JSON에 포함되지 않은 경우 추가
+    existing_names = [item.name for item in items]
+    for bold_item in bold_items:
+        if bold_item not in existing_names:
+            items.append(Item(
+                name=bold_item,
+                description="발견한 아이템입니다.",
+                consumable=False,
+                quantity=1
+            ))
+    
+    return items
+
+def parse_used_items(response, bold_items, inventory_names):
+    """
+    사용 아이템 추출 응답을 인벤토리에 있는 아이템 데이터로 변환
+    
+    Args:
+        response (str): AI 응답 텍스트
+        bold_items (list): 스토리에서 굵게 표시된 텍스트 목록
+        inventory_names (list): 인벤토리 아이템 이름 목록
         
-        # 사용된 아이템 데이터 필터링 (인벤토리에 있는 아이템만)
-        filtered_items_data = []
-        for item_data in used_items_data:
-            if item_data["name"] in inventory_names:
-                filtered_items_data.append(item_data)
+    Returns:
+        list: 사용된 아이템 데이터
+    """
+    # 응답에서 JSON 구조 추출 및 스키마 검증
+    try:
+        used_items_data = parse_json_response(response, USED_ITEM_LIST_SCHEMA)
+    except ValueError:
+        # JSON 파싱 실패 시 기본 데이터 생성
+        used_items_data = fallback_used_items(bold_items, inventory_names)
+    
+    # 사용된 아이템 데이터 필터링 (인벤토리에 있는 아이템만)
+    filtered_items_data = []
+    for item_data in used_items_data:
+        if item_data["name"] in inventory_names:
+            filtered_items_data.append(item_data)
+    
+    # 굵게 표시된 아이템이 있지만 JSON에 포함되지 않은 경우 추가
+    existing_names = [item["name"] for item in filtered_items_data]
+    for bold_item in bold_items:
+        if bold_item in inventory_names and bold_item not in existing_names:
+            filtered_items_data.append({
+                "name": bold_item,
+                "quantity": 1
+            })
+    
+    return filtered_items_data
+
+def extract_items_from_story(story_text):
+    """
+    스토리 텍스트에서 획득한 아이템을 자동 추출
+    
+    Args:
+        story_text (str): 스토리 텍스트
         
-        # 굵게 표시된 아이템이 있지만 JSON에 포함되지 않은 경우 추가
-        existing_names = [item["name"] for item in filtered_items_data]
-        for bold_item in bold_items:
-            if bold_item in inventory_names and bold_item not in existing_names:
-                filtered_items_data.append({
-                    "name": bold_item,
-                    "quantity": 1
-                })
+    Returns:
+        list: 추출된 아이템 목록
+    """
+    # 굵게 표시된 텍스트를 우선 추출 (** 사이의 내용)
+    bold_items = re.findall(r'\*\*(.*?)\*\*', story_text)
+    
+    try:
+        response = generate_gemini_text(build_item_extraction_prompt(story_text), 300, call_site="extract_items", response_schema=ITEM_LIST_SCHEMA)
+        return parse_gained_items(response, bold_items)
+    
+    except Exception as e:
+        st.error(f"아이템 추출 오류: {e}")
+        # 오류 시 기본 아이템 생성
+        return fallback_gained_items(bold_items)
+
+def extract_used_items_from_story(story_text, inventory):
+    """
+    스토리 텍스트에서 사용한 아이템 추출
+    
+    Args:
+        story_text (str): 스토리 텍스트
+        inventory (list): 현재 인벤토리
         
-        return filtered_items_data
+    Returns:
+        list: 사용된 아이템 데이터
+    """
+    # 인벤토리 아이템 이름 목록 생성
+    inventory_names = get_inventory_names(inventory)
+    
+    # 굵게 표시된 텍스트를 우선 추출 (** 사이의 내용)
+    bold_items = re.findall(r'\*\*(.*?)\*\*', story_text)
+    
+    try:
+        prompt = build_used_item_extraction_prompt(story_text, inventory_names)
+        response = generate_gemini_text(prompt, 200, call_site="extract_used_items", response_schema=USED_ITEM_LIST_SCHEMA)
+        return parse_used_items(response, bold_items, inventory_names)
     
     except Exception as e:
         st.error(f"사용된 아이템 추출 오류: {e}")
         # 오류 시 기본 데이터 생성
-        used_items_data = []
-        for item_name in bold_items:
-            if item_name in inventory_names:
-                used_items_data.append({
-                    "name": item_name,
-                    "quantity": 1
-                })
-        return used_items_data
+        return fallback_used_items(bold_items, inventory_names)
+
+def extract_item_changes_from_story(story_text, inventory):
+    """
+    획득 아이템과 사용 아이템 추출을 동시에 실행
+    
+    두 추출 호출은 서로 독립적이므로 순차 실행 대신 병렬로 요청합니다.
+    
+    Args:
+        story_text (str): 스토리 텍스트
+        inventory (list): 현재 인벤토리
+        
+    Returns:
+        tuple: (획득한 아이템 목록, 사용된 아이템 데이터)
+    """
+    inventory_names = get_inventory_names(inventory)
+    bold_items = re.findall(r'\*\*(.*?)\*\*', story_text)
+    
+    try:
+        gained_response, used_response = run_prompts_concurrently([
+            {
+                "prompt": build_item_extraction_prompt(story_text),
+                "max_tokens": 300,
+                "call_site": "extract_items",
+                "response_schema": ITEM_LIST_SCHEMA
+            },
+            {
+                "prompt": build_used_item_extraction_prompt(story_text, inventory_names),
+                "max_tokens": 200,
+                "call_site": "extract_used_items",
+                "response_schema": USED_ITEM_LIST_SCHEMA
+            }
+        ])
+    except Exception as e:
+        st.error(f"아이템 추출 오류: {e}")
+        return fallback_gained_items(bold_items), fallback_used_items(bold_items, inventory_names)
+    
+    try:
+        gained_items = parse_gained_items(gained_response, bold_items)
+    except Exception as e:
+        st.error(f"아이템 추출 오류: {e}")
+        gained_items = fallback_gained_items(bold_items)
+    
+    try:
+        used_items = parse_used_items(used_response, bold_items, inventory_names)
+    except Exception as e:
+        st.error(f"사용된 아이템 추출 오류: {e}")
+        used_items = fallback_used_items(bold_items, inventory_names)
+    
+    return gained_items, used_items
 
 def update_inventory(action, item_data, inventory):
     """
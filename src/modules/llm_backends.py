@@ -0,0 +1,356 @@
+"""
+LLM 백엔드 모듈
+
+ai_service의 호출 경로(캐시, 속도 제한, 회로 차단기, 재시도)는 그대로 두고
+실제 텍스트를 만드는 백엔드만 설정으로 바꿀 수 있도록 공통 인터페이스를 정의합니다.
+모든 백엔드는 google.generativeai 모델과 같은 generate_content 인터페이스를 제공합니다.
+"""
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+from ..config.constants import (
+    CASSETTE_LATENCY_SCALE_ENV_VAR,
+    CASSETTE_PATH_ENV_VAR,
+    CASSETTE_SETTINGS,
+    LLM_BACKEND,
+    LLM_BACKEND_ENV_VAR,
+    LOCAL_MODEL_ENV_VAR,
+    LOCAL_MODEL_SETTINGS,
+    STUB_SERVER_URL,
+    STUB_SERVER_URL_ENV_VAR,
+    STUB_BACKEND_SETTINGS
+)
+from ..utils.cassette import Cassette, CassetteMiss
+from ..utils.stub_server import StubEngine, LatencyModel
+
+class BackendResponse:
+    """백엔드 응답 (google.generativeai 응답과 같은 text 속성 제공)"""
+    def __init__(self, text):
+        self.text = text
+
+class BackendError(Exception):
+    """백엔드 호출 실패"""
+    pass
+
+class LLMBackend:
+    """LLM 백엔드 기본 클래스"""
+    name = "base"
+    # True면 호출 순서를 그대로 기록/재생해야 하므로 응답 캐시 조회, 요청 합치기, 중복 호출을 건너뜀
+    preserve_call_sequence = False
+
+    def __init__(self, model_name):
+        self.model_name = model_name    # 응답 캐시 키에 포함되는 모델 이름
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        """
+        텍스트 생성
+
+        Args:
+            prompt (str): 프롬프트
+            generation_config (dict): 생성 구성
+            safety_settings (list): 안전 설정 (지원하지 않는 백엔드는 무시)
+            stream (bool): 스트리밍 여부
+
+        Returns:
+            BackendResponse 또는 stream=True이면 BackendResponse 조각 이터레이터
+        """
+        raise NotImplementedError
+
+    def max_tokens(self, generation_config):
+        """생성 구성에서 최대 토큰 수 조회"""
+        return (generation_config or {}).get("max_output_tokens", 500)
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai 모델을 감싼 백엔드"""
+    name = "gemini"
+
+    def __init__(self, model):
+        super().__init__(getattr(model, "model_name", "gemini"))
+        self.model = model
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        return self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+            stream=stream
+        )
+
+class StubBackend(LLMBackend):
+    """프로세스 안에서 결정적 가짜 응답을 만드는 스텁 백엔드 (부하/지연 테스트용)"""
+    name = "stub"
+
+    def __init__(self, engine):
+        super().__init__(f"stub-{engine.generator.seed}")
+        self.engine = engine
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        max_tokens = self.max_tokens(generation_config)
+        if stream:
+            return (BackendResponse(chunk) for chunk in self.engine.stream(prompt, max_tokens))
+        return BackendResponse(self.engine.generate(prompt, max_tokens))
+
+class HTTPBackend(LLMBackend):
+    """HTTP 스텁 서버(utils.stub_server) 등 같은 프로토콜을 쓰는 서버에 요청하는 백엔드"""
+    name = "http"
+
+    def __init__(self, base_url, request_timeout=120):
+        super().__init__(f"http-{base_url}")
+        self.base_url = base_url.rstrip("/")
+        self.request_timeout = request_timeout
+
+    def _post(self, payload):
+        request = urllib.request.Request(
+            f"{self.base_url}/generate",
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.request_timeout)
+        except urllib.error.HTTPError as e:
+            # 상태 코드와 서버 메시지를 그대로 전달해서 오류 분류에 사용
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", "")
+            except ValueError:
+                message = ""
+            raise BackendError(f"{e.code} {message or e.reason}")
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        payload = {"prompt": prompt, "max_tokens": self.max_tokens(generation_config), "stream": stream}
+        response = self._post(payload)
+
+        if not stream:
+            with response:
+                return BackendResponse(json.loads(response.read().decode("utf-8"))["text"])
+
+        def iter_chunks():
+            with response:
+                for line in response:
+                    if line.strip():
+                        yield BackendResponse(json.loads(line.decode("utf-8"))["text"])
+
+        return iter_chunks()
+
+class LocalModelBackend(LLMBackend):
+    """CPU에서 로컬 인과 언어 모델을 직접 실행하는 백엔드 (modules.local_model)"""
+    name = "local"
+
+    def __init__(self, engine, scheduler):
+        super().__init__(f"local-{engine.model_name}")
+        self.engine = engine
+        self.scheduler = scheduler      # 여러 세션의 요청을 모아 배치로 생성하는 스케줄러
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        config = generation_config or {}
+        request = self.scheduler.submit(
+            prompt,
+            max_new_tokens=self.max_tokens(config),
+            temperature=config.get("temperature", 0.7),
+            top_p=config.get("top_p", 0.95),
+            top_k=config.get("top_k", 40),
+            stop_sequences=config.get("stop_sequences")
+        )
+        if stream:
+            return (BackendResponse(chunk) for chunk in request.iter_chunks())
+        return BackendResponse(request.future.result())
+
+class RecordingBackend(LLMBackend):
+    """다른 백엔드의 호출과 응답(지연 시간 포함)을 카세트에 기록하는 백엔드"""
+    name = "record"
+    preserve_call_sequence = True
+
+    def __init__(self, backend, cassette):
+        super().__init__(backend.model_name)
+        self.backend = backend
+        self.cassette = cassette
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        start = time.monotonic()
+        try:
+            response = self.backend.generate_content(
+                prompt,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                stream=stream
+            )
+            if not stream:
+                text = response.text
+        except Exception as e:
+            self.cassette.record(prompt, generation_config, time.monotonic() - start, error=f"{type(e).__name__}: {e}", model_name=self.model_name)
+            raise
+
+        if not stream:
+            self.cassette.record(prompt, generation_config, time.monotonic() - start, text=text, model_name=self.model_name)
+            return response
+        return self._record_stream(prompt, generation_config, response, start)
+
+    def _record_stream(self, prompt, generation_config, response, start):
+        """받은 조각을 그대로 넘기면서 도착 시각을 모아 두었다가 스트림이 끝나면 기록"""
+        chunks = []
+        error = None
+        try:
+            for chunk in response:
+                chunks.append((time.monotonic() - start, chunk.text))
+                yield chunk
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            # 받는 쪽이 토큰 예산으로 중간에 멈춰도 받은 조각까지 기록
+            self.cassette.record(prompt, generation_config, time.monotonic() - start, chunks=chunks, error=error, model_name=self.model_name)
+
+class ReplayBackend(LLMBackend):
+    """카세트에 기록된 응답을 기록된(또는 배율을 적용한) 지연 시간으로 재생하는 백엔드"""
+    name = "replay"
+    preserve_call_sequence = True
+
+    def __init__(self, cassette, latency_scale=1.0):
+        super().__init__(f"replay-{os.path.basename(cassette.path)}")
+        self.cassette = cassette
+        self.latency_scale = latency_scale  # 기록된 지연 시간 배율 (0이면 지연 없이 재생)
+
+    def _entry(self, prompt, generation_config):
+        try:
+            return self.cassette.next_entry(prompt, generation_config)
+        except CassetteMiss as e:
+            raise BackendError(str(e))
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        entry = self._entry(prompt, generation_config)
+        error = entry.get("error")
+        if not stream or not entry["stream"]:
+            time.sleep(entry["latency"] * self.latency_scale)
+            if error is not None:
+                raise BackendError(error)
+
+        text = entry.get("text")
+        if entry["stream"]:
+            chunks = entry["chunks"]
+            text = "".join(chunk for _, chunk in chunks)
+        else:
+            chunks = [[0.0, text]]
+
+        if not stream:
+            return BackendResponse(text)
+        return self._replay_stream(chunks, error)
+
+    def _replay_stream(self, chunks, error=None):
+        """조각을 기록된 도착 시각에 맞춰 내보내고, 도중에 실패한 기록이면 같은 지점에서 예외 발생"""
+        start = time.monotonic()
+        for offset, chunk in chunks:
+            delay = offset * self.latency_scale - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+            yield BackendResponse(chunk)
+        if error is not None:
+            raise BackendError(error)
+
+def get_backend_name(secrets=None):
+    """
+    사용할 LLM 백엔드 이름 결정
+
+    환경 변수, Streamlit secrets, 상수 설정 순서로 확인합니다.
+
+    Args:
+        secrets (Mapping): Streamlit secrets (없으면 None)
+
+    Returns:
+        str: 백엔드 이름 (gemini, stub, http, local, replay)
+    """
+    name = os.environ.get(LLM_BACKEND_ENV_VAR)
+    if not name and secrets is not None:
+        try:
+            name = secrets.get("LLM_BACKEND")
+        except Exception:
+            name = None
+    return (name or LLM_BACKEND).strip().lower()
+
+def create_stub_engine(settings=None):
+    """
+    설정으로 스텁 엔진 생성
+
+    Args:
+        settings (dict): STUB_BACKEND_SETTINGS 형식 설정
+
+    Returns:
+        StubEngine: 스텁 엔진
+    """
+    settings = dict(STUB_BACKEND_SETTINGS, **(settings or {}))
+    latency = settings["latency"]
+    return StubEngine(
+        seed=settings["seed"],
+        latency=LatencyModel(
+            latency["distribution"],
+            latency["median"],
+            latency["sigma"],
+            chunk_delay=latency["chunk_delay"]
+        ),
+        error_rate=settings["error_rate"],
+        error_weights=settings["error_weights"],
+        timeout_hang=settings["timeout_hang"]
+    )
+
+def create_local_engine(settings=None):
+    """
+    설정으로 로컬 모델 엔진을 생성하고 불러와 예열
+
+    Args:
+        settings (dict): LOCAL_MODEL_SETTINGS 형식 설정
+
+    Returns:
+        LocalModelEngine: 불러온 로컬 모델 엔진
+
+    Raises:
+        RuntimeError: torch/transformers가 설치되지 않은 경우
+    """
+    # torch 로딩이 느리므로 로컬 백엔드를 쓸 때만 가져옴
+    from .local_model import LocalModelEngine, PrefixCache
+
+    settings = dict(LOCAL_MODEL_SETTINGS, **(settings or {}))
+    prefix_cache = settings["prefix_cache"]
+    engine = LocalModelEngine(
+        model_name=os.environ.get(LOCAL_MODEL_ENV_VAR, settings["model"]),
+        num_threads=settings["num_threads"],
+        quantize=settings["quantize"],
+        max_input_tokens=settings["max_input_tokens"],
+        seed=settings["seed"],
+        prefix_cache=PrefixCache(prefix_cache["max_bytes"], prefix_cache["min_tokens"], prefix_cache["history_size"]) if prefix_cache else None
+    ).load()
+    if settings["warmup"]:
+        engine.warmup()
+    return engine
+
+def create_backend(name):
+    """
+    Gemini 외의 백엔드 생성 (Gemini는 API 키 설정이 필요해 ai_service.setup_gemini에서 생성)
+
+    Args:
+        name (str): 백엔드 이름
+
+    Returns:
+        LLMBackend: 백엔드 인스턴스
+
+    Raises:
+        ValueError: 알 수 없는 백엔드 이름
+        RuntimeError: 로컬 모델에 필요한 패키지가 없는 경우
+    """
+    if name == "stub":
+        return StubBackend(create_stub_engine())
+    if name == "http":
+        return HTTPBackend(os.environ.get(STUB_SERVER_URL_ENV_VAR, STUB_SERVER_URL))
+    if name == "local":
+        from .local_model import BatchScheduler
+
+        batching = LOCAL_MODEL_SETTINGS["batching"]
+        engine = create_local_engine()
+        return LocalModelBackend(engine, BatchScheduler(engine, batching["max_batch_size"], batching["max_wait"]))
+    if name == "replay":
+        path = os.environ.get(CASSETTE_PATH_ENV_VAR, CASSETTE_SETTINGS["path"])
+        if not os.path.exists(path):
+            raise ValueError(f"카세트 파일이 없습니다: {path}")
+        latency_scale = float(os.environ.get(CASSETTE_LATENCY_SCALE_ENV_VAR, CASSETTE_SETTINGS["latency_scale"]))
+        return ReplayBackend(Cassette(path), latency_scale)
+    raise ValueError(f"알 수 없는 LLM 백엔드: {name}")
@@ -0,0 +1,662 @@
+"""
+로컬 언어 모델 생성 엔진 모듈
+
+API 없이 CPU에서 transformers 인과 언어 모델로 텍스트를 생성합니다.
+모델은 프로세스당 한 번만 불러와 예열한 상태로 유지하며, int8 동적 양자화와
+스레드 수 조절을 지원합니다. 다운로드 없이 시험할 수 있도록 무작위로 초기화한
+아주 작은 모델 구성(tiny)도 제공합니다.
+
+여러 세션의 요청은 BatchScheduler가 짧은 시간 동안 모아 한 번의 배치 생성으로
+처리하고, 생성되는 토큰은 요청별로 나누어 바로 스트리밍합니다.
+여러 프롬프트가 공유하는 앞부분(게임 마스터 지시문, 세션별 게임 정보)의 key/value는
+PrefixCache에 보관해 매 턴 새로 바뀐 뒷부분만 계산합니다.
+
+실행 예:
+    python -m src.modules.local_model --tiny --prompt "당신은 TRPG 게임 마스터입니다."
+    python -m src.modules.local_model --tiny --concurrency 8
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer, GPT2Config, StoppingCriteria, StoppingCriteriaList
+except ImportError:
+    torch = None
+    StoppingCriteria = object
+
+class ByteTokenizer:
+    """UTF-8 바이트 단위 토크나이저 (tiny 모델용, 어휘 파일 없이 한국어 처리)"""
+    pad_token_id = 256
+    eos_token_id = 257
+    vocab_size = 258
+
+    def encode(self, text):
+        """텍스트를 바이트 토큰 ID 목록으로 변환"""
+        return list(text.encode("utf-8"))
+
+    def decode(self, token_ids, skip_special_tokens=True, **kwargs):
+        """
+        토큰 ID 목록을 텍스트로 변환
+
+        완성되지 않은 멀티바이트 문자는 버리므로 스트리밍 중에도 깨진 글자가 표시되지 않습니다.
+        """
+        if hasattr(token_ids, "tolist"):
+            token_ids = token_ids.tolist()
+        data = bytes(token_id for token_id in token_ids if token_id < 256)
+        return data.decode("utf-8", errors="ignore")
+
+def is_local_model_available():
+    """
+    torch와 transformers가 설치되어 있는지 확인
+
+    Returns:
+        bool: 로컬 모델 사용 가능 여부
+    """
+    return torch is not None
+
+def build_tiny_config(vocab_size=ByteTokenizer.vocab_size, max_positions=512):
+    """
+    다운로드 없이 쓸 수 있는 아주 작은 GPT-2 구성 생성
+
+    Args:
+        vocab_size (int): 어휘 크기
+        max_positions (int): 최대 입력 길이
+
+    Returns:
+        GPT2Config: 모델 구성
+    """
+    return GPT2Config(
+        vocab_size=vocab_size,
+        n_positions=max_positions,
+        n_embd=64,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=ByteTokenizer.eos_token_id,
+        eos_token_id=ByteTokenizer.eos_token_id,
+        pad_token_id=ByteTokenizer.pad_token_id
+    )
+
+def cut_at_stop_sequences(text, stop_sequences):
+    """
+    중단 문자열이 처음 나오는 위치 앞에서 텍스트를 자름
+
+    Args:
+        text (str): 생성된 텍스트
+        stop_sequences (list): 중단 문자열 목록
+
+    Returns:
+        str: 잘린 텍스트
+    """
+    positions = [text.find(stop) for stop in stop_sequences or [] if stop and stop in text]
+    return text[:min(positions)] if positions else text
+
+class GenerationRequest:
+    """생성 요청 하나의 입력, 진행 상태, 스트리밍 결과"""
+    def __init__(self, prompt, max_new_tokens=200, temperature=0.7, top_p=0.95, top_k=40, stop_sequences=None):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_p = top_p
+        self.top_k = top_k
+        self.stop_sequences = stop_sequences or []
+        self.input_ids = None               # 엔진이 채우는 프롬프트 토큰 ID
+        self.tokens = []                    # 생성된 토큰 ID
+        self.text = ""                      # 지금까지 내보낸 텍스트
+        self._pending = ""                  # 중단 문자열 확인 전까지 보류 중인 텍스트 포함 전체
+        self.done = False
+        self.future = Future()              # 최종 텍스트
+        self.chunks = queue.Queue()         # 스트리밍 조각 (None이면 종료)
+        self.submitted_at = time.monotonic()
+
+    def sampling_key(self):
+        """한 배치로 묶을 수 있는 샘플링 설정 (같은 값끼리만 함께 생성)"""
+        if not self.temperature or self.temperature <= 0:
+            return (False,)
+        return (True, self.temperature, self.top_p, self.top_k)
+
+    def push_token(self, token_id, tokenizer):
+        """
+        생성된 토큰을 추가하고 새로 완성된 텍스트를 스트리밍
+
+        Args:
+            token_id (int): 새 토큰 ID
+            tokenizer: 토큰 디코딩에 사용할 토크나이저
+        """
+        if self.done:
+            return
+        if token_id == tokenizer.eos_token_id:
+            self.complete()
+            return
+
+        self.tokens.append(token_id)
+        decoded = tokenizer.decode(self.tokens, skip_special_tokens=True)
+        # 바이트가 덜 모인 글자는 다음 토큰까지 기다림
+        if decoded.endswith("\ufffd"):
+            return
+        cut = cut_at_stop_sequences(decoded, self.stop_sequences)
+        self._pending = cut
+        if len(cut) < len(decoded) or len(self.tokens) >= self.max_new_tokens:
+            self.complete()
+            return
+
+        # 중단 문자열의 앞부분일 수 있는 끝부분은 다음 토큰까지 보류
+        hold = max([size for stop in self.stop_sequences for size in range(1, len(stop)) if cut.endswith(stop[:size])] or [0])
+        self._emit(cut[:len(cut) - hold])
+
+    def _emit(self, text):
+        if text.startswith(self.text) and len(text) > len(self.text):
+            self.chunks.put(text[len(self.text):])
+            self.text = text
+
+    def complete(self):
+        """생성 완료 처리 (보류한 텍스트까지 내보냄)"""
+        if self.done:
+            return
+        self._emit(self._pending)
+        self.done = True
+        self.chunks.put(None)
+        self.future.set_result(self.text)
+
+    def fail(self, error):
+        """생성 실패 처리"""
+        if self.done:
+            return
+        self.done = True
+        self.chunks.put(error)
+        self.future.set_exception(error)
+
+    def iter_chunks(self):
+        """
+        생성되는 텍스트 조각을 순서대로 반환
+
+        Yields:
+            str: 텍스트 조각
+        """
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+
+class _BatchStreamer:
+    """model.generate의 streamer 인터페이스로 매 단계 토큰을 요청별로 나누어 전달"""
+    def __init__(self, requests, tokenizer):
+        self.requests = requests
+        self.tokenizer = tokenizer
+        self._prompt_seen = False
+
+    def put(self, value):
+        # 첫 호출은 프롬프트 토큰이므로 건너뜀
+        if not self._prompt_seen:
+            self._prompt_seen = True
+            return
+        for request, token_id in zip(self.requests, value.tolist()):
+            request.push_token(token_id, self.tokenizer)
+
+    def end(self):
+        for request in self.requests:
+            request.complete()
+
+class _AllFinished(StoppingCriteria):
+    """배치의 모든 요청이 끝나면 생성 중단 (요청별 최대 토큰/중단 문자열 반영)"""
+    def __init__(self, requests):
+        self.requests = requests
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return all(request.done for request in self.requests)
+
+def common_prefix_length(a, b):
+    """
+    두 토큰 목록의 공통 앞부분 길이 계산
+
+    Args:
+        a (Sequence): 토큰 ID 목록
+        b (Sequence): 토큰 ID 목록
+
+    Returns:
+        int: 공통 앞부분 길이
+    """
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+class PrefixCache:
+    """여러 프롬프트가 공유하는 앞부분의 past key/value를 보관하는 LRU 캐시"""
+    def __init__(self, max_bytes=256 * 1024 * 1024, min_tokens=16, history_size=64):
+        self.max_bytes = max_bytes      # key/value 텐서가 차지할 수 있는 최대 메모리(바이트)
+        self.min_tokens = min_tokens    # 이보다 짧은 공통 앞부분은 보관/재사용하지 않음
+        self.history = deque(maxlen=history_size)  # 최근 프롬프트 토큰 (공유 앞부분 탐지용, key/value 없음)
+        self._entries = OrderedDict()   # 앞부분 토큰 튜플 -> 레이어별 (key, value) 텐서 (배치 크기 1)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "reused_tokens": 0, "stored": 0, "evictions": 0}
+
+    def lookup(self, input_ids):
+        """
+        프롬프트와 가장 길게 겹치는 앞부분의 key/value 조회
+
+        Args:
+            input_ids (list): 프롬프트 토큰 ID
+
+        Returns:
+            tuple: (레이어별 (key, value) 텐서 또는 None, 재사용할 토큰 수)
+        """
+        with self._lock:
+            best, best_length = None, 0
+            for tokens in self._entries:
+                length = common_prefix_length(tokens, input_ids)
+                if length > best_length:
+                    best, best_length = tokens, length
+
+            if best is None or best_length < self.min_tokens:
+                self._stats["misses"] += 1
+                return None, 0
+
+            self._entries.move_to_end(best)
+            self._stats["hits"] += 1
+            self._stats["reused_tokens"] += best_length
+            return self._entries[best], best_length
+
+    def observe(self, input_ids):
+        """
+        프롬프트를 기록하고 최근 프롬프트와 공유하는 앞부분 길이 반환
+
+        두 번 이상 나온 앞부분만 보관해서 한 번 쓰고 마는 프롬프트로 메모리를 채우지 않습니다.
+
+        Args:
+            input_ids (list): 프롬프트 토큰 ID
+
+        Returns:
+            int: 최근 프롬프트와 가장 길게 겹치는 앞부분 길이
+        """
+        with self._lock:
+            shared = max((common_prefix_length(tokens, input_ids) for tokens in self.history), default=0)
+            self.history.append(tuple(input_ids))
+        return shared
+
+    def store(self, tokens, past_key_values):
+        """
+        앞부분의 key/value 보관 (메모리 예산을 넘으면 오래 쓰지 않은 항목부터 제거)
+
+        Args:
+            tokens (Sequence): 앞부분 토큰 ID
+            past_key_values (tuple): 레이어별 (key, value) 텐서
+        """
+        tokens = tuple(tokens)
+        size = sum(tensor.element_size() * tensor.nelement() for layer in past_key_values for tensor in layer)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if tokens in self._entries:
+                self._entries.move_to_end(tokens)
+                return
+            self._entries[tokens] = past_key_values
+            self._bytes += size
+            self._stats["stored"] += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sum(tensor.element_size() * tensor.nelement() for layer in evicted for tensor in layer)
+                self._stats["evictions"] += 1
+
+    def get_stats(self):
+        """
+        앞부분 캐시 통계 반환
+
+        Returns:
+            dict: 적중/실패 수, 재사용한 토큰 수, 보관/제거 수, 항목 수, 사용 메모리
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+class LocalModelEngine:
+    """CPU에서 인과 언어 모델을 불러와 텍스트를 생성하는 엔진"""
+    def __init__(self, model_name="tiny", num_threads=None, quantize=True, max_input_tokens=1024, seed=0, prefix_cache=None):
+        self.model_name = model_name              # 모델 경로/이름 ("tiny"면 무작위 초기화 모델)
+        self.num_threads = num_threads            # torch 연산 스레드 수 (None이면 CPU 코어 수)
+        self.quantize = quantize                  # int8 동적 양자화 여부
+        self.max_input_tokens = max_input_tokens  # 프롬프트 최대 토큰 수 (넘으면 앞부분을 잘라냄)
+        self.seed = seed
+        self.prefix_cache = prefix_cache          # 공유 앞부분 key/value 캐시 (None이면 사용 안 함)
+        self.model = None
+        self.tokenizer = None
+        self.load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        모델과 토크나이저를 불러오고 CPU 추론용으로 설정
+
+        Raises:
+            RuntimeError: torch/transformers가 설치되지 않은 경우
+        """
+        if not is_local_model_available():
+            raise RuntimeError("로컬 모델을 사용하려면 torch와 transformers가 필요합니다")
+
+        start = time.perf_counter()
+        torch.set_num_threads(self.num_threads or os.cpu_count() or 1)
+        torch.manual_seed(self.seed)
+
+        if self.model_name == "tiny":
+            self.tokenizer = ByteTokenizer()
+            self.model = AutoModelForCausalLM.from_config(build_tiny_config(max_positions=self.max_input_tokens + 512))
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if self.tokenizer.pad_token_id is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+
+        self.model.eval()
+        if self.quantize:
+            # Linear 층 가중치를 int8로 양자화 (CPU 행렬 곱 속도와 메모리 개선)
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        self.load_seconds = time.perf_counter() - start
+        return self
+
+    def warmup(self):
+        """첫 요청이 느려지지 않도록 짧은 생성을 한 번 실행"""
+        self.generate("당신은 TRPG 게임 마스터입니다.", max_new_tokens=4)
+
+    def encode(self, prompt, max_new_tokens):
+        """
+        프롬프트를 토큰 ID 목록으로 변환하고 입력 길이 제한 적용
+
+        Args:
+            prompt (str): 프롬프트
+            max_new_tokens (int): 생성할 최대 토큰 수
+
+        Returns:
+            list: 토큰 ID 목록
+        """
+        input_ids = self.tokenizer.encode(prompt)
+        # 생성할 토큰까지 모델의 최대 위치 수 안에 들어가도록 입력 길이 제한
+        max_positions = getattr(self.model.config, "n_positions", None) or getattr(self.model.config, "max_position_embeddings", None)
+        limit = self.max_input_tokens
+        if max_positions:
+            limit = max(min(limit, max_positions - max_new_tokens), 1)
+        # 지시문보다 최근 맥락이 중요하므로 앞부분을 잘라냄
+        return input_ids[-limit:]
+
+    def _lookup_prefixes(self, requests):
+        """요청별로 재사용할 앞부분 key/value와 새로 보관할 공유 앞부분 길이 조회"""
+        cached, shared = [], []
+        for request in requests:
+            # 마지막 토큰은 생성 단계에서 입력하므로 그 앞까지만 미리 계산
+            body = request.input_ids[:-1]
+            if self.prefix_cache is None:
+                cached.append((None, 0))
+                shared.append(0)
+            else:
+                cached.append(self.prefix_cache.lookup(body))
+                shared.append(self.prefix_cache.observe(body))
+        return cached, shared
+
+    def _build_past(self, cached, width):
+        """요청별 캐시된 key/value를 오른쪽 정렬해 배치 past_key_values 생성 (빈 자리는 0, 마스크로 가림)"""
+        template = next(past for past, length in cached if length > 0)
+        layers = []
+        for layer_index, (key, value) in enumerate(template):
+            batch_keys, batch_values = [], []
+            for past, length in cached:
+                pad_shape = (1, key.shape[1], width - length, key.shape[3])
+                row_key = key.new_zeros(pad_shape)
+                row_value = value.new_zeros(pad_shape)
+                if length:
+                    row_key = torch.cat([row_key, past[layer_index][0][:, :, :length]], dim=2)
+                    row_value = torch.cat([row_value, past[layer_index][1][:, :, :length]], dim=2)
+                batch_keys.append(row_key)
+                batch_values.append(row_value)
+            layers.append((torch.cat(batch_keys, dim=0), torch.cat(batch_values, dim=0)))
+        return tuple(layers)
+
+    def run_batch(self, requests):
+        """
+        샘플링 설정이 같은 요청들을 한 번의 배치 생성으로 처리
+
+        각 행은 [캐시된 앞부분][새로 계산할 뒷부분][마지막 토큰] 순서이며, 길이가 다른 부분은 왼쪽을
+        패딩하고 attention mask로 가립니다. 캐시되지 않은 뒷부분을 먼저 한 번에 계산한 뒤 생성하고,
+        최근 프롬프트와 공유하는 앞부분은 그 결과에서 잘라 PrefixCache에 보관합니다.
+        매 단계 생성된 토큰은 요청별로 바로 전달하고, 모든 요청이 끝나면 가장 긴 요청의 최대 토큰 수를
+        기다리지 않고 중단합니다.
+
+        Args:
+            requests (list): GenerationRequest 목록
+        """
+        try:
+            if self.model is None:
+                self.load()
+
+            max_new_tokens = max(request.max_new_tokens for request in requests)
+            for request in requests:
+                request.input_ids = self.encode(request.prompt, max_new_tokens)
+            cached, shared = self._lookup_prefixes(requests)
+
+            pad_id = self.tokenizer.pad_token_id
+            past_width = max(length for _, length in cached)
+            body_width = max(len(request.input_ids) - 1 - length for request, (_, length) in zip(requests, cached))
+            rows, masks = [], []
+            for request, (_, length) in zip(requests, cached):
+                ids = request.input_ids
+                body = ids[length:-1]
+                past_pad = past_width - length
+                body_pad = body_width - len(body)
+                rows.append([pad_id] * past_pad + ids[:length] + [pad_id] * body_pad + body + ids[-1:])
+                masks.append([0] * past_pad + [1] * length + [0] * body_pad + [1] * len(body) + [1])
+            input_ids = torch.tensor(rows, dtype=torch.long)
+            attention_mask = torch.tensor(masks, dtype=torch.long)
+
+            first = requests[0]
+            kwargs = {
+                "max_new_tokens": max_new_tokens,
+                "pad_token_id": pad_id,
+                "eos_token_id": self.tokenizer.eos_token_id,
+                "do_sample": first.sampling_key()[0],
+                "streamer": _BatchStreamer(requests, self.tokenizer),
+                "stopping_criteria": StoppingCriteriaList([_AllFinished(requests)]),
+            }
+            if kwargs["do_sample"]:
+                kwargs.update(temperature=first.temperature, top_p=first.top_p, top_k=first.top_k)
+
+            # 모델 하나를 여러 세션이 공유하므로 배치는 한 번에 하나씩 실행
+            with self._lock, torch.inference_mode():
+                past = self._build_past(cached, past_width) if past_width else None
+                prefilled = past_width + body_width
+                if body_width:
+                    # 캐시되지 않은 뒷부분만 계산 (위치는 패딩을 뺀 실제 토큰 순서로 지정)
+                    mask = attention_mask[:, :prefilled]
+                    position_ids = (mask.cumsum(-1) - 1).clamp(min=0)[:, past_width:]
+                    output = self.model(
+                        input_ids=input_ids[:, past_width:prefilled],
+                        past_key_values=past,
+                        attention_mask=mask,
+                        position_ids=position_ids,
+                        use_cache=True
+                    )
+                    past = output.past_key_values
+                    self._store_prefixes(requests, cached, shared, past, attention_mask[:, :prefilled])
+
+                if past is not None:
+                    kwargs["past_key_values"] = past
+                self.model.generate(input_ids=input_ids, attention_mask=attention_mask, **kwargs)
+        except Exception as e:
+            for request in requests:
+                request.fail(e)
+
+    def _store_prefixes(self, requests, cached, shared, past, mask):
+        """최근 프롬프트와 공유하는 앞부분 중 아직 캐시되지 않은 부분의 key/value 보관"""
+        if self.prefix_cache is None:
+            return
+        for row, (request, (_, length), shared_length) in enumerate(zip(requests, cached, shared)):
+            if shared_length <= length or shared_length < self.prefix_cache.min_tokens:
+                continue
+            # 패딩 위치를 빼고 실제 토큰의 key/value만 앞부분 길이만큼 복사
+            positions = mask[row].bool()
+            prefix = tuple(
+                (key[row:row + 1, :, positions][:, :, :shared_length].clone(),
+                 value[row:row + 1, :, positions][:, :, :shared_length].clone())
+                for key, value in past
+            )
+            self.prefix_cache.store(request.input_ids[:shared_length], prefix)
+
+    def generate(self, prompt, max_new_tokens=200, temperature=0.7, top_p=0.95, top_k=40, stop_sequences=None):
+        """
+        요청 하나를 바로 생성 (배치 스케줄러를 거치지 않음)
+
+        Args:
+            prompt (str): 프롬프트
+            max_new_tokens (int): 생성할 최대 토큰 수
+            temperature (float): 샘플링 온도 (0이면 탐욕적 생성)
+            top_p (float): 누적 확률 샘플링 기준
+            top_k (int): 상위 k개 샘플링 기준
+            stop_sequences (list): 이 문자열이 나오면 그 앞에서 자름
+
+        Returns:
+            str: 생성된 텍스트 (프롬프트 제외)
+        """
+        request = GenerationRequest(prompt, max_new_tokens, temperature, top_p, top_k, stop_sequences)
+        self.run_batch([request])
+        return request.future.result()
+
+class BatchScheduler:
+    """여러 세션의 생성 요청을 짧은 시간 모아 배치로 처리하는 스케줄러"""
+    def __init__(self, engine, max_batch_size=8, max_wait=0.02):
+        self.engine = engine
+        self.max_batch_size = max_batch_size    # 한 배치의 최대 요청 수
+        self.max_wait = max_wait                # 첫 요청 뒤 다른 요청을 기다리는 최대 시간(초)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "requests": 0, "total_queue_wait": 0.0, "batch_sizes": {}}
+        self._worker = threading.Thread(target=self._run, name="trpg-local-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt, **options):
+        """
+        생성 요청을 대기열에 추가
+
+        Args:
+            prompt (str): 프롬프트
+            **options: GenerationRequest 생성 옵션 (max_new_tokens, temperature, top_p, top_k, stop_sequences)
+
+        Returns:
+            GenerationRequest: 결과(future)와 스트리밍 조각(iter_chunks)을 받을 요청
+        """
+        request = GenerationRequest(prompt, **options)
+        self._queue.put(request)
+        return request
+
+    def _collect(self):
+        """첫 요청을 기다린 뒤 max_wait 동안 또는 배치가 찰 때까지 요청 수집"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # 샘플링 설정이 같은 요청끼리 묶어서 생성
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.sampling_key(), []).append(request)
+
+            for requests in groups.values():
+                self._record(requests)
+                self.engine.run_batch(requests)
+
+    def _record(self, requests):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(requests)
+            self._stats["total_queue_wait"] += sum(now - request.submitted_at for request in requests)
+            sizes = self._stats["batch_sizes"]
+            sizes[len(requests)] = sizes.get(len(requests), 0) + 1
+
+    def get_stats(self):
+        """
+        배치 처리 통계 반환
+
+        Returns:
+            dict: 배치 수, 요청 수, 평균 배치 크기, 배치 채움률, 평균 대기 시간, 배치 크기 분포
+        """
+        with self._lock:
+            stats = dict(self._stats, batch_sizes=dict(self._stats["batch_sizes"]))
+        batches = stats["batches"]
+        stats["avg_batch_size"] = stats["requests"] / batches if batches else 0.0
+        stats["fill_rate"] = stats["avg_batch_size"] / self.max_batch_size
+        stats["avg_queue_wait"] = stats.pop("total_queue_wait") / stats["requests"] if stats["requests"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+def main():
+    """명령줄에서 로컬 모델 생성 속도와 배치 처리량 측정"""
+    parser = argparse.ArgumentParser(description="로컬 모델 생성 테스트")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--tiny", action="store_true", help="무작위 초기화한 작은 모델 사용")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=1, help="동시에 보낼 요청 수 (배치 스케줄러 사용)")
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.02)
+    parser.add_argument("--no-prefix-cache", action="store_true", help="공유 앞부분 key/value 캐시 끄기")
+    parser.add_argument("--prompt", default="당신은 TRPG 게임 마스터입니다. 모험을 시작하세요.")
+    args = parser.parse_args()
+
+    engine = LocalModelEngine(
+        model_name="tiny" if args.tiny else args.model,
+        num_threads=args.threads,
+        quantize=not args.no_quantize,
+        prefix_cache=None if args.no_prefix_cache else PrefixCache()
+    ).load()
+    print(f"모델 로딩: {engine.load_seconds:.2f}초")
+    engine.warmup()
+
+    if args.concurrency <= 1:
+        start = time.perf_counter()
+        text = engine.generate(args.prompt, max_new_tokens=args.max_new_tokens)
+        elapsed = time.perf_counter() - start
+        print(f"생성 시간: {elapsed:.2f}초 ({args.max_new_tokens / elapsed:.1f} 토큰/초)")
+        print(text)
+        return
+
+    scheduler = BatchScheduler(engine, args.max_batch_size, args.max_wait)
+
+    def run_one(index):
+        request = scheduler.submit(f"{args.prompt} ({index})", max_new_tokens=args.max_new_tokens)
+        return request.future.result()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(run_one, range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = scheduler.get_stats()
+    print(f"요청 {args.concurrency}개: {elapsed:.2f}초, 배치 {stats['batches']}회, 채움률 {stats['fill_rate']:.0%}")
+    if engine.prefix_cache is not None:
+        print(f"앞부분 캐시: {engine.prefix_cache.get_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from modules.world_generator import (
     master_answer_question,
     generate_world_expansion
 )
+from modules.ai_service import collect_content_enrichment
 
 def world_description_page():
     """세계관 설명 및 질문 페이지 구현"""
@@ -24,11 +25,15 @@ def world_description_page():
     
     st.markdown(f"<div class='story-text'>{formatted_desc}</div>", unsafe_allow_html=True)
     
+    # 콘텐츠 팩 세계관을 보는 동안 AI가 새로 만든 세계관이 도착했으면 바꿀 수 있게 표시
+    display_world_enrichment()
+    
     # "다른 세계 탐험하기" 버튼 추가
     if st.button("🌍 다른 세계 탐험하기", key="explore_other_world", use_container_width=True):
         # 세션 상태 초기화 (일부만)
         for key in ['theme', 'world_description', 'world_generated', 'world_accepted', 
-                   'question_answers', 'question_count', 'current_location']:
+                   'question_answers', 'question_count', 'current_location',
+                   'world_enrichment', 'live_world_description', 'packed_world_description']:
             if key in st.session_state:
                 del st.session_state[key]
         
@@ -52,6 +57,21 @@ def world_description_page():
     with tabs[2]:
         exploration_start_tab()
 
+def display_world_enrichment():
+    """AI가 새로 만든 세계관이 도착했으면 교체 버튼 표시 (팩 세계관을 확장하거나 바꾸기 전까지만)"""
+    if st.session_state.world_description != st.session_state.get('packed_world_description'):
+        return
+    
+    if 'live_world_description' not in st.session_state:
+        live_description = collect_content_enrichment('world_enrichment')
+        if not live_description:
+            return
+        st.session_state.live_world_description = live_description
+    
+    if st.button("✨ AI 마스터가 새로 만든 세계관으로 바꾸기", key="use_live_world", use_container_width=True):
+        st.session_state.world_description = st.session_state.pop('live_world_description')
+        st.rerun()
+
 def world_expansion_tab():
     """세계관 확장 탭 내용"""
     st.subheader("세계관 이어서 작성")
@@ -1,52 +1,42 @@
 """
 세계관 생성 및 관리를 담당하는 모듈
 """
-from modules.ai_service import generate_gemini_text
+import streamlit as st
+from modules.ai_service import (
+    generate_gemini_text,
+    get_backup_response,
+    build_world_prompt,
+    sample_content_pack,
+    start_content_enrichment
+)
+from utils.content_pack import make_section_key
 
-def generate_world_description(theme):
+def generate_world_description(theme, use_pack=True):
     """
     선택한 테마에 기반한 세계관 생성 - 개선된 버전
     
+    콘텐츠 팩에 이 테마의 세계관이 있으면 바로 하나를 골라 반환하고, 설정에 따라 AI 생성을 백그라운드에서
+    시작합니다 (도착하면 세계관 설명 페이지에서 바꿀 수 있음).
+    
     Args:
         theme (str): 세계관 테마
+        use_pack (bool): 콘텐츠 팩 사용 여부 (False면 항상 AI로 생성)
         
     Returns:
         str: 생성된 세계관 설명
     """
-    prompt = f"""
-    당신은 TRPG 게임 마스터입니다. '{theme}' 테마의 몰입감 있는 세계를 한국어로 만들어주세요.
-    다음 구조에 따라 체계적으로 세계관을 구축해주세요:
-
-    # 1. 기본 골격 수립
-    ## 핵심 테마와 분위기
-    - '{theme}'의 특성이 뚜렷하게 드러나는 세계의 중심 이념이나 분위기
-    
-    ## 세계의 독창적 규칙
-    - 이 세계만의 특별한 물리법칙이나 마법/기술 체계
-    
-    # 2. 구조적 요소
-    ## 주요 지역 (3~5개)
-    - 각 지역의 특성과 분위기
-    
-    ## 주요 세력 (2~3개)
-    - 세력 간의 관계와 갈등 구조
-    
-    # 3. 현재 상황
-    ## 중심 갈등 
-    - 플레이어가 직면하게 될 세계의 주요 문제나 갈등
-    
-    ## 잠재적 위협
-    - 세계를 위협하는 요소나 임박한 위기
-    
-    # 4. 플레이어 개입 지점
-    - 플레이어가 이 세계에서 영향력을 행사할 수 있는 방법
-    - 탐험 가능한 비밀이나 수수께끼
-
-    모든 문장은 반드시 완성된 형태로 작성하세요. 중간에 문장이 끊기지 않도록 해주세요.
-    전체 내용은 약 400-500단어로 작성해주세요.
-    """
+    if use_pack:
+        # 이전 세계의 AI 생성 결과가 남아 있으면 버림
+        st.session_state.pop('world_enrichment', None)
+        st.session_state.pop('live_world_description', None)
+        
+        packed = sample_content_pack(make_section_key("world", theme))
+        if packed:
+            st.session_state.packed_world_description = packed[0]
+            start_content_enrichment("world", "world_enrichment", generate_world_description, theme, use_pack=False)
+            return packed[0]
     
-    return generate_gemini_text(prompt, 800)
+    return generate_gemini_text(build_world_prompt(theme), 800, call_site="world_description")
 
 def master_answer_question(question, world_desc, theme):
     """
@@ -62,10 +52,7 @@ def master_answer_question(question, world_desc, theme):
     """
     try:
         prompt = f"""
-        당신은 TRPG 게임 마스터입니다. 플레이어가 '{theme}' 테마의 다음 세계에 대해 질문했습니다:
-        
-        세계 설명:
-        {world_desc[:500]}...
+        당신은 TRPG 게임 마스터입니다. 플레이어가 '{theme}' 테마의 위 세계에 대해 질문했습니다:
         
         플레이어 질문:
         {question}
@@ -80,10 +67,9 @@ def master_answer_question(question, world_desc, theme):
         모든 문장은 완결된 형태로 작성하세요.
         """
         
-        return generate_gemini_text(prompt, 400)
+        return generate_gemini_text(prompt, 400, call_site="world_question", world_context=world_desc)
     except Exception as e:
-        from config.constants import BACKUP_RESPONSES
-        return BACKUP_RESPONSES["question"]  # 백업 응답 반환
+        return get_backup_response(prompt, 400)  # 백업 응답 반환
 
 def generate_world_expansion(world_description, theme, expansion_topic):
     """
@@ -98,12 +84,10 @@ def generate_world_expansion(world_description, theme, expansion_topic):
         str: 확장된 세계관 내용
     """
     prompt = f"""
-    당신은 TRPG 게임 마스터입니다. 다음 세계관 설명을 이어서 작성해주세요.
+    당신은 TRPG 게임 마스터입니다. 위 세계관 설명을 이어서 작성해주세요.
     이전 세계관 내용을 기반으로 "{expansion_topic}" 측면을 더 상세히 확장해주세요.
     
     테마: {theme}
-    현재 세계관 설명의 일부:
-    {world_description[:500]}...
     
     ## 확장 지침:
     1. 선택한 주제({expansion_topic})에 초점을 맞추어 세계관을 확장하세요.
@@ -116,7 +100,7 @@ def generate_world_expansion(world_description, theme, expansion_topic):
     모든 문장은 완결된 형태로 작성하세요.
     """
     
-    return generate_gemini_text(prompt, 500)
+    return generate_gemini_text(prompt, 500, call_site="world_expansion", world_context=world_description)
 
 def master_answer_game_question(question, theme, location, world_description):
     """
@@ -139,7 +123,6 @@ def master_answer_game_question(question, theme, location, world_description):
     ## 게임 정보
     세계 테마: {theme}
     현재 위치: {location}
-    세계 설명: {world_description[:300]}...
     
     ## 응답 지침
     1. 게임의 흐름을 유지하되, 플레이어에게 유용한 정보를 제공하세요.
@@ -150,4 +133,4 @@ def master_answer_game_question(question, theme, location, world_description):
     6. 모든 문장은 완결된 형태로 작성하세요.
     """
     
-    return generate_gemini_text(prompt, 400)
\ No newline at end of file
+    return generate_gemini_text(prompt, 400, call_site="game_question", world_context=world_description)
\ No newline at end of file
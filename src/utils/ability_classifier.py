@@ -0,0 +1,256 @@
+"""
+행동 판정 로컬 분류기 유틸리티 모듈
+
+행동 설명에 들어 있는 능력치별 키워드와 글자 n-gram으로 판정 능력치(STR~CHA)와 난이도를 바로 고르고
+신뢰도를 함께 반환합니다. 신뢰도가 기준에 못 미치는 행동은 AI에 판정을 맡기고,
+AI가 내린 판정을 기록해 두었다가 학습해서 점점 더 많은 행동을 직접 판정합니다.
+"""
+import collections
+import json
+import math
+import os
+import re
+import threading
+
+# 판정 태그("[위험] ...")와 문장 부호를 뺀 단어 단위로 n-gram 추출
+TAG_PATTERN = re.compile(r"^\s*\[[^\]]*\]\s*")
+WORD_PATTERN = re.compile(r"[가-힣A-Za-z0-9]+")
+
+def normalize_action(action):
+    """
+    분류와 기록에 사용할 행동 텍스트 정규화 (판정 태그 제거, 공백 정리)
+
+    Args:
+        action (str): 플레이어 행동
+
+    Returns:
+        str: 정규화된 행동 텍스트
+    """
+    return re.sub(r"\s+", " ", TAG_PATTERN.sub("", action or "")).strip()
+
+class AbilityClassifier:
+    """키워드와 학습한 글자 n-gram으로 행동 판정 능력치와 난이도를 고르는 분류기"""
+    def __init__(self, keywords, difficulty_keywords=None, profession_stats=None, confidence_threshold=0.6,
+                 keyword_weight=2.5, profession_weight=0.5, ngram_sizes=(2, 3), ngram_weight=3.0,
+                 base_difficulty=12, difficulty_range=(5, 25), log_path=None):
+        self.labels = list(keywords)
+        self.keywords = {label: list(words) for label, words in keywords.items()}
+        self.difficulty_keywords = dict(difficulty_keywords or {})
+        self.profession_stats = dict(profession_stats or {})
+        self.confidence_threshold = confidence_threshold
+        self.keyword_weight = keyword_weight
+        self.profession_weight = profession_weight    # 직업의 중요 능력치에 더할 점수
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.ngram_weight = ngram_weight
+        self.base_difficulty = base_difficulty
+        self.difficulty_range = difficulty_range
+        self.log_path = log_path    # AI 판정 기록 파일 (JSON lines, None이면 기록하지 않음)
+        self._lock = threading.Lock()
+        self._ngram_counts = {label: collections.Counter() for label in self.labels}
+        self._vocabulary = set()
+        self._difficulties = {label: [0, 0] for label in self.labels}   # 능력치 -> [난이도 합, 개수]
+        self._exact = {}            # 정규화한 행동 -> 능력치별 판정 수
+        self._exact_difficulty = {} # 정규화한 행동 -> [난이도 합, 개수]
+        self._examples = 0
+        self._stats = {"local": 0, "deferred": 0, "exact": 0}
+        if log_path and os.path.exists(log_path):
+            self.train(self._read_log(log_path))
+
+    def _features(self, text):
+        features = []
+        for word in WORD_PATTERN.findall(text):
+            for size in self.ngram_sizes:
+                features.extend(word[i:i + size] for i in range(len(word) - size + 1))
+        return features
+
+    def _difficulty_for(self, label, text, exact_key=None):
+        total, count = self._exact_difficulty.get(exact_key, (0, 0))
+        if count:
+            # 기록된 행동은 AI가 정한 난이도의 평균 사용
+            difficulty = total / count
+        else:
+            total, count = self._difficulties[label]
+            difficulty = total / count if count else self.base_difficulty
+            difficulty += sum(delta for word, delta in self.difficulty_keywords.items() if word in text)
+        low, high = self.difficulty_range
+        return int(min(max(round(difficulty), low), high))
+
+    def classify(self, action, profession=None):
+        """
+        행동 판정 능력치와 난이도 예측
+
+        Args:
+            action (str): 플레이어 행동
+            profession (str): 캐릭터 직업 (중요 능력치에 가산점)
+
+        Returns:
+            dict: ability_code, difficulty, confidence(0~1), confident(기준 이상이면 True),
+                  matched(맞은 키워드 목록), method("exact" 또는 "model")
+        """
+        text = normalize_action(action)
+        with self._lock:
+            votes = self._exact.get(text)
+            if votes:
+                # AI가 판정한 적 있는 행동은 가장 많이 나온 판정을 그대로 사용
+                label, count = votes.most_common(1)[0]
+                prediction = {
+                    "ability_code": label,
+                    "difficulty": self._difficulty_for(label, text, exact_key=text),
+                    "confidence": count / sum(votes.values()),
+                    "matched": [],
+                    "method": "exact"
+                }
+            else:
+                prediction = self._predict(text, profession)
+            prediction["confident"] = prediction["confidence"] >= self.confidence_threshold
+            self._stats["exact" if prediction["method"] == "exact" else "local" if prediction["confident"] else "deferred"] += 1
+        return prediction
+
+    def _predict(self, text, profession):
+        matched = {label: [word for word in words if word in text] for label, words in self.keywords.items()}
+        key_stats = self.profession_stats.get(profession, ())
+        scores = {
+            label: self.keyword_weight * len(matched[label]) + (self.profession_weight if label in key_stats else 0.0)
+            for label in self.labels
+        }
+
+        # 기록에서 학습한 n-gram별 능력치 분포 (처음 보는 n-gram은 중립으로 보고 전체 개수로 나눠
+        # 기록이 많은 능력치가 불리해지거나 문장 길이에 따라 점수가 커지지 않게 함)
+        features = self._features(text)
+        if self._examples and features:
+            evidence = dict.fromkeys(self.labels, 0.0)
+            for feature in features:
+                if feature not in self._vocabulary:
+                    continue
+                counts = [self._ngram_counts[label][feature] + 1 for label in self.labels]
+                mean = sum(math.log(count) for count in counts) / len(counts)
+                for label, count in zip(self.labels, counts):
+                    evidence[label] += math.log(count) - mean
+            for label in self.labels:
+                scores[label] += self.ngram_weight * evidence[label] / len(features)
+
+        # 점수를 softmax로 확률로 바꿔 가장 높은 확률을 신뢰도로 사용
+        top = max(scores.values())
+        weights = {label: math.exp(score - top) for label, score in scores.items()}
+        label = max(self.labels, key=lambda name: (scores[name], name in key_stats))
+        return {
+            "ability_code": label,
+            "difficulty": self._difficulty_for(label, text),
+            "confidence": weights[label] / sum(weights.values()),
+            "matched": matched[label],
+            "method": "model"
+        }
+
+    def learn(self, action, ability_code, difficulty=None):
+        """
+        판정 하나 학습
+
+        Args:
+            action (str): 플레이어 행동
+            ability_code (str): 판정 능력치 코드
+            difficulty (int): 판정 난이도
+
+        Returns:
+            bool: 학습했으면 True (알 수 없는 능력치 코드면 False)
+        """
+        if ability_code not in self._ngram_counts:
+            return False
+        text = normalize_action(action)
+        features = self._features(text)
+        with self._lock:
+            self._ngram_counts[ability_code].update(features)
+            self._vocabulary.update(features)
+            self._exact.setdefault(text, collections.Counter())[ability_code] += 1
+            if isinstance(difficulty, (int, float)):
+                for totals in (self._difficulties[ability_code], self._exact_difficulty.setdefault(text, [0, 0])):
+                    totals[0] += difficulty
+                    totals[1] += 1
+            self._examples += 1
+        return True
+
+    def train(self, records):
+        """
+        판정 기록 여러 개 학습
+
+        Args:
+            records (iterable): action, ability_code, difficulty 키를 가진 사전 목록
+
+        Returns:
+            int: 학습한 기록 수
+        """
+        return sum(
+            1 for record in records
+            if self.learn(record.get("action", ""), record.get("ability_code"), record.get("difficulty"))
+        )
+
+    def record_decision(self, action, ability_code, difficulty=None, profession=None):
+        """
+        AI가 내린 판정을 학습하고 기록 파일에 덧붙임
+
+        Args:
+            action (str): 플레이어 행동
+            ability_code (str): 판정 능력치 코드
+            difficulty (int): 판정 난이도
+            profession (str): 캐릭터 직업 (참고용)
+        """
+        if not self.learn(action, ability_code, difficulty) or not self.log_path:
+            return
+        line = json.dumps(
+            {"action": normalize_action(action), "ability_code": ability_code, "difficulty": difficulty, "profession": profession},
+            ensure_ascii=False
+        )
+        with self._lock:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    @staticmethod
+    def _read_log(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def evaluate(self, records):
+        """
+        판정 기록과 비교해 정확도와 직접 판정 비율 계산 (학습하지 않은 기록으로 평가)
+
+        Args:
+            records (iterable): action, ability_code, profession 키를 가진 사전 목록
+
+        Returns:
+            dict: 기록 수, 전체 정확도, 신뢰도 기준 이상 비율과 그 안에서의 정확도
+        """
+        total = correct = confident = confident_correct = 0
+        for record in records:
+            prediction = self._predict(normalize_action(record.get("action", "")), record.get("profession"))
+            hit = prediction["ability_code"] == record.get("ability_code")
+            total += 1
+            correct += hit
+            if prediction["confidence"] >= self.confidence_threshold:
+                confident += 1
+                confident_correct += hit
+        return {
+            "examples": total,
+            "accuracy": correct / total if total else 0.0,
+            "coverage": confident / total if total else 0.0,
+            "confident_accuracy": confident_correct / confident if confident else 0.0
+        }
+
+    def get_stats(self):
+        """
+        분류기 통계 반환
+
+        Returns:
+            dict: 학습한 판정 수, 직접 판정/기록 일치/AI에 맡긴 횟수와 직접 판정 비율
+        """
+        with self._lock:
+            stats = dict(self._stats, examples=self._examples)
+        answered = stats["local"] + stats["exact"]
+        total = answered + stats["deferred"]
+        stats["local_rate"] = answered / total if total else 0.0
+        return stats
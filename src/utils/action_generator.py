@@ -0,0 +1,158 @@
+"""
+로컬 행동 제안 생성 유틸리티 모듈
+
+테마, 현재 위치, 소지품, 최근 스토리의 핵심 단어를 템플릿에 채워 태그가 붙은 행동 제안을 바로 만듭니다.
+AI 제안이 도착하기 전까지 보여주고, 도착하면 AI 제안으로 바꾸면서 빠진 태그는 로컬 제안으로 채웁니다.
+"""
+import collections
+import hashlib
+import random
+import re
+
+from ..config.constants import LOCAL_ACTION_TEMPLATES, LOCAL_ACTION_WORDS, DEFAULT_ACTION_SUGGESTIONS
+from .procedural_content import fix_particles
+
+TAG_PATTERN = re.compile(r"^\s*(\[[^\]]+\])")
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+BOLD_PATTERN = re.compile(r"\*\*(.+?)\*\*")
+WORD_PATTERN = re.compile(r"[가-힣]{2,}")
+
+# 단어 끝에서 떼어낼 조사 (긴 것부터 확인)
+PARTICLE_SUFFIXES = ("으로", "에서", "에게", "까지", "부터", "처럼", "이", "가", "을", "를", "은", "는", "의", "에", "와", "과", "도", "로", "만")
+# 동사/형용사 활용형으로 보이는 단어 끝 (핵심 단어에서 제외)
+VERB_ENDINGS = ("다", "요", "고", "며", "서", "게", "지", "면", "니", "죠", "던", "운", "한", "된", "는", "은")
+STOPWORDS = {"당신", "그리고", "하지만", "그러나", "이곳", "그곳", "주변", "모험", "시작", "순간", "마침내", "조금", "다시"}
+
+def get_action_tag(action):
+    """
+    행동 제안의 태그 반환
+
+    Args:
+        action (str): 태그가 붙은 행동 제안
+
+    Returns:
+        str or None: "[위험]" 형태의 태그 또는 태그가 없으면 None
+    """
+    match = TAG_PATTERN.match(action)
+    return match.group(1) if match else None
+
+def extract_story_keywords(text, limit=3, exclude=()):
+    """
+    최근 스토리에서 행동 제안에 넣을 핵심 단어(장소 안의 사물 등) 추출
+
+    굵게 표시된 단어, 자주 나온 명사, 먼저 나온 명사 순으로 고릅니다.
+
+    Args:
+        text (str): 최근 스토리
+        limit (int): 최대 단어 수
+        exclude (iterable): 따로 채워 넣을 단어 목록 (위치, 인물, 위협, 소지품 - 이 단어의 일부도 제외)
+
+    Returns:
+        list: 핵심 단어 목록
+    """
+    keywords = []
+    excluded = [word for word in exclude if word]
+
+    def add(word):
+        word = word.strip()
+        if not word or word in keywords or word in STOPWORDS:
+            return
+        if any(word in phrase for phrase in excluded):
+            return
+        keywords.append(word)
+
+    for word in BOLD_PATTERN.findall(text or ""):
+        add(word)
+
+    counts = collections.Counter()
+    for word in WORD_PATTERN.findall(BOLD_PATTERN.sub(" ", text or "")):
+        suffix = next((suffix for suffix in PARTICLE_SUFFIXES if word.endswith(suffix)), None)
+        if suffix is not None:
+            # 한 글자 단어에 조사가 붙은 경우("위에", "손에")는 핵심 단어로 쓰지 않음
+            word = word[:-len(suffix)] if len(word) - len(suffix) >= 2 else None
+        elif word.endswith(VERB_ENDINGS):
+            word = None
+        if word:
+            counts[word] += 1
+    for word, _ in sorted(counts.items(), key=lambda item: (-item[1], (text or "").find(item[0]))):
+        add(word)
+
+    return keywords[:limit]
+
+def generate_local_action_suggestions(location, theme, last_entry, character, count=5):
+    """
+    템플릿으로 태그가 붙은 행동 제안을 바로 생성 (같은 상황에는 항상 같은 제안)
+
+    Args:
+        location (str): 현재 위치
+        theme (str): 세계관 테마
+        last_entry (str): 가장 최근 스토리
+        character (dict): 캐릭터 정보 (inventory 사용)
+        count (int): 만들 제안 수
+
+    Returns:
+        list: 태그가 붙은 행동 제안 목록
+    """
+    seed = hashlib.sha256(f"{theme}:{location}:{last_entry}".encode("utf-8")).hexdigest()
+    rng = random.Random(int(seed[:16], 16))
+    words = LOCAL_ACTION_WORDS.get(theme, LOCAL_ACTION_WORDS["fantasy"])
+
+    # 최근 스토리에 나온 소지품을 먼저 사용
+    item_names = [getattr(item, "name", str(item)) for item in character.get("inventory", [])]
+    mentioned_items = [name for name in item_names if name and name in (last_entry or "")]
+    keywords = extract_story_keywords(last_entry, exclude=[location] + list(words["people"]) + list(words["threats"]) + item_names)
+    values = {
+        "location": [location] if location else [],
+        "keyword": keywords,
+        "item": mentioned_items or item_names,
+        "person": [word for word in words["people"] if word in (last_entry or "")] or list(words["people"]),
+        "threat": [word for word in words["threats"] if word in (last_entry or "")] or list(words["threats"]),
+    }
+
+    def render(template):
+        names = PLACEHOLDER_PATTERN.findall(template)
+        if any(not values.get(name) for name in names):
+            return None
+        return fix_particles(template.format(**{name: rng.choice(values[name]) for name in names}))
+
+    # 태그마다 하나씩 만들고 모자라면 남은 템플릿으로 채움
+    candidates = {}
+    for tag, templates in LOCAL_ACTION_TEMPLATES.items():
+        rendered = [text for text in (render(template) for template in templates) if text]
+        rng.shuffle(rendered)
+        candidates[tag] = rendered
+
+    suggestions = []
+    while len(suggestions) < count and any(candidates.values()):
+        for tag, rendered in candidates.items():
+            if rendered and len(suggestions) < count:
+                suggestions.append(f"{tag} {rendered.pop()}")
+
+    return suggestions or list(DEFAULT_ACTION_SUGGESTIONS)
+
+def merge_action_suggestions(ai_suggestions, local_suggestions, count=5):
+    """
+    AI 제안으로 로컬 제안을 교체하고 AI 제안에 빠진 태그는 로컬 제안으로 채움
+
+    AI 응답이 부족해 채워 넣은 기본 제안(DEFAULT_ACTION_SUGGESTIONS)은 AI 제안으로 치지 않습니다.
+
+    Args:
+        ai_suggestions (list): AI 행동 제안 목록
+        local_suggestions (list): 로컬 행동 제안 목록
+        count (int): 최대 제안 수
+
+    Returns:
+        list: 합친 행동 제안 목록 (쓸 수 있는 AI 제안이 없으면 로컬 제안 그대로)
+    """
+    merged = [action for action in ai_suggestions or [] if action not in DEFAULT_ACTION_SUGGESTIONS][:count]
+    if not merged:
+        return list(local_suggestions)
+
+    covered = {get_action_tag(action) for action in merged}
+    for action in local_suggestions:
+        if len(merged) >= count:
+            break
+        if get_action_tag(action) not in covered:
+            merged.append(action)
+            covered.add(get_action_tag(action))
+    return merged
@@ -0,0 +1,67 @@
+"""
+백그라운드 작업 실행 유틸리티 모듈
+
+스크립트 실행이 끝난 뒤에도 다음 화면에 필요한 AI 호출을 미리 진행할 수 있도록
+세션 컨텍스트를 유지한 채 스레드 풀에서 작업을 실행합니다.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
+from ..config.constants import BACKGROUND_MAX_WORKERS
+
+@st.cache_resource
+def get_background_executor():
+    """
+    프로세스 전체에서 공유하는 백그라운드 스레드 풀 반환
+
+    Returns:
+        ThreadPoolExecutor: 백그라운드 작업용 스레드 풀
+    """
+    return ThreadPoolExecutor(max_workers=BACKGROUND_MAX_WORKERS, thread_name_prefix="trpg-bg")
+
+def bind_script_context(fn, *args, **kwargs):
+    """
+    현재 세션 컨텍스트를 연결한 뒤 함수를 실행하는 호출 가능 객체 생성
+
+    다른 스레드(스레드 풀, asyncio.to_thread 등)에서 실행해도 st.session_state 등 세션 정보에 접근할 수 있습니다.
+
+    Args:
+        fn (callable): 실행할 함수
+        *args: 함수 위치 인자
+        **kwargs: 함수 키워드 인자
+
+    Returns:
+        callable: 인자 없이 호출하는 함수
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def run_with_context():
+        if ctx is not None and add_script_run_ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+
+    return run_with_context
+
+def submit_background(fn, *args, **kwargs):
+    """
+    현재 세션 컨텍스트를 연결한 채 백그라운드 작업 실행
+
+    작업 스레드에서도 st.session_state 등 세션 정보에 접근할 수 있습니다.
+
+    Args:
+        fn (callable): 실행할 함수
+        *args: 함수 위치 인자
+        **kwargs: 함수 키워드 인자
+
+    Returns:
+        Future: 작업 결과를 담을 Future 객체
+    """
+    return get_background_executor().submit(bind_script_context(fn, *args, **kwargs))
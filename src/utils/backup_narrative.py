@@ -0,0 +1,419 @@
+"""
+백업 응답 절차적 생성 유틸리티 모듈
+
+API를 쓸 수 없을 때 정해진 문장 몇 개 대신 문법 규칙을 펼쳐 백업 응답을 만듭니다.
+프롬프트에서 테마, 현재 위치, 목적지, 소지품, 플레이어 행동, 질문을 읽어 슬롯에 채우므로
+세계관, 캐릭터 배경, 이동, 마스터 답변, 스토리가 상황에 맞게 달라지고,
+같은 시드와 프롬프트에는 항상 같은 응답을 돌려줍니다.
+JSON 응답(턴, 판정, 아이템 추출)과 행동 제안은 절차적 콘텐츠 생성기의 형식을 그대로 사용합니다.
+"""
+import re
+
+from .procedural_content import THEME_WORDS, ProceduralContentGenerator, fix_particles
+from .action_generator import extract_story_keywords
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+TAG_PATTERN = re.compile(r"^\s*\[[^\]]*\]\s*")
+MAX_DEPTH = 8
+
+# 절차적 콘텐츠 생성기의 테마 어휘에 더할 백업 응답 전용 어휘
+BACKUP_THEME_WORDS = {
+    "fantasy": {
+        "landmarks": ["이끼 낀 석상", "부서진 감시탑", "거대한 세계수", "룬이 새겨진 아치", "오래된 우물"],
+        "sounds": ["늑대 울음", "먼 종소리", "나뭇잎 스치는 소리", "대장간 망치 소리"],
+        "smells": ["송진 냄새", "타다 남은 향 냄새", "축축한 흙냄새"],
+        "factions": ["은빛 기사단", "마법사 협회", "그림자 도적 길드", "숲의 엘프 부족"],
+        "relics": ["잊힌 왕의 왕관", "봉인된 마도서", "용의 심장석"],
+        "eras": ["용의 시대", "첫 번째 왕조", "대마법 전쟁"],
+    },
+    "sci-fi": {
+        "landmarks": ["거대한 통신 안테나", "멈춰 선 궤도 엘리베이터", "금이 간 관측창", "홀로그램 안내판", "낡은 착륙 패드"],
+        "sounds": ["냉각 펌프 소리", "무전 잡음", "자동문 여닫히는 소리", "멀리서 울리는 경보"],
+        "smells": ["오존 냄새", "타버린 회로 냄새", "소독약 냄새"],
+        "factions": ["연합 우주군", "메가코프 이사회", "독립 식민지 연맹", "밀수업자 조합"],
+        "relics": ["선구자 문명의 유물", "암호화된 블랙박스", "첫 이주선의 항해 일지"],
+        "eras": ["대이주 시대", "첫 접촉", "기업 전쟁"],
+    },
+    "dystopia": {
+        "landmarks": ["거대한 선전 스크린", "녹슨 감시탑", "무너진 고가도로", "봉쇄된 철문", "불 꺼진 배급소"],
+        "sounds": ["확성기 방송", "군홧발 소리", "드론 프로펠러 소리", "먼 총성"],
+        "smells": ["매캐한 연기 냄새", "녹슨 쇠 냄새", "썩은 빗물 냄새"],
+        "factions": ["중앙 통제국", "저항군 지하 조직", "암시장 카르텔", "배급 관리청"],
+        "relics": ["붕괴 이전의 기록 보관소 열쇠", "금지된 방송 테이프", "통제국 내부 문서"],
+        "eras": ["대붕괴", "통제 원년", "마지막 선거"],
+    },
+}
+
+# 기호 -> 대안 템플릿 목록 ({기호}는 다른 규칙이나 슬롯으로 펼침)
+BACKUP_GRAMMAR = {
+    # 장면 묘사
+    "scene": ["{sight}", "{sound_line}", "{smell_line}", "{person_line}", "{threat_line}", "{detail}", "{atmosphere}."],
+    "sight": [
+        "{location}의 {landmark}이(가) 희미한 빛 속에서 모습을 드러냅니다.",
+        "{landmark} 너머로 {place} 쪽으로 이어지는 좁은 길이 보입니다.",
+        "{location} 곳곳에는 오래전 누군가 머물렀던 흔적이 남아 있습니다.",
+        "빛이 닿지 않는 구석마다 {location}의 오래된 비밀이 숨어 있는 듯합니다.",
+    ],
+    "sound_line": [
+        "어딘가에서 {sound}이(가) 들려옵니다.",
+        "{sound}이(가) 잦아들자 {location}에 묘한 정적이 내려앉습니다.",
+        "귀를 기울이면 {sound} 사이로 누군가의 속삭임이 섞여 있습니다.",
+    ],
+    "smell_line": [
+        "바람에 실려 온 {smell}이(가) 코끝을 스칩니다.",
+        "공기 중에 옅은 {smell}이(가) 배어 있습니다.",
+    ],
+    "person_line": [
+        "{person}이(가) {person_act}",
+        "{location}에서 만난 {person}은(는) {person_act}",
+    ],
+    "person_act": [
+        "멀찍이서 당신을 조용히 지켜봅니다.",
+        "낮은 목소리로 {faction}에 관한 소문을 전합니다.",
+        "당신에게 조심하라는 눈짓을 보냅니다.",
+        "{place}에서 겪은 일을 들려주며 고개를 젓습니다.",
+    ],
+    "threat_line": [
+        "멀리서 {threat}의 기척이 느껴집니다.",
+        "바닥에 남은 흔적은 {threat}이(가) 얼마 전 이곳을 지나갔다는 사실을 알려줍니다.",
+        "벽에 붙은 경고문에는 {threat}을(를) 조심하라는 글귀가 적혀 있습니다.",
+    ],
+    "detail": [
+        "벽 한쪽에 누군가 급하게 남긴 표식이 보입니다.",
+        "발밑의 흔적은 {landmark} 쪽으로 이어집니다.",
+        "{faction}의 문장이 새겨진 낡은 깃발이 바람에 흔들립니다.",
+        "당신은 숨을 고르며 주변을 천천히 살핍니다.",
+    ],
+    "hook": [
+        "그때, {landmark} 뒤편에서 무언가가 움직입니다.",
+        "{person}이(가) 다가와 {relic}에 대해 아는 것이 있는지 묻습니다.",
+        "당신은 {threat}이(가) 가까워지고 있다는 것을 직감합니다.",
+        "이제 어디로 향할지 결정해야 합니다.",
+    ],
+    # 스토리 (행동과 판정 결과)
+    "action_open": [
+        "「{action}」 당신은 결심을 굳히고 행동에 옮깁니다.",
+        "당신은 망설임 없이 움직입니다. 「{action}」",
+    ],
+    "success": [
+        "판정은 성공입니다. {success_detail}",
+        "노력이 결실을 맺습니다. {success_detail}",
+    ],
+    "success_detail": [
+        "모든 것이 계획대로 맞아떨어집니다.",
+        "{location}의 흐름이 당신에게 유리하게 바뀝니다.",
+        "지켜보던 {person}조차 감탄한 듯 고개를 끄덕입니다.",
+    ],
+    "failure": [
+        "판정은 실패입니다. {failure_detail}",
+        "일이 뜻대로 풀리지 않습니다. {failure_detail}",
+    ],
+    "failure_detail": [
+        "발을 헛디디는 바람에 큰 소리가 울려 퍼집니다.",
+        "결국 {threat}의 주의를 끌고 말았습니다.",
+        "손에 쥐었던 단서가 미끄러져 어둠 속으로 사라집니다.",
+    ],
+    "found_item": [
+        "{landmark} 아래에서 **{item}**을(를) 발견해 챙깁니다.",
+        "{person}이(가) 건넨 **{item}**을(를) 받아 듭니다.",
+        "당신은 바닥에 떨어진 **{item}**을(를) 발견하고 챙깁니다.",
+    ],
+    "used_item": [
+        "당신은 **{own_item}**을(를) 꺼내 듭니다.",
+        "**{own_item}**이(가) 이번에도 제 몫을 해냅니다.",
+    ],
+    # 이동
+    "depart": [
+        "당신은 {origin}을(를) 뒤로하고 {destination}을(를) 향해 길을 나섭니다.",
+        "{origin}의 소란이 멀어지고, {destination}을(를) 향한 길이 눈앞에 펼쳐집니다.",
+    ],
+    "journey": [
+        "{scene}",
+        "길 위에서 {person}과(와) 마주칩니다. 상대는 {person_act}",
+        "한참을 걷자 {landmark}이(가) 이정표처럼 나타납니다.",
+        "{origin}에서는 느낄 수 없던 {smell}이(가) 조금씩 짙어집니다.",
+    ],
+    "arrive": [
+        "마침내 {destination}에 도착했습니다.",
+        "{destination}의 입구가 눈앞에 모습을 드러냅니다.",
+    ],
+    "arrival_scene": [
+        "{destination}의 중심에는 {landmark}이(가) 우뚝 서 있습니다.",
+        "{destination}의 사람들은 낯선 방문객인 당신을 힐끗 쳐다봅니다.",
+        "{origin}과(와)는 전혀 다른 공기가 {destination}을(를) 채우고 있습니다.",
+        "{destination} 어딘가에서 {sound}이(가) 끊임없이 들려옵니다.",
+    ],
+    # 마스터 답변
+    "answer_open": [
+        "좋은 질문입니다.",
+        "흥미로운 질문이군요.",
+        "{topic}에 대해 묻는 이는 많지 않습니다.",
+    ],
+    "lore": [
+        "전설에 의하면 {topic}은(는) {era} 무렵 {faction}과(와) 깊이 얽혀 있었다고 합니다.",
+        "소문에 따르면 {topic}의 비밀은 {place} 어딘가에 잠들어 있다고 합니다.",
+        "{person}은(는) {topic} 이야기가 나오면 입을 다물어 버립니다.",
+        "{faction}은(는) 오래전부터 {topic}에 얽힌 기록을 모아 왔다고 전해집니다.",
+        "{era} 이후로 {topic}을(를) 직접 본 사람은 거의 없습니다.",
+        "{place}의 노인들은 {topic}이(가) {relic}과(와) 관련이 있다고 믿습니다.",
+        "한때 {topic}을(를) 조사하던 이들은 {threat}의 습격을 받고 흩어졌다고 합니다.",
+        "{topic}에 대한 기록은 {era} 때 대부분 사라졌습니다.",
+    ],
+    "hint": [
+        "더 알고 싶다면 {place}의 {landmark}을(를) 찾아가 보세요.",
+        "{relic}이(가) 실마리가 될지도 모릅니다.",
+        "{person}이(가) 무언가 알고 있을지도 모릅니다.",
+    ],
+    "answer_close": [
+        "그 이상은 직접 확인해 보는 수밖에 없습니다.",
+        "모든 진실이 밝혀지기에는 아직 이릅니다.",
+        "물론 어디까지가 사실인지는 아무도 모릅니다.",
+    ],
+    # 세계관
+    "world_core": [
+        "이 세계는 {era} 이후 {faction}이(가) 질서를 지켜 온 곳입니다.",
+        "{relic}에 얽힌 전설이 세계 곳곳에 전해집니다.",
+        "사람들은 {era}의 기억을 아직 잊지 못했습니다.",
+        "{faction}과(와) {faction}의 오랜 대립이 세계의 균형을 흔들고 있습니다.",
+        "{place}에서 시작된 소문은 어느새 세계 전체로 퍼져 나갔습니다.",
+        "{threat}의 위협은 누구도 외면할 수 없을 만큼 커졌습니다.",
+        "{atmosphere}.",
+    ],
+    "region": [
+        "{landmark}이(가) 있는 곳으로, {atmosphere}.",
+        "{faction}의 영향력이 강한 지역입니다. {sound}이(가) 끊이지 않습니다.",
+        "{threat}이(가) 출몰한다는 소문 때문에 발길이 뜸한 곳입니다.",
+    ],
+    "faction_desc": [
+        "{relic}을(를) 손에 넣으려 합니다.",
+        "{place}을(를) 거점으로 세력을 넓히고 있습니다.",
+        "{era}의 진실을 감추고 있다는 의심을 받습니다.",
+    ],
+    "situation": [
+        "{threat}의 움직임이 심상치 않습니다.",
+        "{faction}이(가) {relic}을(를) 찾기 위해 사람을 모으고 있습니다.",
+        "{place}에서 들려오는 소식이 점점 흉흉해지고 있습니다.",
+        "{scene}",
+    ],
+    # 캐릭터 배경
+    "background": [
+        "당신은 {place}에서 태어나 {profession}의 길을 걷게 되었습니다.",
+        "{era}의 상처가 남은 {place}에서 자란 당신은 일찍부터 {profession}의 재능을 보였습니다.",
+        "{faction}의 눈을 피해 떠돌던 어린 시절, 당신은 {profession}의 기술을 익혔습니다.",
+    ],
+    "turning_point": [
+        "{threat}에게 소중한 것을 잃은 날, 당신은 다시는 물러서지 않겠다고 다짐했습니다.",
+        "{person}의 가르침 덕분에 당신은 {profession}의 기술을 제대로 익힐 수 있었습니다.",
+        "{relic}에 얽힌 사건에 휘말린 뒤로 당신의 삶은 완전히 바뀌었습니다.",
+    ],
+    "principle": [
+        "당신은 약자를 버리지 않는다는 원칙을 지킵니다.",
+        "당신은 빚은 반드시 갚는다는 신념을 가지고 있습니다.",
+        "{faction}은(는) 믿지 않는다는 것이 당신의 철칙입니다.",
+        "당신은 눈앞의 이익보다 약속을 더 무겁게 여깁니다.",
+    ],
+    "trait": [
+        "긴장하면 {item}을(를) 만지작거리는 버릇이 있습니다.",
+        "왼쪽 뺨에 오래된 흉터가 있고, 웃을 때마다 그 흉터가 살짝 일그러집니다.",
+        "{sound}을(를) 들으면 저도 모르게 걸음을 멈춥니다.",
+    ],
+    "goal": [
+        "지금 당신은 {relic}의 행방을 쫓고 있습니다.",
+        "당신은 {place}에 남겨 두고 온 사람을 다시 만나기 위해 길을 떠났습니다.",
+        "당신의 목표는 {threat}의 정체를 밝히는 것입니다.",
+    ],
+    "character_detail": ["{turning_point}", "{principle}", "{trait}"],
+    "intro": [
+        "\"{profession}입니다. 필요한 일이 있다면 말씀하세요.\"",
+        "\"{place} 출신의 {profession}입니다. 길은 제가 찾겠습니다.\"",
+    ],
+}
+
+class BackupNarrator(ProceduralContentGenerator):
+    """테마와 상황을 슬롯으로 받아 문법 규칙을 펼쳐 백업 응답을 결정적으로 생성"""
+    def __init__(self, seed=0, fill_ratio=0.6, grammar=None, theme_words=None):
+        super().__init__(seed)
+        self.fill_ratio = fill_ratio    # 최대 길이(토큰당 2글자) 대비 채울 비율
+        self.grammar = grammar or BACKUP_GRAMMAR
+        self.theme_words = theme_words or BACKUP_THEME_WORDS
+
+    def _theme_words(self, prompt):
+        match = re.search(r"(?:세계 테마|테마):\s*(\S+)", prompt) or re.search(r"'([\w-]+)' 테마", prompt)
+        theme = match.group(1) if match and match.group(1) in THEME_WORDS else "fantasy"
+        return dict(THEME_WORDS[theme], **self.theme_words.get(theme, self.theme_words["fantasy"]))
+
+    def _slots(self, words, **values):
+        """테마 어휘와 프롬프트에서 읽은 값으로 슬롯 구성 (값이 없는 슬롯은 테마 어휘로 채움)"""
+        slots = {
+            "place": words["places"],
+            "person": words["people"],
+            "item": words["items"],
+            "threat": words["threats"],
+            "atmosphere": words["atmosphere"],
+            "landmark": words["landmarks"],
+            "sound": words["sounds"],
+            "smell": words["smells"],
+            "faction": words["factions"],
+            "relic": words["relics"],
+            "era": words["eras"],
+        }
+        slots["location"] = slots["place"]
+        for name, value in values.items():
+            if value:
+                slots[name] = value if isinstance(value, list) else [value]
+        return slots
+
+    def _choose(self, rng, symbol, options, used):
+        """아직 쓰지 않은 대안을 먼저 고름 (모두 썼으면 처음부터 다시 사용)"""
+        if used is None:
+            return rng.choice(options)
+        fresh = [option for option in options if (symbol, option) not in used]
+        if not fresh:
+            used.difference_update((symbol, option) for option in options)
+            fresh = options
+        choice = rng.choice(fresh)
+        used.add((symbol, choice))
+        return choice
+
+    def expand(self, symbol, rng, slots, used=None, depth=0):
+        """
+        기호 하나를 펼친 문장 반환
+
+        Args:
+            symbol (str): 문법 기호 또는 슬롯 이름 (슬롯이 우선)
+            rng (random.Random): 난수 생성기
+            slots (dict): 슬롯 이름 -> 값 목록
+            used (set): 이미 쓴 (기호, 대안) 집합 (주면 같은 응답 안에서 같은 표현의 반복을 줄임)
+            depth (int): 현재 펼침 깊이
+
+        Returns:
+            str: 펼친 문장 (조사는 아직 고르지 않은 상태)
+        """
+        if symbol in slots:
+            return self._choose(rng, symbol, slots[symbol], used)
+        alternatives = self.grammar.get(symbol)
+        if not alternatives or depth > MAX_DEPTH:
+            return ""
+        template = self._choose(rng, symbol, alternatives, used)
+        return PLACEHOLDER_PATTERN.sub(lambda match: self.expand(match.group(1), rng, slots, used, depth + 1), template)
+
+    def _fill(self, rng, symbol, slots, budget, sentences=None, used=None):
+        """글자 수가 budget에 이를 때까지 기호를 펼쳐 문장 추가 (겹치는 문장은 다시 뽑음)"""
+        sentences = list(sentences or [])
+        seen = set(sentences)
+        used = set() if used is None else used
+        length = sum(len(sentence) for sentence in sentences)
+        attempts = 0
+        while length < budget and attempts < budget:
+            attempts += 1
+            sentence = self.expand(symbol, rng, slots, used)
+            if not sentence or sentence in seen:
+                continue
+            seen.add(sentence)
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        return sentences
+
+    def _sentences(self, rng, words, count, location=None, bold_items=()):
+        """턴 응답의 묘사 문장도 문법 규칙으로 생성"""
+        slots = self._slots(words, location=location)
+        used = set()
+        sentences = [self.expand("found_item", rng, dict(slots, item=[item]), used) for item in bold_items]
+        while len(sentences) < count:
+            sentences.append(self.expand("scene", rng, slots, used))
+        return sentences
+
+    def _paragraphs(self, sentences, per_paragraph=4):
+        return super()._paragraphs(sentences, per_paragraph)
+
+    def generate(self, prompt, max_tokens=500):
+        """
+        프롬프트에 맞는 백업 응답 생성
+
+        Args:
+            prompt (str): 프롬프트
+            max_tokens (int): 생성할 최대 토큰 수 (대략 2글자당 1토큰, fill_ratio만큼 채움)
+
+        Returns:
+            str: 백업 응답 텍스트 (JSON을 요구하는 프롬프트에는 JSON 텍스트)
+        """
+        kind = self.detect_kind(prompt)
+        if kind not in ("world", "expansion", "character_options", "movement", "question", "story"):
+            return super().generate(prompt, max_tokens)
+
+        rng = self.rng_for(prompt)
+        words = self._theme_words(prompt)
+        budget = int(max_tokens * 2 * self.fill_ratio)
+        used = set()
+
+        if kind == "story":
+            action = TAG_PATTERN.sub("", self._field(prompt, "플레이어 행동", "")).rstrip(". ")
+            inventory = self._list_field(prompt, "소지품") or []
+            used_items = [name for name in inventory if name in action]
+            slots = self._slots(words, location=self._field(prompt, "현재 위치", None), action=action, own_item=used_items)
+            opening = [self.expand("action_open", rng, slots, used)] if action else []
+            opening += [self.expand("used_item", rng, slots, used)] if used_items else []
+            if "→ 성공" in prompt:
+                opening.append(self.expand("success", rng, slots, used))
+                # 성공하면 절반의 확률로 새 아이템 획득 (굵게 표시해 아이템 추출 단계에서 찾을 수 있게 함)
+                new_items = [item for item in words["items"] if item not in inventory]
+                if new_items and rng.random() < 0.5:
+                    opening.append(self.expand("found_item", rng, dict(slots, item=new_items), used))
+            elif "→ 실패" in prompt:
+                opening.append(self.expand("failure", rng, slots, used))
+            hook = self.expand("hook", rng, slots, used)
+            sentences = self._fill(rng, "scene", slots, budget - len(hook), opening, used)
+            text = self._paragraphs(sentences + [hook])
+        elif kind == "movement":
+            slots = self._slots(
+                words,
+                origin=self._field(prompt, "출발 위치", None),
+                destination=self._field(prompt, "목적지", None)
+            )
+            slots["location"] = slots["destination"] = [rng.choice(slots.get("destination", words["places"]))]
+            slots.setdefault("origin", words["places"])
+            opening = [self.expand("depart", rng, slots, used)]
+            ending = self._fill(rng, "arrival_scene", slots, budget // 4, [self.expand("arrive", rng, slots, used)], used)
+            journey = self._fill(rng, "journey", slots, budget - sum(len(sentence) for sentence in opening + ending), opening, used)
+            text = self._paragraphs(journey) + "\n\n" + " ".join(ending)
+        elif kind == "question":
+            question = self._field(prompt, "플레이어 질문", None) or self._field(prompt, "질문을 했습니다", "")
+            topic = extract_story_keywords(question, 1)
+            slots = self._slots(words, location=self._field(prompt, "현재 위치", None), topic=topic or ["그곳"])
+            opening = [self.expand("answer_open", rng, slots, used)]
+            closing = [self.expand("hint", rng, slots, used), self.expand("answer_close", rng, slots, used)]
+            sentences = self._fill(rng, "lore", slots, budget - sum(len(sentence) for sentence in closing), opening, used)
+            text = self._paragraphs(sentences + closing)
+        elif kind in ("world", "expansion"):
+            slots = self._slots(words)
+            places = rng.sample(words["places"], 3)
+            factions = rng.sample(words["factions"], 2)
+            sections = [
+                "# 기본 골격\n" + " ".join(self._fill(rng, "world_core", slots, budget // 4, used=used)),
+                "# 주요 지역\n" + "\n".join(f"- {place}: " + self.expand("region", rng, slots, used) for place in places),
+                "# 세력\n" + "\n".join(f"- {faction}: " + self.expand("faction_desc", rng, slots, used) for faction in factions),
+            ]
+            if kind == "expansion":
+                topic = re.search(r'"([^"]+)" 측면', prompt)
+                sections = sections[1:]
+                if topic:
+                    lore = self._fill(rng, "lore", dict(slots, topic=[topic.group(1)]), budget // 4, used=used)
+                    sections.insert(0, f"# {topic.group(1)}\n" + " ".join(lore))
+            length = sum(len(section) for section in sections)
+            sections.append("# 현재 상황\n" + self._paragraphs(self._fill(rng, "situation", slots, budget - length, used=used)))
+            text = "\n\n".join(sections)
+        else:
+            profession = re.search(r"'([^']+)' 직업", prompt)
+            slots = self._slots(words, profession=profession.group(1) if profession else "모험가")
+            options = []
+            for i in range(1, 4):
+                # 옵션마다 다른 배경이 되도록 옵션 안에서만 표현 반복을 피함
+                used = set()
+                sentences = [self.expand(symbol, rng, slots, used) for symbol in ("background", "turning_point", "principle", "trait")]
+                ending = [self.expand(symbol, rng, slots, used) for symbol in ("goal", "intro")]
+                sentences = self._fill(rng, "character_detail", slots, budget // 3 - sum(len(sentence) for sentence in ending), sentences, used)
+                options.append(f"#옵션 {i}:\n" + " ".join(sentences + ending))
+            text = "\n\n".join(options)
+
+        text = fix_particles(text)
+        return text[:max_tokens * 2]
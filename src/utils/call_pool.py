@@ -0,0 +1,79 @@
+"""
+마감 시간 적용 호출용 스레드 풀 유틸리티 모듈
+
+호출한 쪽이 마감 시간이 지나 결과를 기다리지 않아도 스레드에서 실행 중인 호출은 끝날 때까지 스레드를 붙잡고 있습니다.
+응답하지 않는 호출이 쌓여 모든 스레드가 사용 중이면 새 호출을 대기열에 넣지 않고 바로 거절해서
+회로 차단기가 열리도록 합니다 (대기열에 넣으면 마감 시간까지 기다리다 시간 초과로 끝남).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PoolSaturated(Exception):
+    """모든 호출 스레드가 사용 중이라 새 호출을 받을 수 없음"""
+    pass
+
+class CallPool:
+    """사용 중인 스레드 수를 추적하는 호출용 스레드 풀"""
+    def __init__(self, max_workers, thread_name_prefix="trpg-llm"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._busy = 0          # 실행 중인 호출 수 (마감 시간이 지나 버려진 호출 포함)
+        self._stats = {"submitted": 0, "rejected": 0, "max_busy": 0}
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        호출을 스레드에서 실행
+
+        Args:
+            fn (callable): 실행할 함수
+            *args, **kwargs: 함수 인자
+
+        Returns:
+            Future: 호출 결과
+
+        Raises:
+            PoolSaturated: 모든 스레드가 사용 중인 경우
+        """
+        with self._lock:
+            if self._busy >= self.max_workers:
+                self._stats["rejected"] += 1
+                raise PoolSaturated(f"호출 스레드 {self.max_workers}개가 모두 사용 중입니다")
+            self._busy += 1
+            self._stats["submitted"] += 1
+            self._stats["max_busy"] = max(self._stats["max_busy"], self._busy)
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._busy -= 1
+
+    def available(self):
+        """
+        바로 호출을 실행할 수 있는 스레드 수
+
+        Returns:
+            int: 사용 중이 아닌 스레드 수
+        """
+        with self._lock:
+            return self.max_workers - self._busy
+
+    def get_stats(self):
+        """
+        스레드 풀 통계 반환
+
+        Returns:
+            dict: 전체 스레드 수, 사용 중인 스레드 수, 실행한 호출 수, 거절한 호출 수, 최대 동시 사용 수
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["max_workers"] = self.max_workers
+            stats["busy"] = self._busy
+        return stats
@@ -0,0 +1,132 @@
+"""
+LLM 호출 기록/재생(cassette) 유틸리티 모듈
+
+기록 모드에서는 백엔드에 보낸 프롬프트와 응답(스트리밍이면 조각별 도착 시각 포함)을
+JSON lines 카세트 파일에 덧붙이고, 재생 모드에서는 같은 프롬프트에 기록된 응답을 순서대로 돌려줍니다.
+같은 프롬프트가 여러 번 기록되어 있으면 기록된 순서대로 하나씩 사용하고, 다 쓰면 마지막 응답을 반복합니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+CASSETTE_VERSION = 1
+
+def make_cassette_key(prompt, generation_config=None):
+    """
+    카세트 항목 키 생성 (모델 이름은 빼서 등급 라우팅 결과가 달라도 같은 키 사용)
+
+    Args:
+        prompt (str): 백엔드에 보낸 프롬프트
+        generation_config (dict): 생성 구성
+
+    Returns:
+        str: 키
+    """
+    payload = json.dumps(
+        {"prompt": prompt, "config": generation_config or {}},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CassetteMiss(LookupError):
+    """재생할 응답이 카세트에 없을 때 발생하는 예외"""
+    pass
+
+class Cassette:
+    """프롬프트 -> 응답 기록을 담은 카세트 파일"""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}      # 키 -> 기록된 순서의 항목 목록
+        self._cursors = {}      # 키 -> 다음에 재생할 항목 위치
+        self.header = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("type") == "header":
+                    self.header = record
+                    continue
+                self._entries.setdefault(record["key"], []).append(record)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, prompt, generation_config, latency, text=None, chunks=None, error=None, model_name=None):
+        """
+        호출 한 번을 카세트에 기록
+
+        Args:
+            prompt (str): 백엔드에 보낸 프롬프트
+            generation_config (dict): 생성 구성
+            latency (float): 응답(스트리밍이면 마지막 조각)까지 걸린 시간(초)
+            text (str): 응답 텍스트 (스트리밍이 아닌 경우)
+            chunks (list): 스트리밍 응답의 [첫 요청부터의 경과 시간(초), 조각 텍스트] 목록
+            error (str): 호출이 실패했으면 예외 메시지 (스트리밍 도중 실패하면 받은 조각과 함께 기록)
+            model_name (str): 실제로 호출한 모델 이름 (참고용)
+        """
+        record = {
+            "type": "call",
+            "key": make_cassette_key(prompt, generation_config),
+            "prompt": prompt,
+            "model": model_name,
+            "latency": round(latency, 4),
+            "stream": chunks is not None,
+        }
+        if chunks is not None:
+            record["chunks"] = [[round(offset, 4), chunk] for offset, chunk in chunks]
+        elif error is None:
+            record["text"] = text
+        if error is not None:
+            record["error"] = error
+
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._entries.setdefault(record["key"], []).append(record)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if is_new:
+                    self.header = {"type": "header", "version": CASSETTE_VERSION, "created": round(time.time(), 3)}
+                    f.write(json.dumps(self.header) + "\n")
+                f.write(line + "\n")
+
+    def next_entry(self, prompt, generation_config):
+        """
+        프롬프트에 기록된 다음 응답 항목 반환
+
+        Args:
+            prompt (str): 백엔드에 보낸 프롬프트
+            generation_config (dict): 생성 구성
+
+        Returns:
+            dict: 기록 항목
+
+        Raises:
+            CassetteMiss: 기록된 응답이 없는 경우
+        """
+        key = make_cassette_key(prompt, generation_config)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"카세트에 기록되지 않은 프롬프트입니다: {prompt[:40]!r}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+    def rewind(self):
+        """모든 프롬프트의 재생 위치를 처음으로 되돌림"""
+        with self._lock:
+            self._cursors.clear()
@@ -0,0 +1,183 @@
+"""
+AI 호출 장애 감지 및 재시도 간격 조절 유틸리티 모듈
+
+연속된 실패가 감지되면 일정 시간 동안 호출을 차단(open)하고, 차단 시간이 지나면
+소수의 시험 호출(half-open)로 복구 여부를 확인합니다. 프로세스 전체에서 하나의
+인스턴스를 공유하므로 한 세션에서 감지한 장애가 다른 세션도 보호합니다.
+"""
+import asyncio
+import random
+import threading
+import time
+import concurrent.futures
+
+# 회로 상태
+CLOSED = "closed"        # 정상 호출
+OPEN = "open"            # 호출 차단 (백업 응답 사용)
+HALF_OPEN = "half_open"  # 시험 호출로 복구 확인 중
+
+# 오류 분류에 사용할 예외 이름/메시지 단서
+QUOTA_HINTS = ("resourceexhausted", "toomanyrequests", "429", "quota", "rate limit")
+SAFETY_HINTS = ("stopcandidate", "blockedprompt", "safety", "blocked", "finish_reason")
+AUTH_HINTS = ("permissiondenied", "unauthenticated", "api key", "api_key", "401", "403")
+TIMEOUT_HINTS = ("deadlineexceeded", "deadline", "timed out", "timeout")
+SATURATED_HINTS = ("poolsaturated",)
+
+def classify_error(error):
+    """
+    예외를 오류 분류로 변환
+
+    Args:
+        error (Exception): 발생한 예외
+
+    Returns:
+        str: "quota", "timeout", "safety", "auth", "saturated", "transient" 중 하나
+    """
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError)):
+        return "timeout"
+
+    text = f"{type(error).__name__} {error}".lower()
+    if any(hint in text for hint in SATURATED_HINTS):
+        return "saturated"
+    if any(hint in text for hint in QUOTA_HINTS):
+        return "quota"
+    if any(hint in text for hint in SAFETY_HINTS):
+        return "safety"
+    if any(hint in text for hint in AUTH_HINTS):
+        return "auth"
+    if any(hint in text for hint in TIMEOUT_HINTS):
+        return "timeout"
+    return "transient"
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    지수 백오프 + 전체 지터(full jitter) 대기 시간 계산
+
+    Args:
+        attempt (int): 재시도 순번 (0부터 시작)
+        base_delay (float): 기본 대기 시간(초)
+        max_delay (float): 최대 대기 시간(초)
+
+    Returns:
+        float: 대기 시간(초)
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    """연속 실패 시 호출을 차단하고 시험 호출로 자동 복구하는 회로 차단기"""
+    def __init__(self, failure_threshold=3, recovery_timeout=15.0, max_recovery_timeout=300.0, half_open_max_calls=1):
+        self.failure_threshold = failure_threshold          # 차단까지 허용하는 연속 실패 수
+        self.recovery_timeout = recovery_timeout            # 기본 차단 시간(초)
+        self.max_recovery_timeout = max_recovery_timeout    # 최대 차단 시간(초)
+        self.half_open_max_calls = half_open_max_calls      # 동시에 허용하는 시험 호출 수
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_for = recovery_timeout
+        self._probes = 0
+        self._stats = {"opened": 0, "rejected": 0, "successes": 0, "failures": 0, "last_error": None}
+
+    def allow_request(self):
+        """
+        호출 가능 여부 확인
+
+        차단 시간이 지났으면 half-open 상태로 전환하고 시험 호출을 허용합니다.
+
+        Returns:
+            bool: 호출해도 되면 True
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_for:
+                self._state = HALF_OPEN
+                self._probes = 0
+
+            if self._state == CLOSED:
+                return True
+
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+
+            self._stats["rejected"] += 1
+            return False
+
+    def cancel_request(self):
+        """allow_request로 허용받은 호출을 하지 않았을 때 시험 호출 자리 반환"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def record_success(self):
+        """호출 성공 기록 - 시험 호출이 성공하면 회로를 닫음"""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._open_for = self.recovery_timeout
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._probes = 0
+
+    def record_failure(self, error_class, count=True, open_for=None):
+        """
+        호출 실패 기록
+
+        Args:
+            error_class (str): 오류 분류
+            count (bool): 연속 실패 수에 포함할지 여부 (안전 차단 등은 서비스 장애가 아님)
+            open_for (float): 즉시 차단할 시간(초), None이면 연속 실패 수로 판단
+        """
+        with self._lock:
+            self._stats["failures"] += 1
+            self._stats["last_error"] = error_class
+
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+            if not count:
+                return
+
+            self._failures += 1
+            if open_for is not None:
+                self._open(max(open_for, self._open_for))
+            elif self._state == HALF_OPEN:
+                # 시험 호출 실패 시 차단 시간을 늘려서 다시 차단
+                self._open(min(self._open_for * 2, self.max_recovery_timeout))
+            elif self._failures >= self.failure_threshold:
+                self._open(self._open_for)
+
+    def _open(self, open_for):
+        """회로 차단 (잠금을 잡은 상태에서 호출)"""
+        if self._state != OPEN:
+            self._stats["opened"] += 1
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._open_for = min(open_for, self.max_recovery_timeout)
+        self._probes = 0
+
+    def get_state(self):
+        """
+        현재 회로 상태 반환
+
+        Returns:
+            str: "closed", "open", "half_open" 중 하나
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_for:
+                return HALF_OPEN
+            return self._state
+
+    def get_stats(self):
+        """
+        회로 차단기 통계 반환
+
+        Returns:
+            dict: 상태, 연속 실패 수, 남은 차단 시간, 누적 통계
+        """
+        state = self.get_state()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = state
+            stats["consecutive_failures"] = self._failures
+            stats["retry_after"] = max(self._opened_at + self._open_for - time.monotonic(), 0.0) if state == OPEN else 0.0
+        return stats
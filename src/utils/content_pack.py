@@ -0,0 +1,380 @@
+"""
+오프라인 콘텐츠 팩 유틸리티 모듈
+
+테마별 세계관, 직업별 배경 옵션, 고정 위치 사이의 이동 스토리를 미리 생성해 하나의 바이너리 팩 파일에 담고,
+실행 중에는 파일을 메모리 매핑해서 필요한 항목만 읽습니다. 프로세스마다 팩 전체를 불러오지 않으며
+항목 하나를 뽑는 데 드는 비용은 팩 크기와 관계없이 일정합니다.
+
+파일 구조 (숫자는 모두 little-endian):
+    헤더     magic(8바이트) | version(uint32) | 목차 길이(uint32)
+    목차     UTF-8 JSON - {"metadata": {...}, "compression": "zlib" 또는 null,
+                          "sections": {구역 키: [오프셋 표 시작 번호, 항목 수]}}
+    오프셋 표 uint64 배열 - 구역마다 항목 수 + 1개 (데이터 영역 기준 시작 위치, 마지막은 끝 위치)
+    데이터   항목 텍스트 (UTF-8, 설정하면 항목마다 zlib 압축)
+
+팩 만들기 예:
+    python -m src.utils.content_pack --out packs/content.pack --backend stub --worlds 8 --backgrounds 4 --movements 4
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+PACK_MAGIC = b"TRPGPACK"
+PACK_VERSION = 1
+HEADER = struct.Struct("<8sII")
+OFFSET = struct.Struct("<Q")
+
+def make_section_key(kind, theme, *parts):
+    """
+    팩 구역 키 생성
+
+    Args:
+        kind (str): 콘텐츠 종류 (world, background, movement)
+        theme (str): 세계관 테마
+        *parts: 직업, 출발 위치/목적지 등 추가 구분
+
+    Returns:
+        str: "movement/fantasy/왕국의 수도/고대 숲" 형태의 키
+    """
+    return "/".join((kind, theme) + tuple(parts))
+
+class ContentPackWriter:
+    """구역별 항목을 모아 콘텐츠 팩 파일로 쓰는 작성기"""
+    def __init__(self, compress=True):
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._sections = {}     # 구역 키 -> 항목 목록 (같은 항목은 한 번만)
+
+    def add(self, section, text):
+        """
+        구역에 항목 하나 추가
+
+        Args:
+            section (str): 구역 키
+            text (str): 항목 텍스트
+
+        Returns:
+            bool: 추가했으면 True (비어 있거나 이미 있는 항목이면 False)
+        """
+        text = (text or "").strip()
+        if not text:
+            return False
+        with self._lock:
+            entries = self._sections.setdefault(section, [])
+            if text in entries:
+                return False
+            entries.append(text)
+            return True
+
+    def counts(self):
+        """구역별 항목 수 반환"""
+        with self._lock:
+            return {section: len(entries) for section, entries in self._sections.items()}
+
+    def write(self, path, metadata=None):
+        """
+        콘텐츠 팩 파일 쓰기 (임시 파일에 쓴 뒤 바꿔서 읽는 중인 팩이 깨지지 않게 함)
+
+        Args:
+            path (str): 팩 파일 경로
+            metadata (dict): 목차에 함께 기록할 정보 (생성 백엔드 등)
+
+        Returns:
+            dict: 구역 수, 항목 수, 파일 크기(바이트)
+        """
+        with self._lock:
+            sections = {section: list(entries) for section, entries in sorted(self._sections.items())}
+
+        toc = {"metadata": metadata or {}, "compression": "zlib" if self.compress else None, "sections": {}}
+        offsets, blobs, position = [], [], 0
+        for section, entries in sections.items():
+            toc["sections"][section] = [len(offsets), len(entries)]
+            for text in entries:
+                data = text.encode("utf-8")
+                if self.compress:
+                    data = zlib.compress(data, 9)
+                offsets.append(position)
+                blobs.append(data)
+                position += len(data)
+            offsets.append(position)
+        toc_bytes = json.dumps(toc, ensure_ascii=False).encode("utf-8")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(toc_bytes)))
+            f.write(toc_bytes)
+            f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+            f.write(b"".join(blobs))
+        os.replace(temp_path, path)
+        return {
+            "sections": len(sections),
+            "entries": sum(len(entries) for entries in sections.values()),
+            "bytes": os.path.getsize(path)
+        }
+
+class ContentPack:
+    """메모리 매핑한 콘텐츠 팩 (여러 스레드에서 함께 읽어도 안전)"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, toc_length = HEADER.unpack_from(self._mmap, 0)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                raise ValueError(f"콘텐츠 팩 형식이 아닙니다: {path}")
+            toc = json.loads(self._mmap[HEADER.size:HEADER.size + toc_length].decode("utf-8"))
+        except Exception:
+            self._mmap.close()
+            raise
+        self.metadata = toc.get("metadata", {})
+        self.compression = toc.get("compression")
+        self._sections = {section: tuple(value) for section, value in toc["sections"].items()}
+        self._offsets_start = HEADER.size + toc_length
+        offset_count = sum(count + 1 for _, count in self._sections.values())
+        self._data_start = self._offsets_start + offset_count * OFFSET.size
+
+    def __contains__(self, section):
+        return self.count(section) > 0
+
+    def sections(self, prefix=""):
+        """
+        구역 키 목록
+
+        Args:
+            prefix (str): 이 문자열로 시작하는 구역만 반환
+
+        Returns:
+            list: 정렬된 구역 키 목록
+        """
+        return sorted(section for section in self._sections if section.startswith(prefix))
+
+    def count(self, section):
+        """구역의 항목 수 (없는 구역이면 0)"""
+        return self._sections.get(section, (0, 0))[1]
+
+    def get(self, section, index):
+        """
+        구역의 항목 하나 읽기 (해당 항목이 있는 페이지만 읽음)
+
+        Args:
+            section (str): 구역 키
+            index (int): 항목 번호
+
+        Returns:
+            str: 항목 텍스트
+
+        Raises:
+            KeyError: 없는 구역
+            IndexError: 범위를 벗어난 번호
+        """
+        first, count = self._sections[section]
+        if not 0 <= index < count:
+            raise IndexError(f"{section} 구역에는 항목이 {count}개뿐입니다: {index}")
+        position = self._offsets_start + (first + index) * OFFSET.size
+        start, = OFFSET.unpack_from(self._mmap, position)
+        end, = OFFSET.unpack_from(self._mmap, position + OFFSET.size)
+        data = self._mmap[self._data_start + start:self._data_start + end]
+        if self.compression == "zlib":
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def sample(self, section, count=1, rng=None):
+        """
+        구역에서 서로 다른 항목을 무작위로 뽑기
+
+        Args:
+            section (str): 구역 키
+            count (int): 뽑을 항목 수 (구역의 항목 수보다 많으면 있는 만큼)
+            rng (random.Random): 난수 생성기 (None이면 모듈 전역 난수)
+
+        Returns:
+            list: 항목 텍스트 목록 (없는 구역이면 빈 목록)
+        """
+        total = self.count(section)
+        if total == 0:
+            return []
+        indexes = (rng or random).sample(range(total), min(count, total))
+        return [self.get(section, index) for index in indexes]
+
+    def stats(self):
+        """
+        팩 통계 반환
+
+        Returns:
+            dict: 경로, 구역 수, 항목 수, 파일 크기(바이트), 종류별 구역 수
+        """
+        kinds = {}
+        for section in self._sections:
+            kind = section.split("/", 1)[0]
+            kinds[kind] = kinds.get(kind, 0) + 1
+        return {
+            "path": self.path,
+            "sections": len(self._sections),
+            "entries": sum(count for _, count in self._sections.values()),
+            "bytes": len(self._mmap),
+            "kinds": kinds
+        }
+
+    def close(self):
+        """메모리 매핑 해제"""
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def build_content_pack(writer, generate, jobs, max_workers=4, progress=None):
+    """
+    생성 작업 목록을 실행해 작성기에 항목 추가
+
+    Args:
+        writer (ContentPackWriter): 항목을 모을 작성기
+        generate (callable): (프롬프트, 최대 토큰 수) -> 응답 텍스트
+        jobs (list): (구역 키, 프롬프트, 최대 토큰 수, 응답 -> 항목 목록 변환 함수 또는 None) 목록
+        max_workers (int): 동시에 실행할 생성 작업 수
+        progress (callable): 작업 하나가 끝날 때마다 (끝난 수, 전체 수)로 호출
+
+    Returns:
+        dict: 완료/실패한 작업 수
+    """
+    done = failed = 0
+    lock = threading.Lock()
+
+    def run(job):
+        nonlocal done, failed
+        section, prompt, max_tokens, split = job
+        try:
+            response = generate(prompt, max_tokens)
+            for text in (split(response) if split else [response]):
+                writer.add(section, text)
+            succeeded = True
+        except Exception:
+            succeeded = False
+        with lock:
+            done += succeeded
+            failed += not succeeded
+            finished = done + failed
+        if progress:
+            progress(finished, len(jobs))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(run, jobs))
+    return {"done": done, "failed": failed}
+
+def create_pack_generator(backend_name, seed=0):
+    """
+    팩 생성에 쓸 텍스트 생성 함수 만들기
+
+    Args:
+        backend_name (str): narrator(절차적 백업 응답), gemini, 또는 llm_backends.create_backend가 아는 이름
+        seed (int): narrator 시드
+
+    Returns:
+        callable: (프롬프트, 최대 토큰 수) -> 응답 텍스트
+    """
+    if backend_name == "narrator":
+        from .backup_narrative import BackupNarrator
+
+        narrator = BackupNarrator(seed=seed)
+        return narrator.generate
+
+    from ..modules.ai_service import build_generation_config
+    from ..modules.llm_backends import GeminiBackend, create_backend
+
+    if backend_name == "gemini":
+        import google.generativeai as genai
+        from ..config.constants import API_KEY_SECRET_NAME, LLM_MODEL_TIERS
+
+        genai.configure(api_key=os.environ[API_KEY_SECRET_NAME])
+        backend = GeminiBackend(genai.GenerativeModel(LLM_MODEL_TIERS["pro"]["models"][0]))
+    else:
+        backend = create_backend(backend_name)
+
+    def generate(prompt, max_tokens):
+        return backend.generate_content(prompt, generation_config=build_generation_config(max_tokens)).text
+
+    return generate
+
+def main():
+    """명령줄에서 콘텐츠 팩 생성"""
+    from ..config.constants import (
+        CONTENT_PACK_SETTINGS,
+        THEME_LOCATIONS,
+        THEME_PROFESSIONS,
+        LOCATION_GRAPH_NODES,
+        LOCATION_GRAPH_SETTINGS
+    )
+    from .location_graph import LocationGraph
+    from ..modules.ai_service import (
+        build_world_prompt,
+        build_character_options_prompt,
+        build_movement_prompt,
+        parse_character_options
+    )
+
+    variants = CONTENT_PACK_SETTINGS["variants"]
+    parser = argparse.ArgumentParser(description="TRPG 오프라인 콘텐츠 팩 생성")
+    parser.add_argument("--out", default=CONTENT_PACK_SETTINGS["path"])
+    parser.add_argument("--backend", default="narrator", help="narrator, gemini, stub, http, local")
+    parser.add_argument("--themes", default=",".join(THEME_LOCATIONS), help="쉼표로 구분한 테마 목록")
+    parser.add_argument("--worlds", type=int, default=variants["world"], help="테마별 세계관 수")
+    parser.add_argument("--backgrounds", type=int, default=variants["background"], help="직업별 배경 생성 횟수 (한 번에 3개)")
+    parser.add_argument("--movements", type=int, default=variants["movement"], help="이동 경로별 스토리 수")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compress", action="store_true")
+    args = parser.parse_args()
+
+    # 같은 프롬프트에 같은 응답을 주는 백엔드에서도 서로 다른 항목이 나오도록 변형 번호를 붙임
+    def variant(prompt, index):
+        return f"{prompt}\n    (변형 {index + 1})\n"
+
+    jobs = []
+    for theme in [theme.strip() for theme in args.themes.split(",") if theme.strip()]:
+        for i in range(args.worlds):
+            jobs.append((make_section_key("world", theme), variant(build_world_prompt(theme), i), 800, None))
+        for profession in THEME_PROFESSIONS.get(theme, []):
+            prompt = build_character_options_prompt(profession, theme)
+            for i in range(args.backgrounds):
+                jobs.append((
+                    make_section_key("background", theme, profession),
+                    variant(prompt, i),
+                    800,
+                    lambda response, profession=profession: parse_character_options(response, profession, fill=False)
+                ))
+        graph = LocationGraph(
+            THEME_LOCATIONS.get(theme, []),
+            LOCATION_GRAPH_NODES.get(theme),
+            default_danger=LOCATION_GRAPH_SETTINGS["default_danger"],
+            travel_speed=LOCATION_GRAPH_SETTINGS["travel_speed"],
+            long_distance=LOCATION_GRAPH_SETTINGS["long_distance"]
+        )
+        for route in graph.edges():
+            origin, destination = route["origin"], route["destination"]
+            prompt = build_movement_prompt(origin, destination, theme, route)
+            for i in range(args.movements):
+                jobs.append((make_section_key("movement", theme, origin, destination), variant(prompt, i), 500, None))
+
+    writer = ContentPackWriter(compress=not args.no_compress)
+
+    def progress(finished, total):
+        if finished == total or finished % 50 == 0:
+            print(f"{finished}/{total} 작업 완료")
+
+    result = build_content_pack(writer, create_pack_generator(args.backend, args.seed), jobs, args.workers, progress)
+    stats = writer.write(args.out, {"backend": args.backend, "themes": args.themes})
+    print(f"{args.out}: 구역 {stats['sections']}개, 항목 {stats['entries']}개, {stats['bytes']:,}바이트 (실패한 작업 {result['failed']}개)")
+
+if __name__ == "__main__":
+    main()
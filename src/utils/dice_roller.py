@@ -1,11 +1,28 @@
 """
 주사위 굴리기 관련 유틸리티 함수 모듈
 """
+import os
 import random
 import re
 import time
 import streamlit as st
 
+from ..config.constants import DICE_SEED_ENV_VAR
+
+# 주사위 결과용 난수 생성기 (시드를 정하면 기록/재생 세션에서 같은 결과 순서를 재현)
+# 시드는 모듈을 불러올 때 환경 변수 TRPG_DICE_SEED에서만 정하므로, 이 모듈이 다른 경로
+# (utils.dice_roller, src.utils.dice_roller)로 한 번 더 로드되어도 각 사본이 같은 시드로 시작함
+_dice_rng = random.Random(os.environ.get(DICE_SEED_ENV_VAR))
+
+def get_dice_rng():
+    """
+    주사위 결과용 난수 생성기 반환 (게임 결과에 영향을 주는 무작위 선택에 사용)
+    
+    Returns:
+        random.Random: 난수 생성기
+    """
+    return _dice_rng
+
 def roll_dice(dice_type=20, num_dice=1):
     """
     주사위 굴리기 함수
@@ -17,7 +34,7 @@ def roll_dice(dice_type=20, num_dice=1):
     Returns:
         list: 주사위 결과 목록
     """
-    return [random.randint(1, dice_type) for _ in range(num_dice)]
+    return [_dice_rng.randint(1, dice_type) for _ in range(num_dice)]
 
 def calculate_dice_result(dice_expression):
     """
@@ -107,7 +124,7 @@ def display_dice_animation(placeholder, dice_expression='1d20', duration=1.0):
     
     # 애니메이션 표시
     while time.time() - start_time < duration:
-        # 임시 주사위 결과 생성
+        # 임시 주사위 결과 생성 (화면 효과용이라 주사위 난수 생성기를 쓰지 않음)
         temp_rolls = [random.randint(1, dice_type) for _ in range(num_dice)]
         temp_total = sum(temp_rolls) + modifier_value
         
@@ -0,0 +1,175 @@
+"""
+지연 꼬리 대응 중복 호출(hedging) 유틸리티 모듈
+
+호출 위치별로 최근 응답 시간을 관측해 두고, 관측된 백분위(p90 등) 시간이 지나도 응답이 없으면
+같은 요청을 한 번 더 보내 먼저 성공한 응답을 사용합니다.
+중복 호출은 전체 호출 수에 비례해 충전되는 예산 안에서만 허용해서 추가 트래픽 비율을 제한합니다.
+"""
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+class HedgeBudget:
+    """호출마다 ratio만큼 충전되고 중복 호출마다 1씩 쓰는 예산 (추가 트래픽 비율 제한)"""
+    def __init__(self, ratio, burst):
+        self.ratio = ratio      # 호출 한 번당 충전량 (허용할 추가 트래픽 비율)
+        self.burst = burst      # 최대 보유량 (한꺼번에 쓸 수 있는 중복 호출 수)
+        self.available = 0.0
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        """일반 호출 한 번만큼 예산 충전"""
+        with self._lock:
+            self.available = min(self.burst, self.available + self.ratio)
+
+    def try_spend(self):
+        """
+        중복 호출 한 번만큼 예산 사용
+
+        Returns:
+            bool: 예산이 있어 사용했으면 True
+        """
+        with self._lock:
+            if self.available < 1:
+                return False
+            self.available -= 1
+            return True
+
+class Hedger:
+    """관측된 응답 시간 백분위가 지나면 중복 호출하고 먼저 성공한 결과를 사용하는 실행기"""
+    def __init__(self, percentile=0.9, min_samples=20, window=200, min_delay=0.5, budget_ratio=0.05, budget_burst=5):
+        self.percentile = percentile
+        self.min_samples = min_samples    # 이만큼 관측하기 전에는 중복 호출하지 않음
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(budget_ratio, budget_burst)
+        self._window = window
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "admit_denied": 0}
+
+    def observe(self, key, latency):
+        """
+        중복 호출 없이 끝난 호출의 응답 시간 기록
+
+        Args:
+            key: 호출 위치 등 응답 시간을 모을 키
+            latency (float): 응답 시간(초)
+        """
+        with self._lock:
+            self._latencies.setdefault(key, collections.deque(maxlen=self._window)).append(latency)
+
+    def get_delay(self, key):
+        """
+        중복 호출 전 대기 시간 계산
+
+        Args:
+            key: 응답 시간을 모은 키
+
+        Returns:
+            float or None: 관측된 백분위 응답 시간(초) 또는 관측이 부족하면 None
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(len(samples) * self.percentile), len(samples) - 1)
+        return max(samples[index], self.min_delay)
+
+    def run(self, key, start, timeout, admit=None, discard=None):
+        """
+        호출을 실행하고 백분위 시간이 지나도 끝나지 않으면 한 번 더 호출
+
+        먼저 성공한 결과를 반환하고 남은 호출은 취소합니다.
+        이미 실행 중이라 취소할 수 없는 호출의 결과는 discard로 정리합니다.
+        첫 호출이 중복 호출 전에 실패하면 그 예외를 그대로 전달해서 호출한 쪽의 재시도 정책을 따릅니다.
+
+        Args:
+            key: 응답 시간을 모을 키 (호출 위치 이름 등)
+            start (callable): 호출을 시작하고 Future를 반환하는 함수
+            timeout (float): 결과를 기다릴 최대 시간(초)
+            admit (callable): 중복 호출 직전에 호출해서 False면 중복 호출하지 않음 (속도 제한 확인 등)
+            discard (callable): 늦게 끝난 호출의 결과를 받아 정리하는 함수
+
+        Returns:
+            먼저 성공한 호출의 결과
+
+        Raises:
+            TimeoutError: 마감 시간 안에 성공한 호출이 없는 경우
+            Exception: 모든 호출이 실패한 경우 마지막 예외
+        """
+        self.budget.record_call()
+        deadline = time.monotonic() + timeout
+        started_at = time.monotonic()
+        primary = start()
+
+        def observe_primary(future):
+            # 중복 호출에 졌더라도 첫 호출이 끝난 시간은 응답 시간 분포에 반영
+            if not future.cancelled() and future.exception() is None:
+                self.observe(key, time.monotonic() - started_at)
+        primary.add_done_callback(observe_primary)
+
+        with self._lock:
+            self._stats["calls"] += 1
+
+        pending = [primary]
+        delay = self.get_delay(key)
+        if delay is not None and delay < timeout:
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                if not self.budget.try_spend():
+                    self._count("budget_denied")
+                elif admit is not None and not admit():
+                    self._count("admit_denied")
+                else:
+                    self._count("hedged")
+                    pending.append(start())
+
+        error = None
+        while pending:
+            done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                pending.remove(future)
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is not primary:
+                    self._count("hedge_wins")
+                self._abandon(pending, discard)
+                return future.result()
+
+        self._abandon(pending, discard)
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError("중복 호출 마감 시간 초과")
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _abandon(futures, discard):
+        """진 호출을 취소하고 이미 실행 중이면 끝난 뒤 결과 정리"""
+        for future in futures:
+            if future.cancel() or discard is None:
+                continue
+            future.add_done_callback(
+                lambda f: discard(f.result()) if not f.cancelled() and f.exception() is None else None
+            )
+
+    def get_stats(self):
+        """
+        중복 호출 통계 반환
+
+        Returns:
+            dict: 호출 수, 중복 호출 수와 비율, 중복 호출이 이긴 수, 예산 부족/속도 제한으로 건너뛴 수, 키별 대기 시간
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            keys = list(self._latencies)
+        stats["hedge_rate"] = stats["hedged"] / stats["calls"] if stats["calls"] else 0.0
+        stats["budget_available"] = self.budget.available
+        stats["delays"] = {key: self.get_delay(key) for key in keys}
+        return stats
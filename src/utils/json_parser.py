@@ -0,0 +1,241 @@
+"""
+AI 응답 JSON 파싱 유틸리티 모듈
+
+코드 블록이나 설명 문장이 섞인 응답, 중간에 잘린 응답, 스트리밍 중인 응답에서도
+JSON 값을 최대한 복원하고 스키마에 맞게 검증합니다.
+"""
+import json
+import re
+
+class SchemaError(ValueError):
+    """JSON 데이터가 스키마와 맞지 않을 때 발생하는 예외"""
+    pass
+
+def _find_json_start(text):
+    """첫 번째 JSON 객체/배열 시작 위치 반환 (없으면 -1)"""
+    positions = [pos for pos in (text.find("{"), text.find("[")) if pos != -1]
+    return min(positions) if positions else -1
+
+def _scan(text, start):
+    """
+    JSON 값의 끝 위치와 닫히지 않은 괄호 목록을 문자열 인식하며 탐색
+
+    Returns:
+        tuple: (완결된 값의 끝 위치 또는 None, 닫히지 않은 괄호 스택, 문자열 내부 여부)
+    """
+    stack = []
+    in_string = False
+    escaped = False
+
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return i + 1, [], False
+
+    return None, stack, in_string
+
+def _repair(fragment, stack, in_string):
+    """잘린 JSON 조각을 닫아서 파싱 가능한 형태로 복원"""
+    if in_string:
+        # 이스케이프 문자 중간에서 잘린 경우 제거
+        if fragment.endswith("\\"):
+            fragment = fragment[:-1]
+        fragment += '"'
+
+    # 끝에 남은 쉼표와 값이 없는 키 정리
+    inside_object = bool(stack) and stack[-1] == "{"
+    while True:
+        fragment = fragment.rstrip()
+        trimmed = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:$', r"\1", fragment)
+        if inside_object:
+            # 객체 안에서 콜론 없이 끝난 문자열은 키이므로 제거
+            trimmed = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"$', r"\1", trimmed)
+        trimmed = re.sub(r',$', "", trimmed)
+        if trimmed == fragment:
+            break
+        fragment = trimmed
+
+    closing = "".join("}" if bracket == "{" else "]" for bracket in reversed(stack))
+    return fragment + closing
+
+def extract_json(text, allow_partial=True):
+    """
+    텍스트에서 JSON 값 추출
+
+    Args:
+        text (str): AI 응답 텍스트
+        allow_partial (bool): 잘린 JSON을 닫아서 복원할지 여부
+
+    Returns:
+        dict or list: 파싱된 JSON 값
+
+    Raises:
+        ValueError: JSON 값을 찾거나 복원할 수 없는 경우
+    """
+    if not isinstance(text, str):
+        raise ValueError("응답이 문자열이 아닙니다")
+
+    # 코드 블록 표시 제거
+    cleaned = re.sub(r"```(?:json)?", "", text)
+    start = _find_json_start(cleaned)
+    if start == -1:
+        raise ValueError("응답에서 JSON을 찾을 수 없습니다")
+
+    end, stack, in_string = _scan(cleaned, start)
+    if end is not None:
+        return json.loads(cleaned[start:end])
+
+    if not allow_partial:
+        raise ValueError("JSON 응답이 완결되지 않았습니다")
+
+    return json.loads(_repair(cleaned[start:], stack, in_string))
+
+class IncrementalJSONParser:
+    """스트리밍 조각을 받아 지금까지의 부분 JSON 값을 반환하는 파서"""
+    def __init__(self):
+        self.text = ""
+
+    def feed(self, chunk):
+        """
+        새 조각을 추가하고 현재까지 복원 가능한 값 반환
+
+        Args:
+            chunk (str): 스트리밍 응답 조각
+
+        Returns:
+            dict or list or None: 부분 JSON 값 (아직 복원할 수 없으면 None)
+        """
+        self.text += chunk
+        try:
+            return extract_json(self.text)
+        except ValueError:
+            return None
+
+    def result(self):
+        """
+        최종 JSON 값 반환
+
+        Raises:
+            ValueError: JSON 값을 복원할 수 없는 경우
+        """
+        return extract_json(self.text)
+
+def _coerce(value, schema, path):
+    """스키마 타입에 맞게 값을 변환하고 검증"""
+    expected = schema.get("type", "string").lower()
+
+    if value is None:
+        if schema.get("nullable"):
+            return None
+        raise SchemaError(f"{path}: null 값은 허용되지 않습니다")
+
+    if expected == "object":
+        if not isinstance(value, dict):
+            raise SchemaError(f"{path}: 객체가 아닙니다")
+        result = {}
+        properties = schema.get("properties", {})
+        for key, prop_schema in properties.items():
+            if key not in value:
+                continue
+            try:
+                result[key] = _coerce(value[key], prop_schema, f"{path}.{key}")
+            except SchemaError:
+                if key in schema.get("required", []):
+                    raise
+        for key in schema.get("required", []):
+            if key not in result:
+                raise SchemaError(f"{path}: 필수 항목 '{key}'이(가) 없습니다")
+        return result
+
+    if expected == "array":
+        if not isinstance(value, list):
+            raise SchemaError(f"{path}: 배열이 아닙니다")
+        items_schema = schema.get("items", {})
+        result = []
+        for index, item in enumerate(value):
+            # 잘못된 항목만 버리고 나머지는 유지
+            try:
+                result.append(_coerce(item, items_schema, f"{path}[{index}]"))
+            except SchemaError:
+                continue
+        return result
+
+    if expected == "string":
+        if isinstance(value, (dict, list)):
+            raise SchemaError(f"{path}: 문자열이 아닙니다")
+        value = str(value).strip()
+        if "enum" in schema and value not in schema["enum"]:
+            raise SchemaError(f"{path}: 허용되지 않는 값 '{value}'")
+        return value
+
+    if expected == "integer":
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            raise SchemaError(f"{path}: 정수가 아닙니다")
+
+    if expected == "number":
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            raise SchemaError(f"{path}: 숫자가 아닙니다")
+
+    if expected == "boolean":
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ("true", "false"):
+            return str(value).lower() == "true"
+        raise SchemaError(f"{path}: 참/거짓 값이 아닙니다")
+
+    return value
+
+def validate_json(data, schema):
+    """
+    JSON 값을 스키마에 맞게 검증하고 정리
+
+    배열의 잘못된 항목과 잘못된 선택 항목은 버리고, 필수 항목이 잘못되면 예외를 발생시킵니다.
+
+    Args:
+        data: 파싱된 JSON 값
+        schema (dict): 검증할 스키마
+
+    Returns:
+        정리된 JSON 값
+
+    Raises:
+        SchemaError: 스키마와 맞지 않는 경우
+    """
+    return _coerce(data, schema, "$")
+
+def parse_json_response(text, schema, allow_partial=True):
+    """
+    AI 응답에서 JSON을 추출하고 스키마로 검증
+
+    Args:
+        text (str): AI 응답 텍스트
+        schema (dict): 검증할 스키마
+        allow_partial (bool): 잘린 JSON 복원 여부
+
+    Returns:
+        검증된 JSON 값
+
+    Raises:
+        ValueError: JSON을 추출할 수 없거나 스키마와 맞지 않는 경우
+    """
+    return validate_json(extract_json(text, allow_partial), schema)
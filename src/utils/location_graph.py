@@ -0,0 +1,206 @@
+"""
+위치 그래프 유틸리티 모듈
+
+테마마다 고정된 위치들을 모든 위치 쌍이 연결된 방향 그래프로 보고, 경로마다 거리, 이동 시간, 위험도를 계산합니다.
+경로별 이동 스토리 변형을 캐시해 두었다가 이동할 때 가장 적게 보여준 변형을 바로 고르고,
+모자라거나 여러 번 보여준 변형은 호출한 쪽이 백그라운드에서 새로 만들어 채우도록 알려줍니다.
+"""
+import collections
+import math
+import random
+import threading
+
+class LocationGraph:
+    """테마의 고정 위치 사이 이동 경로 그래프"""
+    def __init__(self, locations, nodes=None, default_danger=2, travel_speed=4.0, long_distance=10.0):
+        self.locations = list(locations)
+        self.travel_speed = travel_speed
+        self.long_distance = long_distance
+        self.nodes = {}
+        nodes = nodes or {}
+        for i, location in enumerate(self.locations):
+            node = dict(nodes.get(location, {}))
+            if "position" not in node:
+                # 좌표가 없는 위치는 반지름 5km 원 위에 고르게 배치
+                angle = 2 * math.pi * i / len(self.locations)
+                node["position"] = (round(5 * math.cos(angle), 1), round(5 * math.sin(angle), 1))
+            node.setdefault("danger", default_danger)
+            self.nodes[location] = node
+
+    def __contains__(self, location):
+        return location in self.nodes
+
+    def edge(self, origin, destination):
+        """
+        경로 정보 반환
+
+        Args:
+            origin (str): 출발 위치
+            destination (str): 목적지
+
+        Returns:
+            dict or None: origin, destination, distance(km), travel_hours, danger(0~5)
+                          (같은 위치이거나 그래프에 없는 위치면 None)
+        """
+        if origin == destination or origin not in self.nodes or destination not in self.nodes:
+            return None
+        (x1, y1), (x2, y2) = self.nodes[origin]["position"], self.nodes[destination]["position"]
+        distance = round(math.hypot(x2 - x1, y2 - y1), 1)
+        # 경로 위험도는 두 위치 중 더 위험한 쪽 기준, 먼 길이면 1 증가
+        danger = max(self.nodes[origin]["danger"], self.nodes[destination]["danger"])
+        if distance >= self.long_distance:
+            danger += 1
+        return {
+            "origin": origin,
+            "destination": destination,
+            "distance": distance,
+            "travel_hours": round(distance / self.travel_speed, 1) if self.travel_speed else None,
+            "danger": min(danger, 5)
+        }
+
+    def edges(self, origin=None):
+        """
+        경로 목록 (가까운 순)
+
+        Args:
+            origin (str): 이 위치에서 나가는 경로만 반환 (None이면 모든 경로)
+
+        Returns:
+            list: 경로 정보 목록
+        """
+        origins = [origin] if origin is not None else self.locations
+        edges = [
+            self.edge(start, destination)
+            for start in origins
+            for destination in self.locations
+            if start in self.nodes and start != destination
+        ]
+        return sorted(edges, key=lambda edge: (self.locations.index(edge["origin"]), edge["distance"]))
+
+def describe_route(edge, danger_labels):
+    """
+    경로 정보를 짧은 설명으로 변환
+
+    Args:
+        edge (dict): LocationGraph.edge 결과
+        danger_labels (list): 위험도(0~5)별 이름
+
+    Returns:
+        str: "약 5.8km, 약 1.5시간 · 위험도: 위험" 형태의 설명 (경로가 없으면 빈 문자열)
+    """
+    if not edge:
+        return ""
+    text = f"약 {edge['distance']}km"
+    if edge.get("travel_hours") is not None:
+        text += f", 약 {edge['travel_hours']}시간"
+    return f"{text} · 위험도: {danger_labels[edge['danger']]}"
+
+class MovementVariantStore:
+    """경로별 이동 스토리 변형 캐시 (여러 세션이 공유, 스레드 안전)"""
+    def __init__(self, variants_per_edge=3, refresh_after_uses=2, max_edges=2000):
+        self.variants_per_edge = variants_per_edge
+        self.refresh_after_uses = refresh_after_uses
+        self.max_edges = max_edges
+        self._lock = threading.Lock()
+        self._variants = collections.OrderedDict()   # 경로 키 -> [[스토리, 보여준 횟수], ...] (최근 사용 순)
+        self._refreshing = set()                    # 새 변형을 만드는 중인 경로 키
+        self._last = {}                             # 경로 키 -> 마지막으로 보여준 스토리
+        self._stats = {"hits": 0, "misses": 0, "added": 0, "refreshes": 0}
+
+    def count(self, key):
+        """경로에 캐시된 변형 수"""
+        with self._lock:
+            return len(self._variants.get(key, ()))
+
+    def pick(self, key, rng=None):
+        """
+        경로의 변형 중 가장 적게 보여준 것 하나를 골라 반환
+
+        Args:
+            key (tuple): 경로 키
+            rng (random.Random): 같은 횟수끼리 고를 난수 생성기 (None이면 모듈 전역 난수)
+
+        Returns:
+            str or None: 이동 스토리 (캐시된 변형이 없으면 None)
+        """
+        with self._lock:
+            variants = self._variants.get(key)
+            if not variants:
+                self._stats["misses"] += 1
+                return None
+            self._variants.move_to_end(key)
+            fewest = min(uses for _, uses in variants)
+            candidates = [variant for variant in variants if variant[1] == fewest]
+            # 같은 횟수끼리는 방금 보여준 스토리를 피함
+            candidates = [variant for variant in candidates if variant[0] != self._last.get(key)] or candidates
+            chosen = (rng or random).choice(candidates)
+            chosen[1] += 1
+            self._last[key] = chosen[0]
+            self._stats["hits"] += 1
+            return chosen[0]
+
+    def add(self, key, story):
+        """
+        경로에 변형 추가 (가득 차면 가장 많이 보여준 변형을 버림)
+
+        Args:
+            key (tuple): 경로 키
+            story (str): 이동 스토리
+
+        Returns:
+            bool: 추가했으면 True (비어 있거나 이미 있는 스토리면 False)
+        """
+        story = (story or "").strip()
+        if not story:
+            return False
+        with self._lock:
+            variants = self._variants.setdefault(key, [])
+            self._variants.move_to_end(key)
+            if any(text == story for text, _ in variants):
+                return False
+            variants.append([story, 0])
+            while len(variants) > self.variants_per_edge:
+                variants.remove(max(variants, key=lambda variant: variant[1]))
+            while len(self._variants) > self.max_edges:
+                evicted, _ = self._variants.popitem(last=False)
+                self._last.pop(evicted, None)
+            self._stats["added"] += 1
+            return True
+
+    def needs_refresh(self, key):
+        """변형이 모자라거나 기준 횟수 이상 보여준 변형이 있으면 True"""
+        with self._lock:
+            variants = self._variants.get(key, ())
+            return len(variants) < self.variants_per_edge or any(uses >= self.refresh_after_uses for _, uses in variants)
+
+    def begin_refresh(self, key):
+        """
+        경로의 새 변형 생성을 시작한다고 표시 (경로마다 한 번에 하나만)
+
+        Returns:
+            bool: 시작해도 되면 True (이미 생성 중이면 False)
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key):
+        """경로의 새 변형 생성이 끝났다고 표시"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def get_stats(self):
+        """
+        캐시 통계 반환
+
+        Returns:
+            dict: 적중/실패 횟수, 추가한 변형 수, 시작한 새 변형 생성 수, 캐시된 경로 수와 적중률
+        """
+        with self._lock:
+            stats = dict(self._stats, edges=len(self._variants), refreshing=len(self._refreshing))
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
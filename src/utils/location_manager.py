@@ -1,7 +1,22 @@
 """
 위치 관련 유틸리티 함수를 제공하는 모듈
 """
-from modules.ai_service import generate_gemini_text
+import hashlib
+import streamlit as st
+from modules.ai_service import generate_gemini_result, stream_gemini_text, build_movement_prompt, sample_content_pack
+from config.constants import (
+    MODEL_RESPONSE_OUTCOMES,
+    THEME_LOCATIONS,
+    DEFAULT_LOCATIONS,
+    LOCATION_GRAPH_NODES,
+    LOCATION_GRAPH_SETTINGS,
+    LOCATION_DANGER_LABELS
+)
+from utils.background_tasks import submit_background
+from utils.content_pack import make_section_key
+from utils.dice_roller import get_dice_rng
+from utils.location_graph import LocationGraph, MovementVariantStore, describe_route
+from utils.text_stream import TextStream
 
 def generate_locations(theme):
     """
@@ -13,43 +28,252 @@ def generate_locations(theme):
     Returns:
         list: 생성된 위치 목록
     """
-    locations = {
-        'fantasy': ["왕국의 수도", "마법사의 탑", "고대 숲", "상인 거리", "지하 미궁"],
-        'sci-fi': ["중앙 우주 정거장", "연구 시설", "거주 구역", "우주선 정비소", "외계 식민지"],
-        'dystopia': ["지하 피난처", "통제 구역", "폐허 지대", "저항군 은신처", "권력자 거주구"]
-    }
-    return locations.get(theme, ["시작 지점", "미지의 땅", "중심부", "외곽 지역", "비밀 장소"])
+    return list(THEME_LOCATIONS.get(theme, DEFAULT_LOCATIONS))
 
-def generate_movement_story(current_location, destination, theme):
+@st.cache_resource
+def get_location_graph(theme):
     """
-    장소 이동 시 스토리 생성
+    테마별 위치 그래프 반환 (프로세스 전체에서 공유)
+    
+    Args:
+        theme (str): 세계관 테마
+        
+    Returns:
+        LocationGraph: 위치 사이 거리, 이동 시간, 위험도를 계산하는 그래프
+    """
+    settings = LOCATION_GRAPH_SETTINGS
+    return LocationGraph(
+        generate_locations(theme),
+        LOCATION_GRAPH_NODES.get(theme),
+        default_danger=settings["default_danger"],
+        travel_speed=settings["travel_speed"],
+        long_distance=settings["long_distance"]
+    )
+
+@st.cache_resource
+def get_movement_story_store():
+    """
+    프로세스 전체에서 공유하는 경로별 이동 스토리 변형 캐시 반환
+    
+    Returns:
+        MovementVariantStore: 이동 스토리 변형 캐시
+    """
+    settings = LOCATION_GRAPH_SETTINGS
+    return MovementVariantStore(
+        variants_per_edge=settings["variants_per_edge"],
+        refresh_after_uses=settings["refresh_after_uses"],
+        max_edges=settings["max_edges"]
+    )
+
+def get_movement_stats():
+    """
+    이동 스토리 변형 캐시 통계 반환
+    
+    Returns:
+        dict: 적중/실패 횟수, 캐시된 경로 수, 새 변형 생성 수
+    """
+    return get_movement_story_store().get_stats()
+
+def get_route_info(current_location, destination, theme):
+    """
+    경로 정보 반환 (다른 기능에서 거리와 위험도를 참고할 때 사용)
+    
+    Args:
+        current_location (str): 출발 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        
+    Returns:
+        dict or None: distance(km), travel_hours, danger(0~5)를 담은 경로 정보 (그래프에 없는 경로면 None)
+    """
+    return get_location_graph(theme).edge(current_location, destination)
+
+def describe_route_info(current_location, destination, theme):
+    """
+    경로의 거리, 이동 시간, 위험도를 짧은 설명으로 반환
+    
+    Args:
+        current_location (str): 출발 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        
+    Returns:
+        str: 경로 설명 (그래프에 없는 경로면 빈 문자열)
+    """
+    return describe_route(get_route_info(current_location, destination, theme), LOCATION_DANGER_LABELS)
+
+def make_movement_key(current_location, destination, theme, world_description=None):
+    """
+    이동 스토리 변형 캐시 키 생성 (per_world 설정이면 세계관마다 다른 키)
+    
+    Args:
+        current_location (str): 출발 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명
+        
+    Returns:
+        tuple: (세계관 해시, 테마, 출발 위치, 목적지)
+    """
+    world_key = ""
+    if LOCATION_GRAPH_SETTINGS["per_world"] and world_description:
+        world_key = hashlib.sha256(world_description.encode("utf-8")).hexdigest()[:16]
+    return (world_key, theme, current_location, destination)
+
+def seed_movement_variants(current_location, destination, theme, world_description=None):
+    """
+    처음 쓰는 경로의 변형 캐시를 콘텐츠 팩의 이동 스토리로 채움
+    
+    Args:
+        current_location (str): 출발 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명
+        
+    Returns:
+        tuple: 경로 키
+    """
+    store = get_movement_story_store()
+    key = make_movement_key(current_location, destination, theme, world_description)
+    if store.count(key) == 0:
+        section = make_section_key("movement", theme, current_location, destination)
+        for story in sample_content_pack(section, store.variants_per_edge):
+            store.add(key, story)
+    return key
+
+def refresh_movement_variant(current_location, destination, theme, world_description=None):
+    """
+    경로의 변형이 모자라거나 여러 번 보여줬으면 새 변형을 백그라운드에서 생성 (경로마다 한 번에 하나, 백업 모드에서는 생략)
+    
+    Args:
+        current_location (str): 출발 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명 (있으면 컨텍스트로 함께 전달)
+        
+    Returns:
+        Future or None: 시작한 작업 (시작하지 않았으면 None)
+    """
+    if getattr(st.session_state, 'use_backup_mode', False):
+        return None
+    
+    store = get_movement_story_store()
+    key = make_movement_key(current_location, destination, theme, world_description)
+    if not store.needs_refresh(key) or not store.begin_refresh(key):
+        return None
+    
+    route = get_route_info(current_location, destination, theme)
+    prompt = build_movement_prompt(current_location, destination, theme, route)
+    
+    def generate_variant():
+        try:
+            story, outcome = generate_gemini_result(prompt, 500, call_site="movement_story", priority="prefetch", world_context=world_description)
+            # 백업 응답은 변형으로 남기지 않음
+            if outcome in MODEL_RESPONSE_OUTCOMES:
+                store.add(key, story)
+        finally:
+            store.end_refresh(key)
+    
+    return submit_background(generate_variant)
+
+def prefetch_movement_stories(current_location, theme, world_description=None):
+    """
+    현재 위치에서 나가는 모든 경로의 변형을 준비 (팩으로 채우고 모자란 변형은 백그라운드에서 생성)
     
     Args:
         current_location (str): 현재 위치
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명
+    """
+    if not LOCATION_GRAPH_SETTINGS["prefetch"]:
+        return
+    
+    for route in get_location_graph(theme).edges(current_location):
+        seed_movement_variants(current_location, route["destination"], theme, world_description)
+        refresh_movement_variant(current_location, route["destination"], theme, world_description)
+
+def pick_movement_story(current_location, destination, theme, world_description=None):
+    """
+    경로의 캐시된 변형 중 가장 적게 보여준 이동 스토리를 바로 골라 반환하고 필요하면 새 변형 생성 시작
+    
+    Args:
+        current_location (str): 출발 위치
         destination (str): 목적지
         theme (str): 세계관 테마
+        world_description (str): 세계관 설명
         
     Returns:
-        str: 이동 스토리 텍스트
+        str or None: 이동 스토리 (캐시된 변형이 없으면 None)
     """
-    prompt = f"""
-    당신은 TRPG 게임 마스터입니다. 플레이어가 {current_location}에서 {destination}으로 이동하려고 합니다.
+    key = seed_movement_variants(current_location, destination, theme, world_description)
+    story = get_movement_story_store().pick(key, get_dice_rng())
+    if story is not None:
+        # 캐시가 비어 있으면 호출한 쪽이 바로 생성해 추가하므로 여기서는 생성하지 않음
+        refresh_movement_variant(current_location, destination, theme, world_description)
+    return story
+
+def generate_movement_story(current_location, destination, theme, world_description=None, use_pack=True):
+    """
+    장소 이동 시 스토리 생성 (경로의 변형 캐시나 콘텐츠 팩에 스토리가 있으면 바로 하나를 골라 반환)
     
-    ## 이동 스토리 지침
-    1. 이동 과정과 새로운 장소에 도착했을 때의 상황을 생생하게 묘사해주세요.
-    2. 이동 중 발생하는 작은 사건이나 만남을 포함하세요.
-    3. 출발지와 목적지의 대비되는 분위기나 환경적 차이를 강조하세요.
-    4. 다양한 감각적 묘사(시각, 청각, 후각, 촉각)를 포함하세요.
-    5. 도착 장소에서 플레이어가 볼 수 있는 주요 랜드마크나 특징적 요소를 설명하세요.
-    6. 현지 주민이나 생물의 반응이나 활동을 포함하세요.
+    Args:
+        current_location (str): 현재 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명 (있으면 컨텍스트로 함께 전달)
+        use_pack (bool): 변형 캐시와 콘텐츠 팩 사용 여부 (False면 항상 AI로 생성)
+        
+    Returns:
+        str: 이동 스토리 텍스트
+    """
+    if use_pack:
+        story = pick_movement_story(current_location, destination, theme, world_description)
+        if story:
+            return story
     
-    ## 정보
-    세계 테마: {theme}
-    출발 위치: {current_location}
-    목적지: {destination}
+    route = get_route_info(current_location, destination, theme)
+    prompt = build_movement_prompt(current_location, destination, theme, route)
+    story, outcome = generate_gemini_result(prompt, 500, call_site="movement_story", world_context=world_description)
+    if use_pack and outcome in MODEL_RESPONSE_OUTCOMES:
+        get_movement_story_store().add(make_movement_key(current_location, destination, theme, world_description), story)
+    return story
+
+def stream_movement_story(current_location, destination, theme, world_description=None, use_pack=True):
+    """
+    generate_movement_story의 스트리밍 버전
     
-    약 200단어 내외로 작성해주세요.
-    모든 문장은 완결된 형태로 작성하세요.
+    Args:
+        current_location (str): 현재 위치
+        destination (str): 목적지
+        theme (str): 세계관 테마
+        world_description (str): 세계관 설명 (있으면 컨텍스트로 함께 전달)
+        use_pack (bool): 변형 캐시와 콘텐츠 팩 사용 여부 (캐시된 스토리는 한 번에 전달)
+        
+    Yields:
+        str: 문장 단위로 끊긴 이동 스토리 조각
     """
+    if use_pack:
+        story = pick_movement_story(current_location, destination, theme, world_description)
+        if story:
+            return iter([story])
+    
+    route = get_route_info(current_location, destination, theme)
+    prompt = build_movement_prompt(current_location, destination, theme, route)
+    chunks = stream_gemini_text(prompt, 500, call_site="movement_story", world_context=world_description)
+    if not use_pack:
+        return chunks
+    
+    # 생성한 스토리는 다음 이동에 바로 쓸 수 있도록 변형 캐시에 추가
+    key = make_movement_key(current_location, destination, theme, world_description)
+    stream = TextStream(chunks)
+    
+    def remember():
+        parts = []
+        for chunk in stream:
+            parts.append(chunk)
+            yield chunk
+        # 끝까지 받은 실제 모델 응답만 추가 (백업 응답이나 중간에 끊긴 스트림은 제외)
+        if stream.outcome in MODEL_RESPONSE_OUTCOMES:
+            get_movement_story_store().add(key, "".join(parts))
     
-    return generate_gemini_text(prompt, 500)
\ No newline at end of file
+    return remember()
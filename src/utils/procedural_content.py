@@ -0,0 +1,274 @@
+"""
+절차적 콘텐츠 생성 유틸리티 모듈
+
+테마별 어휘, 한국어 조사 선택, 프롬프트 종류에 맞는 텍스트(추출/판정 프롬프트에는 JSON) 생성기를 제공합니다.
+같은 시드와 프롬프트에는 항상 같은 응답을 돌려주므로 오프라인 스텁 서버와 백업 응답 생성이 함께 사용합니다.
+"""
+import hashlib
+import json
+import random
+import re
+
+# 테마별 어휘
+THEME_WORDS = {
+    "fantasy": {
+        "places": ["고대 신전", "안개 낀 숲", "드워프 광산", "왕궁 정원", "마법사의 탑", "국경 마을"],
+        "people": ["늙은 마법사", "떠돌이 음유시인", "엘프 정찰병", "여관 주인", "수도사"],
+        "items": ["은빛 단검", "치유 물약", "고대 두루마리", "마법 반지", "낡은 지도", "횃불"],
+        "threats": ["고블린 무리", "저주받은 기사", "어둠의 마법사", "거대한 늑대"],
+        "atmosphere": ["마력이 희미하게 일렁입니다", "오래된 룬 문자가 빛을 냅니다", "멀리서 종소리가 울립니다"],
+    },
+    "sci-fi": {
+        "places": ["궤도 정거장", "폐쇄된 연구 구역", "화물 격납고", "식민지 돔", "함교"],
+        "people": ["안드로이드 정비공", "함선 의무관", "외계 상인", "보안 요원", "항법사"],
+        "items": ["플라즈마 절단기", "의료 주사기", "데이터 칩", "에너지 셀", "홀로그램 지도"],
+        "threats": ["폭주한 보안 드론", "정체불명의 외계 생명체", "해적선", "선체 균열"],
+        "atmosphere": ["경고등이 규칙적으로 깜빡입니다", "환풍기 소리가 낮게 울립니다", "창밖으로 성운이 흐릅니다"],
+    },
+    "dystopia": {
+        "places": ["폐허가 된 지하철역", "감시 구역 검문소", "암시장 골목", "버려진 공장", "저항군 은신처"],
+        "people": ["지친 배급소 직원", "저항군 연락책", "정보 브로커", "순찰 중인 집행관", "떠돌이 아이"],
+        "items": ["위조 신분증", "방독면", "배급 쿠폰", "해킹 장치", "응급 키트"],
+        "threats": ["감시 드론", "집행관 순찰대", "약탈자 무리", "독성 안개"],
+        "atmosphere": ["확성기에서 선전 방송이 흘러나옵니다", "잿빛 비가 내립니다", "멀리서 사이렌이 울립니다"],
+    },
+}
+
+ACTION_TAGS = ["[아이템 획득]", "[아이템 사용]", "[위험]", "[상호작용]", "[일반]"]
+ABILITY_CODES = ["STR", "INT", "DEX", "CON", "WIS", "CHA"]
+
+# 받침 여부에 따라 고를 조사 (받침 있음, 받침 없음)
+PARTICLES = {"이(가)": ("이", "가"), "을(를)": ("을", "를"), "은(는)": ("은", "는"), "과(와)": ("과", "와")}
+PARTICLE_PATTERN = re.compile(r"([가-힣])(\*\*)?(이\(가\)|을\(를\)|은\(는\)|과\(와\))")
+
+def fix_particles(text):
+    """
+    '이(가)' 형태의 조사를 앞 글자의 받침에 맞게 선택
+
+    Args:
+        text (str): 조사 후보가 포함된 텍스트
+
+    Returns:
+        str: 조사가 정리된 텍스트
+    """
+    def choose(match):
+        has_batchim = (ord(match.group(1)) - 0xAC00) % 28 != 0
+        with_batchim, without_batchim = PARTICLES[match.group(3)]
+        return match.group(1) + (match.group(2) or "") + (with_batchim if has_batchim else without_batchim)
+
+    return PARTICLE_PATTERN.sub(choose, text)
+
+class ProceduralContentGenerator:
+    """프롬프트 종류에 맞는 한국어 텍스트와 JSON을 결정적으로 생성"""
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def rng_for(self, prompt):
+        """같은 시드와 프롬프트에 대해 항상 같은 난수 생성기 반환"""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def detect_kind(self, prompt):
+        """
+        프롬프트 종류 판별
+
+        Returns:
+            str: turn, ability, outcome, used_items, items, character_options, actions, movement, question, expansion, world, story
+        """
+        if '"narrative"' in prompt:
+            return "turn"
+        if '"ability_code"' in prompt:
+            return "ability"
+        if '"success_outcome"' in prompt:
+            return "outcome"
+        if "사용한 아이템을 추출" in prompt:
+            return "used_items"
+        if "아이템을 추출" in prompt:
+            return "items"
+        if "#옵션 1" in prompt:
+            return "character_options"
+        if "[태그] 행동 설명" in prompt:
+            return "actions"
+        if "이동하려고" in prompt:
+            return "movement"
+        # 앞에 붙은 세계관 설명에 질문 기록이 있을 수 있으므로 확장 요청을 먼저 확인
+        if "이어서 작성" in prompt:
+            return "expansion"
+        if "질문" in prompt:
+            return "question"
+        if "세계를 한국어로 만들어" in prompt or "world" in prompt.lower():
+            return "world"
+        return "story"
+
+    def _theme_words(self, prompt):
+        match = re.search(r"(?:세계 테마|테마):\s*(\S+)", prompt) or re.search(r"'([\w-]+)' 테마", prompt)
+        theme = match.group(1) if match else "fantasy"
+        return THEME_WORDS.get(theme, THEME_WORDS["fantasy"])
+
+    def _field(self, prompt, label, default):
+        match = re.search(label + r":\s*(.+)", prompt)
+        return match.group(1).strip() if match else default
+
+    def _list_field(self, prompt, label):
+        """쉼표로 구분된 필드 값 목록 (필드가 없으면 None, 값이 비어 있으면 빈 목록)"""
+        match = re.search(label + r":[ \t]*(.*)", prompt)
+        return [value.strip() for value in match.group(1).split(",") if value.strip()] if match else None
+
+    def _sentences(self, rng, words, count, location=None, bold_items=()):
+        """분위기, 인물, 위협, 아이템을 섞은 묘사 문장 생성"""
+        location = location or rng.choice(words["places"])
+        templates = [
+            "{location}의 공기는 무겁게 가라앉아 있습니다.",
+            "{atmosphere}",
+            "{person}이(가) 조심스럽게 당신을 바라봅니다.",
+            "발밑에서 오래된 흔적이 이어지고, 그 끝은 어둠 속으로 사라집니다.",
+            "멀리서 {threat}의 기척이 느껴집니다.",
+            "당신은 숨을 고르며 주변을 천천히 살핍니다.",
+            "{person}은(는) {location}에 얽힌 소문을 낮은 목소리로 들려줍니다.",
+            "바람이 방향을 바꾸자 낯선 냄새가 코끝을 스칩니다.",
+            "벽 한쪽에 누군가 급하게 남긴 표식이 보입니다.",
+            "잠시 정적이 흐른 뒤, 작은 소리가 그 정적을 깨뜨립니다.",
+        ]
+        sentences = []
+        for item in bold_items:
+            sentences.append(f"당신은 바닥에 떨어진 **{item}**을(를) 발견하고 챙깁니다.")
+        while len(sentences) < count:
+            sentences.append(rng.choice(templates).format(
+                location=location,
+                atmosphere=rng.choice(words["atmosphere"]),
+                person=rng.choice(words["people"]),
+                threat=rng.choice(words["threats"]),
+            ))
+        rng.shuffle(sentences)
+        return sentences
+
+    def _paragraphs(self, sentences, per_paragraph=3):
+        return "\n\n".join(" ".join(sentences[i:i + per_paragraph]) for i in range(0, len(sentences), per_paragraph))
+
+    def _actions(self, rng, words, inventory=None):
+        """
+        태그별 행동 제안 생성
+
+        Args:
+            rng (random.Random): 난수 생성기
+            words (dict): 테마 어휘
+            inventory (list): 소지품 이름 목록 (None이면 테마 어휘의 아이템 사용, 비어 있으면 [아이템 사용] 제안 제외)
+
+        Returns:
+            list: 태그가 붙은 행동 제안 목록
+        """
+        templates = {
+            "[아이템 획득]": "근처의 상자를 열어 {item}이(가) 있는지 확인한다",
+            "[아이템 사용]": "가지고 있는 {item}을(를) 사용해 길을 밝힌다",
+            "[위험]": "{threat}의 흔적을 따라 더 깊이 들어간다",
+            "[상호작용]": "{person}에게 이곳의 소문을 묻는다",
+            "[일반]": "잠시 몸을 숨기고 주변을 관찰한다",
+        }
+        actions = []
+        for tag in ACTION_TAGS:
+            # 사용 제안은 소지품에서, 획득 제안은 테마 어휘에서 아이템 선택
+            items = inventory if tag == "[아이템 사용]" and inventory is not None else words["items"]
+            if not items:
+                continue
+            actions.append(f"{tag} " + templates[tag].format(
+                item=rng.choice(items),
+                threat=rng.choice(words["threats"]),
+                person=rng.choice(words["people"]),
+            ))
+        return actions
+
+    def _item(self, rng, words, name=None):
+        name = name or rng.choice(words["items"])
+        consumable = any(key in name for key in ("물약", "주사기", "쿠폰", "키트", "셀"))
+        return {
+            "name": name,
+            "description": f"{name}. 손때가 묻어 있지만 아직 쓸 만합니다.",
+            "consumable": consumable,
+            "durability": None if consumable else rng.choice([None, 10, 20]),
+            "quantity": rng.choice([1, 1, 2]) if consumable else 1,
+            "type": "소비품" if consumable else rng.choice(["도구", "무기", "일반"]),
+        }
+
+    def generate(self, prompt, max_tokens=500):
+        """
+        프롬프트에 맞는 응답 생성
+
+        Args:
+            prompt (str): 프롬프트
+            max_tokens (int): 생성할 최대 토큰 수
+
+        Returns:
+            str: 응답 텍스트
+        """
+        rng = self.rng_for(prompt)
+        words = self._theme_words(prompt)
+        kind = self.detect_kind(prompt)
+        location = self._field(prompt, "현재 위치", None)
+
+        if kind == "turn":
+            success = "→ 성공" in prompt
+            item = rng.choice(words["items"]) if success and rng.random() < 0.5 else None
+            sentences = self._sentences(rng, words, 6, location, [item] if item else [])
+            sentences.append("판정은 성공했습니다. 상황이 당신에게 유리하게 흘러갑니다." if success else "판정은 실패했습니다. 예상치 못한 일이 벌어집니다.")
+            data = {
+                "narrative": self._paragraphs(sentences),
+                "gained_items": [self._item(rng, words, item)] if item else [],
+                "used_items": [],
+                "next_actions": self._actions(rng, words),
+            }
+            text = json.dumps(data, ensure_ascii=False)
+        elif kind == "ability":
+            text = json.dumps({
+                "ability_code": rng.choice(ABILITY_CODES),
+                "difficulty": rng.choice([8, 10, 12, 14, 15, 16, 18]),
+                "reason": "행동의 성격상 이 능력치가 가장 크게 작용합니다.",
+                "success_outcome": "원하는 결과를 얻고 새로운 단서를 발견합니다.",
+                "failure_outcome": "일이 꼬이면서 주변의 주의를 끌게 됩니다.",
+                "recommended_dice": "1d20",
+            }, ensure_ascii=False)
+        elif kind == "outcome":
+            place = location or rng.choice(words["places"])
+            text = json.dumps({
+                "reason": "이 행동의 성패는 이 능력치에 가장 크게 달려 있습니다.",
+                "success_outcome": f"{place}에서 " + rng.choice(["뜻한 바를 이루고 유리한 위치를 차지합니다.", "생각보다 순조롭게 일이 풀립니다."]),
+                "failure_outcome": f"{place}에서 " + rng.choice(["일이 틀어져 곤란한 처지에 놓입니다.", "실수로 주변의 주의를 끌고 맙니다."]),
+            }, ensure_ascii=False)
+        elif kind == "items":
+            bold_items = re.findall(r"\*\*(.*?)\*\*", prompt)
+            text = json.dumps([self._item(rng, words, name) for name in bold_items], ensure_ascii=False)
+        elif kind == "used_items":
+            inventory = [name.strip() for name in self._field(prompt, "인벤토리에 있는 아이템", "").split(",") if name.strip()]
+            bold_items = re.findall(r"\*\*(.*?)\*\*", prompt)
+            text = json.dumps([{"name": name, "quantity": 1} for name in bold_items if name in inventory], ensure_ascii=False)
+        elif kind == "character_options":
+            text = "\n\n".join(
+                f"#옵션 {i}:\n" + " ".join(self._sentences(rng, words, 4))
+                for i in range(1, 4)
+            )
+        elif kind == "actions":
+            actions = self._actions(rng, words, self._list_field(prompt, "소지품"))
+            text = "\n".join(f"{i}. {action}" for i, action in enumerate(actions, 1))
+        elif kind == "movement":
+            destination = self._field(prompt, "목적지", rng.choice(words["places"]))
+            sentences = [f"당신은 {destination}을(를) 향해 길을 나섭니다."]
+            sentences += self._sentences(rng, words, 5, destination)
+            sentences.append(f"마침내 {destination}에 도착했습니다.")
+            text = self._paragraphs(sentences)
+        elif kind == "question":
+            sentences = ["좋은 질문입니다.", "소문에 따르면 그 답은 생각보다 가까운 곳에 있다고 합니다."]
+            sentences += self._sentences(rng, words, 3, location)
+            text = " ".join(sentences)
+        elif kind in ("world", "expansion"):
+            places = rng.sample(words["places"], 3)
+            sections = [
+                "# 기본 골격\n" + " ".join(self._sentences(rng, words, 3)),
+                "# 주요 지역\n" + "\n".join(f"- {place}: " + rng.choice(words["atmosphere"]) for place in places),
+                "# 현재 상황\n" + f"{rng.choice(words['threats'])}의 움직임이 심상치 않습니다. " + " ".join(self._sentences(rng, words, 2)),
+            ]
+            text = "\n\n".join(sections if kind == "world" else sections[1:])
+        else:
+            text = self._paragraphs(self._sentences(rng, words, 6, location))
+
+        text = fix_particles(text)
+        # 대략 2글자당 1토큰 기준으로 길이 제한 (JSON 응답은 자르지 않음)
+        return text[:max_tokens * 2] if kind not in ("turn", "ability", "outcome", "items", "used_items") else text
@@ -0,0 +1,186 @@
+"""
+AI 호출 속도 제한 유틸리티 모듈
+
+분당 요청 수와 분당 토큰 수를 토큰 버킷으로 관리하고, 대기 중인 호출을
+우선순위(화면 응답 > 추출 > 미리 생성) 순서로 공정하게 통과시킵니다.
+대기 시간이 허용 범위를 넘을 것으로 예상되는 낮은 우선순위 호출은 줄을 서기 전에 거절합니다.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+class RateLimitRejected(Exception):
+    """속도 제한으로 호출이 거절되었을 때 발생하는 예외"""
+    pass
+
+class TokenBucket:
+    """일정 속도로 채워지는 토큰 버킷"""
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity                    # 최대 보유량 (순간 허용량)
+        self.refill_per_second = refill_per_second  # 초당 충전량
+        self.available = capacity
+        self._updated_at = time.monotonic()
+
+    def refill(self):
+        """경과 시간만큼 충전"""
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def time_until(self, amount):
+        """
+        amount만큼 사용할 수 있을 때까지 남은 시간 계산
+
+        Args:
+            amount (float): 필요한 양
+
+        Returns:
+            float: 대기 시간(초)
+        """
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.refill_per_second
+
+    def take(self, amount):
+        """amount만큼 사용"""
+        self.available -= min(amount, self.capacity)
+
+class RateLimiter:
+    """분당 요청/토큰 제한을 지키며 우선순위 순서로 호출을 통과시키는 속도 제한기"""
+    def __init__(self, requests_per_minute, tokens_per_minute, priorities, max_waits=None):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.priorities = priorities        # 우선순위 이름 -> 순위 (작을수록 먼저)
+        self.max_waits = max_waits or {}    # 우선순위별 최대 대기 시간(초), None이면 제한 없음
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._stats = {
+            name: {"admitted": 0, "rejected": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for name in priorities
+        }
+
+    def _refill(self):
+        self.request_bucket.refill()
+        self.token_bucket.refill()
+
+    def _time_until(self, tokens):
+        return max(self.request_bucket.time_until(1), self.token_bucket.time_until(tokens))
+
+    def _estimate_wait(self, tokens, level):
+        """앞에 선 호출(같거나 높은 우선순위)을 모두 처리한 뒤 통과할 때까지 예상 시간"""
+        ahead = [entry for entry in self._queue if entry[0] <= level]
+        request_demand = len(ahead) + 1
+        token_demand = sum(entry[2] for entry in ahead) + tokens
+        request_wait = max(request_demand - self.request_bucket.available, 0) / self.request_bucket.refill_per_second
+        token_wait = max(token_demand - self.token_bucket.available, 0) / self.token_bucket.refill_per_second
+        return max(request_wait, token_wait)
+
+    def _remove(self, entry):
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+        self._cond.notify_all()
+
+    def _reject(self, priority, message):
+        self._stats[priority]["rejected"] += 1
+        raise RateLimitRejected(message)
+
+    def acquire(self, tokens, priority="interactive", timeout=None):
+        """
+        호출 허가를 받을 때까지 대기
+
+        Args:
+            tokens (int): 이번 호출의 추정 토큰 수
+            priority (str): 우선순위 이름
+            timeout (float): 최대 대기 시간(초), 우선순위별 최대 대기 시간과 비교해 짧은 쪽 적용
+
+        Returns:
+            float: 실제 대기한 시간(초)
+
+        Raises:
+            RateLimitRejected: 허용 시간 안에 통과할 수 없는 경우
+        """
+        level = self.priorities[priority]
+        limits = [limit for limit in (timeout, self.max_waits.get(priority)) if limit is not None]
+        limit = min(limits) if limits else None
+        start = time.monotonic()
+
+        with self._cond:
+            self._refill()
+
+            # 허용 시간 안에 통과할 수 없으면 줄을 서기 전에 거절
+            if limit is not None and self._estimate_wait(tokens, level) > limit:
+                self._reject(priority, f"예상 대기 시간이 허용 시간({limit:.1f}초)을 넘습니다")
+
+            entry = [level, next(self._seq), tokens]
+            heapq.heappush(self._queue, entry)
+
+            while True:
+                self._refill()
+                wait = None
+                if self._queue[0] is entry:
+                    wait = self._time_until(tokens)
+                    if wait <= 0:
+                        self.request_bucket.take(1)
+                        self.token_bucket.take(tokens)
+                        self._remove(entry)
+                        waited = time.monotonic() - start
+                        stats = self._stats[priority]
+                        stats["admitted"] += 1
+                        stats["total_wait"] += waited
+                        stats["max_wait"] = max(stats["max_wait"], waited)
+                        return waited
+
+                if limit is not None:
+                    remaining = limit - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._remove(entry)
+                        self._reject(priority, f"허용 시간({limit:.1f}초) 안에 차례가 오지 않았습니다")
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                # 앞선 호출이 통과하거나 버킷이 충전될 때까지 대기
+                self._cond.wait(wait)
+
+    def estimate_wait(self, tokens, priority="interactive"):
+        """
+        지금 줄을 서면 통과할 때까지 걸릴 예상 시간 계산 (모델 등급을 낮출지 판단할 때 사용)
+
+        Args:
+            tokens (int): 이번 호출의 추정 토큰 수
+            priority (str): 우선순위 이름
+
+        Returns:
+            float: 예상 대기 시간(초)
+        """
+        with self._cond:
+            self._refill()
+            return self._estimate_wait(tokens, self.priorities[priority])
+
+    def get_stats(self):
+        """
+        속도 제한 통계 반환
+
+        Returns:
+            dict: 대기열 길이, 버킷 잔량, 우선순위별 통과/거절 수와 대기 시간
+        """
+        with self._cond:
+            self._refill()
+            queue_depth = {name: 0 for name in self.priorities}
+            levels = {level: name for name, level in self.priorities.items()}
+            for entry in self._queue:
+                queue_depth[levels[entry[0]]] += 1
+
+            by_priority = {}
+            for name, stats in self._stats.items():
+                by_priority[name] = dict(stats)
+                by_priority[name]["avg_wait"] = stats["total_wait"] / stats["admitted"] if stats["admitted"] else 0.0
+
+            return {
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": queue_depth,
+                "available_requests": self.request_bucket.available,
+                "available_tokens": self.token_bucket.available,
+                "by_priority": by_priority
+            }
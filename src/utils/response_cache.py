@@ -0,0 +1,218 @@
+"""
+AI 응답 캐싱 유틸리티 모듈
+
+메모리 LRU 계층과 SQLite 디스크 계층으로 구성된 2단계 캐시를 제공합니다.
+디스크 계층은 프로세스 재시작 후에도 유지됩니다.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_prompt(prompt):
+    """
+    캐시 키 생성을 위한 프롬프트 정규화
+
+    들여쓰기와 연속 공백 차이만 있는 프롬프트가 같은 키를 갖도록 합니다.
+
+    Args:
+        prompt (str): 원본 프롬프트
+
+    Returns:
+        str: 정규화된 프롬프트
+    """
+    lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in prompt.strip().splitlines()]
+    return "\n".join(lines)
+
+def make_cache_key(prompt, generation_config=None, safety_settings=None, model_name=""):
+    """
+    프롬프트와 생성 설정으로 캐시 키 생성
+
+    Args:
+        prompt (str): 프롬프트
+        generation_config (dict): 생성 설정
+        safety_settings (list): 안전 설정
+        model_name (str): 모델 이름
+
+    Returns:
+        str: SHA-256 해시 키
+    """
+    payload = json.dumps(
+        {
+            "prompt": normalize_prompt(prompt),
+            "config": generation_config or {},
+            "safety": safety_settings or [],
+            "model": model_name,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """메모리 LRU + SQLite 디스크 2단계 응답 캐시"""
+
+    def __init__(self, db_path=None, ttl=86400, memory_max_entries=256, disk_max_entries=5000):
+        self.db_path = db_path                      # 디스크 캐시 경로 (None이면 메모리만 사용)
+        self.ttl = ttl                              # 항목 유효 시간(초)
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory = OrderedDict()                # key -> (저장 시각, 응답)
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if db_path:
+            self._open_disk()
+
+    def _open_disk(self):
+        """SQLite 디스크 계층 초기화 - 실패 시 메모리 전용으로 동작"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+            self._conn.commit()
+        except sqlite3.Error:
+            self._conn = None
+
+    def get(self, key):
+        """
+        캐시에서 응답 조회
+
+        Args:
+            key (str): 캐시 키
+
+        Returns:
+            str or None: 캐시된 응답 또는 없으면 None
+        """
+        now = time.time()
+        with self._lock:
+            # 1단계: 메모리
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return response
+                del self._memory[key]
+
+            # 2단계: 디스크
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        response, created_at = row
+                        if now - created_at <= self.ttl:
+                            self._conn.execute(
+                                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                            )
+                            self._conn.commit()
+                            self._remember(key, created_at, response)
+                            self.stats["disk_hits"] += 1
+                            return response
+                        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self._conn.commit()
+                except sqlite3.Error:
+                    pass
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key, response):
+        """
+        응답을 캐시에 저장
+
+        Args:
+            key (str): 캐시 키
+            response (str): 저장할 응답
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            self.stats["stores"] += 1
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                        (key, response, now, now),
+                    )
+                    self._evict_disk(now)
+                    self._conn.commit()
+                except sqlite3.Error:
+                    pass
+
+    def _remember(self, key, created_at, response):
+        """메모리 계층에 저장하고 용량 초과 시 가장 오래된 항목 제거"""
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self.stats["memory_evictions"] += 1
+
+    def _evict_disk(self, now):
+        """디스크 계층의 만료 항목 및 용량 초과 항목 제거"""
+        cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        self.stats["disk_evictions"] += max(cursor.rowcount, 0)
+
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.disk_max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["disk_evictions"] += overflow
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM responses")
+                    self._conn.commit()
+                except sqlite3.Error:
+                    pass
+
+    def get_stats(self):
+        """
+        캐시 적중/실패 통계 반환
+
+        Returns:
+            dict: 적중률을 포함한 통계 정보
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        total = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = hits / total if total else 0.0
+        return stats
@@ -0,0 +1,64 @@
+"""
+모델 라우팅 통계 유틸리티 모듈
+
+호출 위치(라우트)별로 어느 모델 등급으로 보냈는지, 대기열이 밀려 등급을 낮춘 횟수,
+성공/실패 수와 호출 시간을 집계합니다.
+"""
+import threading
+
+class RouteMetrics:
+    """호출 위치별 모델 등급 선택과 호출 결과 집계"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def _route(self, call_site):
+        return self._routes.setdefault(call_site or "default", {
+            "calls": 0, "tiers": {}, "downgrades": 0, "successes": 0, "failures": 0,
+            "total_latency": 0.0, "max_latency": 0.0
+        })
+
+    def record_route(self, call_site, tier, downgraded=False):
+        """
+        호출 한 번의 모델 등급 선택 기록
+
+        Args:
+            call_site (str): 호출 위치 이름
+            tier (str): 선택한 모델 등급
+            downgraded (bool): 대기열이 밀려 등급을 낮췄으면 True
+        """
+        with self._lock:
+            route = self._route(call_site)
+            route["calls"] += 1
+            route["tiers"][tier] = route["tiers"].get(tier, 0) + 1
+            if downgraded:
+                route["downgrades"] += 1
+
+    def record_result(self, call_site, latency, success):
+        """
+        호출 한 번의 결과 기록
+
+        Args:
+            call_site (str): 호출 위치 이름
+            latency (float): 대기열 대기와 재시도를 포함한 호출 시간(초)
+            success (bool): 모델 응답을 받았으면 True, 백업 응답으로 대체했으면 False
+        """
+        with self._lock:
+            route = self._route(call_site)
+            route["successes" if success else "failures"] += 1
+            route["total_latency"] += latency
+            route["max_latency"] = max(route["max_latency"], latency)
+
+    def get_stats(self):
+        """
+        호출 위치별 라우팅 통계 반환
+
+        Returns:
+            dict: 호출 위치 -> 등급별 호출 수, 등급 낮춘 횟수, 성공/실패 수, 평균/최대 호출 시간
+        """
+        with self._lock:
+            stats = {call_site: dict(route, tiers=dict(route["tiers"])) for call_site, route in self._routes.items()}
+        for route in stats.values():
+            finished = route["successes"] + route["failures"]
+            route["avg_latency"] = route["total_latency"] / finished if finished else 0.0
+        return stats
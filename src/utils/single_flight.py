@@ -0,0 +1,76 @@
+"""
+동일 요청 합치기(single-flight) 유틸리티 모듈
+
+같은 키의 작업이 이미 진행 중이면 새로 시작하지 않고 진행 중인 작업의 결과를 함께 받습니다.
+다양한 결과가 필요한 작업은 한 작업의 결과를 받을 수 있는 최대 인원(fan-out)을 제한합니다.
+"""
+import threading
+from concurrent.futures import Future
+
+class Flight:
+    """진행 중인 작업 하나와 그 결과를 기다리는 요청 수"""
+    def __init__(self):
+        self.future = Future()  # 작업 결과 (스레드/이벤트 루프에 관계없이 공유)
+        self.sharers = 1        # 결과를 받을 요청 수 (작업을 시작한 요청 포함)
+
+class SingleFlight:
+    """키별로 진행 중인 작업을 관리하는 요청 합치기 그룹"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {"leaders": 0, "shared": 0}
+
+    def join(self, key, max_sharers=None):
+        """
+        진행 중인 작업에 합류하거나 새 작업의 시작을 맡음
+
+        Args:
+            key (str): 작업 키
+            max_sharers (int): 한 작업의 결과를 받을 수 있는 최대 요청 수 (None이면 제한 없음)
+
+        Returns:
+            tuple: (Flight, 작업을 직접 실행해야 하면 True)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and (max_sharers is None or flight.sharers < max_sharers):
+                flight.sharers += 1
+                self._stats["shared"] += 1
+                return flight, False
+
+            # 진행 중인 작업이 없거나 인원이 찼으면 새 작업 시작
+            flight = Flight()
+            self._flights[key] = flight
+            self._stats["leaders"] += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        """
+        작업 완료를 기록하고 기다리는 요청에 결과 전달
+
+        Args:
+            key (str): 작업 키
+            flight (Flight): join에서 받은 작업
+            result: 작업 결과
+            error (Exception): 작업 중 발생한 예외 (있으면 결과 대신 전달)
+        """
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+
+    def get_stats(self):
+        """
+        요청 합치기 통계 반환
+
+        Returns:
+            dict: 실제 실행한 작업 수, 합쳐진 요청 수, 진행 중인 작업 수
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        return stats
@@ -0,0 +1,231 @@
+"""
+오프라인 테스트용 LLM 스텁 서버 모듈
+
+실제 API 없이 게임 전체 흐름의 처리량과 지연 시간을 측정할 수 있도록
+프롬프트 종류에 맞는 한국어 텍스트(추출/판정 프롬프트에는 JSON)를 결정적으로 생성합니다.
+지연 시간 분포와 오류 주입을 설정할 수 있으며, 프로세스 안에서 바로 쓰거나 HTTP 서버로 띄울 수 있습니다.
+
+실행 예:
+    python -m src.utils.stub_server --port 8765 --latency lognormal --median 0.8 --error-rate 0.05
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .procedural_content import ProceduralContentGenerator
+
+# 주입할 수 있는 오류 종류와 메시지 (circuit_breaker.classify_error가 분류할 수 있는 형태)
+STUB_ERRORS = {
+    "quota": (429, "429 Resource has been exhausted (e.g. check quota)."),
+    "transient": (503, "503 Service Unavailable"),
+    "safety": (400, "Response was blocked by safety settings"),
+    "timeout": (504, "504 Deadline Exceeded"),
+}
+
+class StubError(Exception):
+    """스텁이 주입한 오류"""
+    def __init__(self, kind, message, status=500):
+        super().__init__(message)
+        self.kind = kind        # 오류 종류 (quota, transient, safety, timeout)
+        self.status = status    # HTTP 상태 코드
+
+class LatencyModel:
+    """응답 지연 시간 분포"""
+    def __init__(self, distribution="lognormal", median=0.8, sigma=0.5, minimum=0.0, maximum=30.0, chunk_delay=0.05):
+        self.distribution = distribution    # fixed, uniform, exponential, lognormal
+        self.median = median                # 첫 응답까지의 중앙값(초)
+        self.sigma = sigma                  # 분포 폭 (lognormal: 로그 표준편차, uniform: ±비율)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.chunk_delay = chunk_delay      # 스트리밍 조각 사이 지연(초)
+
+    def sample(self, rng):
+        """
+        첫 응답까지의 지연 시간 샘플링
+
+        Args:
+            rng (random.Random): 난수 생성기
+
+        Returns:
+            float: 지연 시간(초)
+        """
+        if self.distribution == "fixed":
+            value = self.median
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.median * (1 - self.sigma), self.median * (1 + self.sigma))
+        elif self.distribution == "exponential":
+            value = rng.expovariate(math.log(2) / self.median) if self.median > 0 else 0.0
+        else:
+            value = rng.lognormvariate(math.log(self.median), self.sigma) if self.median > 0 else 0.0
+        return min(max(value, self.minimum), self.maximum)
+
+class StubEngine:
+    """지연 시간과 오류 주입을 적용해 스텁 응답을 만드는 엔진 (프로세스 내부와 HTTP 서버가 공유)"""
+    def __init__(self, seed=0, latency=None, error_rate=0.0, error_weights=None, timeout_hang=60.0):
+        self.generator = ProceduralContentGenerator(seed)
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate                                    # 오류 주입 비율 (0~1)
+        self.error_weights = error_weights or {"transient": 1.0}        # 오류 종류별 가중치
+        self.timeout_hang = timeout_hang                                # timeout 오류 시 응답을 멈추는 시간(초)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0}
+
+    def _draw(self):
+        """요청마다 지연 시간과 주입할 오류 결정"""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency.sample(self._rng)
+            error = None
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                kinds = list(self.error_weights)
+                error = self._rng.choices(kinds, weights=[self.error_weights[kind] for kind in kinds])[0]
+                self.stats["errors"] += 1
+            return delay, error
+
+    def _raise_or_hang(self, error):
+        if error is None:
+            return
+        if error == "timeout":
+            # 실제 장애처럼 응답 없이 멈춘 뒤 실패
+            time.sleep(self.timeout_hang)
+        status, message = STUB_ERRORS[error]
+        raise StubError(error, message, status)
+
+    def generate(self, prompt, max_tokens=500):
+        """
+        지연 후 전체 응답 반환
+
+        Raises:
+            StubError: 오류가 주입된 경우
+        """
+        delay, error = self._draw()
+        time.sleep(delay)
+        self._raise_or_hang(error)
+        return self.generator.generate(prompt, max_tokens)
+
+    def stream(self, prompt, max_tokens=500):
+        """
+        지연 후 응답을 조각 단위로 생성
+
+        Yields:
+            str: 응답 조각 (공백 단위)
+
+        Raises:
+            StubError: 오류가 주입된 경우
+        """
+        delay, error = self._draw()
+        time.sleep(delay)
+        self._raise_or_hang(error)
+        text = self.generator.generate(prompt, max_tokens)
+        for piece in re.findall(r"\S+\s*", text):
+            yield piece
+            if self.latency.chunk_delay:
+                time.sleep(self.latency.chunk_delay)
+
+def make_handler(engine):
+    """스텁 엔진을 사용하는 HTTP 요청 처리기 클래스 생성"""
+    class StubRequestHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", **engine.stats})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            prompt = request.get("prompt", "")
+            max_tokens = int(request.get("max_tokens", 500))
+
+            try:
+                if not request.get("stream"):
+                    self._send_json(200, {"text": engine.generate(prompt, max_tokens)})
+                    return
+
+                # 첫 조각 전에 오류가 나면 상태 코드로 알리고, 이후에는 줄 단위 JSON으로 조각 전송
+                chunks = engine.stream(prompt, max_tokens)
+                first = next(chunks, "")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+                self.end_headers()
+                for chunk in itertools.chain([first], chunks):
+                    self.wfile.write((json.dumps({"text": chunk}, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+            except StubError as e:
+                self._send_json(e.status, {"error": str(e), "kind": e.kind})
+
+    return StubRequestHandler
+
+def start_stub_server(engine, host="127.0.0.1", port=8765):
+    """
+    백그라운드 스레드에서 스텁 HTTP 서버 시작
+
+    Args:
+        engine (StubEngine): 응답 생성 엔진
+        host (str): 바인딩 주소
+        port (int): 포트 (0이면 빈 포트 자동 선택)
+
+    Returns:
+        ThreadingHTTPServer: 실행 중인 서버 (server.server_address로 실제 주소 확인, shutdown()으로 종료)
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(engine))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="trpg-stub-server", daemon=True).start()
+    return server
+
+def main():
+    """명령줄에서 스텁 서버 실행"""
+    parser = argparse.ArgumentParser(description="TRPG LLM 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="lognormal", choices=["fixed", "uniform", "exponential", "lognormal"])
+    parser.add_argument("--median", type=float, default=0.8, help="첫 응답까지 지연 시간 중앙값(초)")
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--errors", default="transient", help="주입할 오류 종류 (예: quota:1,transient:2,timeout:1,safety:1)")
+    args = parser.parse_args()
+
+    error_weights = {}
+    for part in args.errors.split(","):
+        kind, _, weight = part.partition(":")
+        error_weights[kind.strip()] = float(weight or 1)
+
+    engine = StubEngine(
+        seed=args.seed,
+        latency=LatencyModel(args.latency, args.median, args.sigma, chunk_delay=args.chunk_delay),
+        error_rate=args.error_rate,
+        error_weights=error_weights
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(engine))
+    print(f"스텁 서버 실행 중: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+LLM 호출 계측 유틸리티 모듈
+
+프로세스 안의 지표 저장소에 카운터와 히스토그램을 모으고
+Prometheus 텍스트 형식과 JSON lines 형식으로 내보냅니다.
+설정하면 호출 한 번마다 이벤트를 JSON lines 파일에 덧붙여 기록합니다.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+# 응답 시간 히스토그램 구간 상한(초)
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+def _escape(value):
+    """Prometheus 라벨 값 이스케이프"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """라벨 조합별 값을 가지는 지표 기본 클래스"""
+    type = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _matching(self, labels):
+        """주어진 라벨을 모두 만족하는 시계열 목록 (지정하지 않은 라벨은 합침)"""
+        wanted = {name: str(value) for name, value in labels.items()}
+        with self._lock:
+            return [
+                (key, value) for key, value in self._series.items()
+                if all(dict(zip(self.labelnames, key)).get(name) == value for name, value in wanted.items())
+            ]
+
+    def series_labels(self):
+        """
+        값이 기록된 라벨 조합 목록
+
+        Returns:
+            list: 라벨 이름 -> 값 사전 목록
+        """
+        with self._lock:
+            keys = sorted(self._series)
+        return [dict(zip(self.labelnames, key)) for key in keys]
+
+    def label_values(self, name):
+        """
+        라벨 하나가 가진 값 목록
+
+        Args:
+            name (str): 라벨 이름
+
+        Returns:
+            list: 정렬된 라벨 값 목록
+        """
+        index = self.labelnames.index(name)
+        with self._lock:
+            return sorted({key[index] for key in self._series})
+
+class Counter(Metric):
+    """증가만 하는 카운터"""
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        """
+        라벨 조합의 값 증가
+
+        Args:
+            amount (float): 증가량
+            **labels: 라벨 이름 -> 값
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def get(self, **labels):
+        """
+        라벨 조건을 만족하는 값의 합 반환
+
+        Args:
+            **labels: 라벨 이름 -> 값 (지정하지 않은 라벨은 모두 합침)
+
+        Returns:
+            float: 값의 합
+        """
+        return sum(value for _, value in self._matching(labels))
+
+    def samples(self):
+        """(이름, 라벨 쌍 목록, 값) 목록 반환"""
+        with self._lock:
+            items = sorted(self._series.items())
+        return [(self.name, list(zip(self.labelnames, key)), value) for key, value in items]
+
+class Histogram(Metric):
+    """구간별 관측 수, 합계, 개수를 모으는 히스토그램"""
+    type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """
+        값 하나 관측
+
+        Args:
+            value (float): 관측값
+            **labels: 라벨 이름 -> 값
+        """
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _merged(self, labels):
+        counts = [0] * len(self.buckets)
+        total, count = 0.0, 0
+        for _, series in self._matching(labels):
+            counts = [a + b for a, b in zip(counts, series["buckets"])]
+            total += series["sum"]
+            count += series["count"]
+        return counts, total, count
+
+    def count(self, **labels):
+        """라벨 조건을 만족하는 관측 수"""
+        return self._merged(labels)[2]
+
+    def quantile(self, q, **labels):
+        """
+        구간 안에서 선형 보간으로 분위수 추정 (Prometheus histogram_quantile과 같은 방식)
+
+        Args:
+            q (float): 분위 (0~1)
+            **labels: 라벨 이름 -> 값 (지정하지 않은 라벨은 모두 합침)
+
+        Returns:
+            float or None: 추정 분위수 또는 관측이 없으면 None
+        """
+        counts, _, count = self._merged(labels)
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative, lower = 0, 0.0
+        for bound, bucket_count in zip(self.buckets, counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if bound == math.inf:
+                    # 마지막 구간은 상한이 없으므로 가장 큰 유한 상한을 반환
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            if bound != math.inf:
+                lower = bound
+        return lower
+
+    def samples(self):
+        """(이름, 라벨 쌍 목록, 값) 목록 반환 (_bucket은 누적 개수)"""
+        with self._lock:
+            items = sorted((key, dict(series, buckets=list(series["buckets"]))) for key, series in self._series.items())
+        samples = []
+        for key, series in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series["buckets"]):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", pairs + [("le", _format_value(bound))], cumulative))
+            samples.append((f"{self.name}_sum", pairs, series["sum"]))
+            samples.append((f"{self.name}_count", pairs, series["count"]))
+        return samples
+
+class MetricsRegistry:
+    """프로세스 안의 지표 저장소"""
+    def __init__(self, event_log_path=None):
+        self.event_log_path = event_log_path    # 호출 이벤트를 덧붙일 JSON lines 파일 (None이면 기록 안 함)
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric_class, name, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args)
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """
+        카운터 조회 (없으면 등록)
+
+        Args:
+            name (str): 지표 이름
+            help_text (str): 설명
+            labelnames (tuple): 라벨 이름 목록
+
+        Returns:
+            Counter: 카운터
+        """
+        return self._register(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        히스토그램 조회 (없으면 등록)
+
+        Args:
+            name (str): 지표 이름
+            help_text (str): 설명
+            labelnames (tuple): 라벨 이름 목록
+            buckets (tuple): 구간 상한 목록
+
+        Returns:
+            Histogram: 히스토그램
+        """
+        return self._register(Histogram, name, help_text, labelnames, buckets)
+
+    def get(self, name):
+        """이름으로 등록된 지표 조회 (없으면 None)"""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def log_event(self, event):
+        """
+        호출 이벤트 하나를 JSON lines 파일에 덧붙임 (파일을 설정하지 않았으면 무시)
+
+        Args:
+            event (dict): 이벤트 내용 (기록 시각은 자동으로 추가)
+        """
+        if not self.event_log_path:
+            return
+        line = json.dumps(dict(event, ts=round(time.time(), 3)), ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.event_log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.event_log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def to_prometheus(self):
+        """
+        Prometheus 텍스트 형식으로 내보내기
+
+        Returns:
+            str: Prometheus 텍스트 노출 형식
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, pairs, value in metric.samples():
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self):
+        """
+        시계열마다 한 줄씩 JSON lines 형식으로 내보내기
+
+        Returns:
+            str: JSON lines 텍스트 (히스토그램은 구간별 개수와 p50/p95 포함)
+        """
+        now = round(time.time(), 3)
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            for labels in metric.series_labels():
+                record = {"ts": now, "metric": metric.name, "type": metric.type, "labels": labels}
+                if isinstance(metric, Histogram):
+                    counts, total, count = metric._merged(labels)
+                    record.update({
+                        "count": count,
+                        "sum": total,
+                        "buckets": {_format_value(bound): bucket_count for bound, bucket_count in zip(metric.buckets, counts)},
+                        "p50": metric.quantile(0.5, **labels),
+                        "p95": metric.quantile(0.95, **labels)
+                    })
+                else:
+                    record["value"] = metric.get(**labels)
+                lines.append(json.dumps(record, ensure_ascii=False))
+        return "\n".join(lines) + ("\n" if lines else "")
@@ -0,0 +1,82 @@
+"""
+스트리밍 텍스트 처리 유틸리티 모듈
+
+AI 응답 조각을 문장 단위로 모아 화면에 표시할 수 있도록 합니다.
+"""
+import re
+import unicodedata
+
+# 문장 종결 부호 (뒤에 공백이나 줄바꿈이 와야 문장 끝으로 판단)
+SENTENCE_TERMINATORS = ".!?…。！？"
+SENTENCE_END_PATTERN = re.compile(r'[' + re.escape(SENTENCE_TERMINATORS) + r'][\"\'”’)\]]*(?=\s)|\n')
+
+class SentenceBuffer:
+    """스트리밍 조각을 문장 경계까지 모았다가 내보내는 버퍼"""
+    def __init__(self, min_chars=0):
+        self.min_chars = min_chars      # 한 번에 내보낼 최소 글자 수
+        self._pending = ""
+
+    def feed(self, chunk):
+        """
+        새 조각을 추가하고 완성된 문장 반환
+
+        Args:
+            chunk (str): 스트리밍 응답 조각
+
+        Returns:
+            str: 완성된 문장들 (없으면 빈 문자열)
+        """
+        self._pending += chunk
+
+        # 마지막 문장 경계 위치 찾기
+        cut = 0
+        for match in SENTENCE_END_PATTERN.finditer(self._pending):
+            cut = match.end()
+
+        if cut == 0 or cut < self.min_chars:
+            return ""
+
+        ready = self._pending[:cut]
+        self._pending = self._pending[cut:]
+        return ready
+
+    def flush(self):
+        """
+        남은 텍스트 모두 반환
+
+        Returns:
+            str: 버퍼에 남아 있던 텍스트
+        """
+        remaining = unicodedata.normalize("NFC", self._pending)
+        self._pending = ""
+        return remaining
+
+class TextStream:
+    """스트리밍 생성기를 감싸서 끝까지 읽은 뒤 생성기의 반환값(호출 결과)을 확인할 수 있게 하는 이터러블"""
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.outcome = None     # 끝까지 읽었을 때 생성기가 반환한 값 (중간에 멈추면 None)
+
+    def __iter__(self):
+        self.outcome = yield from self._chunks
+
+def iter_sentences(chunks, min_chars=0):
+    """
+    스트리밍 조각 이터레이터를 문장 단위 이터레이터로 변환
+
+    Args:
+        chunks (iterable): 텍스트 조각 이터레이터
+        min_chars (int): 한 번에 내보낼 최소 글자 수
+
+    Yields:
+        str: 문장 경계에서 끊긴 텍스트
+    """
+    buffer = SentenceBuffer(min_chars)
+    for chunk in chunks:
+        ready = buffer.feed(chunk)
+        if ready:
+            yield unicodedata.normalize("NFC", ready)
+
+    remaining = buffer.flush()
+    if remaining:
+        yield remaining
@@ -0,0 +1,225 @@
+"""
+프롬프트 토큰 예산 관리 유틸리티 모듈
+
+sentencepiece 토크나이저로 토큰 수를 세고, 프롬프트의 가변 구역(직전 이야기, 세계관 설명 등)에
+우선순위에 따라 토큰 예산을 나누어 문장 경계에서 잘라냅니다.
+토크나이저 모델 파일이 없으면 한국어 특성을 반영한 근사치로 셉니다.
+"""
+import math
+import os
+import re
+import threading
+
+try:
+    import sentencepiece as spm
+except ImportError:
+    spm = None
+
+from .text_stream import SENTENCE_END_PATTERN
+
+# 근사 계산용 토큰 후보 (한글 묶음, 영문 단어, 숫자, 기타 기호)
+APPROXIMATE_TOKEN_PATTERN = re.compile(r"[가-힣]+|[A-Za-z]+|\d+|\S")
+
+def approximate_tokens(text):
+    """
+    토크나이저 없이 토큰 수 근사 계산
+
+    한글은 약 1.5음절, 영문은 약 4글자, 숫자는 약 3자리마다 1토큰, 기타 기호는 1토큰으로 계산합니다.
+
+    Args:
+        text (str): 텍스트
+
+    Returns:
+        int: 근사 토큰 수
+    """
+    total = 0
+    for match in APPROXIMATE_TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        first = piece[0]
+        if "가" <= first <= "힣":
+            total += math.ceil(len(piece) / 1.5)
+        elif first.isascii() and first.isalpha():
+            total += math.ceil(len(piece) / 4)
+        elif first.isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1
+    return total
+
+class TokenCounter:
+    """sentencepiece 모델(없으면 근사 계산)로 토큰 수를 세는 계수기"""
+    def __init__(self, model_path=None):
+        self.processor = None
+        if spm is not None and model_path and os.path.exists(model_path):
+            self.processor = spm.SentencePieceProcessor(model_file=model_path)
+        self.source = "sentencepiece" if self.processor is not None else "approximate"
+
+    def count(self, text):
+        """
+        텍스트의 토큰 수 계산
+
+        Args:
+            text (str): 텍스트
+
+        Returns:
+            int: 토큰 수
+        """
+        if not text:
+            return 0
+        if self.processor is not None:
+            return len(self.processor.encode(text))
+        return approximate_tokens(text)
+
+def split_sentences(text):
+    """
+    텍스트를 문장 단위로 나눔 (종결 부호와 뒤따르는 공백 포함)
+
+    Args:
+        text (str): 텍스트
+
+    Returns:
+        list: 문장 목록 (이어 붙이면 원래 텍스트)
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+def _cut_characters(text, max_tokens, counter, keep):
+    """문장 하나가 예산보다 길 때 예산에 맞는 최대 글자 수를 이진 탐색으로 찾아 자름"""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        piece = text[:middle] if keep == "head" else text[len(text) - middle:]
+        if counter.count(piece) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] if keep == "head" else text[len(text) - low:]
+
+def trim_to_tokens(text, max_tokens, counter, keep="head"):
+    """
+    토큰 예산에 맞게 문장 경계에서 텍스트를 자름
+
+    Args:
+        text (str): 텍스트
+        max_tokens (int): 최대 토큰 수
+        counter (TokenCounter): 토큰 계수기
+        keep (str): 남길 쪽 ("head"면 앞부분, "tail"이면 최근 내용인 뒷부분)
+
+    Returns:
+        str: 잘린 텍스트
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if counter.count(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    ordered = sentences if keep == "head" else list(reversed(sentences))
+    kept, used = [], 0
+    for sentence in ordered:
+        tokens = counter.count(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if not kept:
+        # 첫 문장 하나가 예산보다 길면 글자 단위로 자름
+        return _cut_characters(ordered[0].strip(), max_tokens, counter, keep)
+
+    if keep != "head":
+        kept.reverse()
+    return "".join(kept).strip()
+
+class PromptSection:
+    """토큰 예산을 나누어 받을 프롬프트의 가변 구역"""
+    def __init__(self, text, priority=0, keep="head", max_tokens=None):
+        self.text = text or ""
+        self.priority = priority        # 작을수록 먼저 예산을 받음
+        self.keep = keep                # 잘라낼 때 남길 쪽 (head, tail)
+        self.max_tokens = max_tokens    # 이 구역의 최대 토큰 수 (None이면 남은 예산 전부)
+
+def allocate_sections(sections, available_tokens, counter):
+    """
+    우선순위 순서로 구역별 토큰 예산을 나누고 예산에 맞게 자름
+
+    Args:
+        sections (dict): 구역 이름 -> PromptSection
+        available_tokens (int): 구역들이 함께 쓸 수 있는 토큰 수
+        counter (TokenCounter): 토큰 계수기
+
+    Returns:
+        dict: 구역 이름 -> 예산에 맞게 잘린 텍스트
+    """
+    remaining = max(available_tokens, 0)
+    fitted = {}
+    for name, section in sorted(sections.items(), key=lambda item: item[1].priority):
+        limit = remaining if section.max_tokens is None else min(remaining, section.max_tokens)
+        fitted[name] = trim_to_tokens(section.text, limit, counter, section.keep)
+        remaining -= counter.count(fitted[name])
+    return fitted
+
+def fit_prompt(render, total_tokens, counter, **sections):
+    """
+    전체 토큰 예산 안에 들어가도록 가변 구역을 잘라 프롬프트 생성
+
+    가변 구역을 비운 프롬프트의 토큰 수를 먼저 빼고 남은 예산을 구역들에 나눕니다.
+
+    Args:
+        render (callable): 구역 이름을 키워드 인자로 받아 프롬프트를 만드는 함수
+        total_tokens (int): 프롬프트 전체 토큰 예산
+        counter (TokenCounter): 토큰 계수기
+        **sections: 구역 이름 -> PromptSection
+
+    Returns:
+        str: 예산에 맞춘 프롬프트
+    """
+    fixed_tokens = counter.count(render(**{name: "" for name in sections}))
+    return render(**allocate_sections(sections, total_tokens - fixed_tokens, counter))
+
+class TokenUsageTracker:
+    """호출 위치별 입력/출력 토큰 사용량 집계"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage = {}
+
+    def record(self, call_site, prompt_tokens, output_tokens, exact=False):
+        """
+        호출 한 번의 토큰 사용량 기록
+
+        Args:
+            call_site (str): 호출 위치 이름
+            prompt_tokens (int): 입력 토큰 수
+            output_tokens (int): 출력 토큰 수
+            exact (bool): API가 보고한 값이면 True, 직접 센 값이면 False
+        """
+        with self._lock:
+            usage = self._usage.setdefault(call_site or "default", {
+                "calls": 0, "prompt_tokens": 0, "output_tokens": 0, "max_prompt_tokens": 0, "exact_calls": 0
+            })
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["output_tokens"] += output_tokens
+            usage["max_prompt_tokens"] = max(usage["max_prompt_tokens"], prompt_tokens)
+            if exact:
+                usage["exact_calls"] += 1
+
+    def get_stats(self):
+        """
+        호출 위치별 토큰 사용량 반환
+
+        Returns:
+            dict: 호출 위치 -> 호출 수, 입력/출력 토큰 합계와 평균, 최대 입력 토큰 수
+        """
+        with self._lock:
+            stats = {call_site: dict(usage) for call_site, usage in self._usage.items()}
+        for usage in stats.values():
+            usage["avg_prompt_tokens"] = usage["prompt_tokens"] / usage["calls"]
+            usage["avg_output_tokens"] = usage["output_tokens"] / usage["calls"]
+        return stats